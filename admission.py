@@ -0,0 +1,166 @@
+"""
+Admission Control Module
+Tracks in-flight chat work and recent per-stage upstream latency, and
+degrades requests under pressure: skip audio, then image, then shrink
+retrieval/generation size, and finally reject with 503 + Retry-After
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from typing import Deque, Dict, List, Optional, Tuple
+
+import config
+from metrics import registry, Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+ADMISSION_DECISIONS = registry.register(Counter(
+    "storyteller_admission_decisions_total",
+    "Admission outcomes: admitted, rejected and each degradation applied"
+))
+CHAT_IN_FLIGHT = registry.register(Gauge(
+    "storyteller_chat_in_flight",
+    "Chat requests currently admitted"
+))
+
+# Degradation labels reported back to clients
+SKIP_AUDIO = "audio_skipped"
+SKIP_IMAGE = "image_skipped"
+SHRINK_CONTEXT = "context_reduced"
+SHRINK_ANSWER = "answer_shortened"
+
+
+class OverloadedError(Exception):
+    """Raised when the hard in-flight limit is reached"""
+
+    def __init__(self, retry_after: int):
+        super().__init__("Server is overloaded, please retry shortly")
+        self.retry_after = retry_after
+
+
+@dataclass
+class Ticket:
+    """Per-request admission decision"""
+    generate_image: bool
+    generate_audio: bool
+    top_k: int
+    max_tokens: int
+    degraded: List[str] = field(default_factory=list)
+
+
+class AdmissionController:
+    """In-flight and latency based load shedding for the chat path"""
+
+    def __init__(self):
+        self.in_flight = 0
+        self._lock = threading.Lock()
+        # stage -> deque of (timestamp, seconds)
+        self._latencies: Dict[str, Deque[Tuple[float, float]]] = {}
+
+    # Latency tracking ------------------------------------------------------
+
+    def record_timings(self, timings: Dict[str, float]):
+        """Feed per-stage timings (milliseconds, as returned by generate_response)"""
+        now = time.monotonic()
+        with self._lock:
+            for stage, ms in timings.items():
+                window = self._latencies.setdefault(stage, deque(maxlen=config.ADMISSION_LATENCY_SAMPLES))
+                window.append((now, ms / 1000.0))
+
+    def stage_p95(self, stage: str) -> Optional[float]:
+        """p95 latency (seconds) of a stage over the recent window, or None without samples"""
+        cutoff = time.monotonic() - config.ADMISSION_LATENCY_WINDOW_S
+        with self._lock:
+            samples = sorted(value for ts, value in self._latencies.get(stage, ()) if ts >= cutoff)
+        if not samples:
+            return None
+        return samples[min(len(samples) - 1, int(0.95 * len(samples)))]
+
+    def _over_budget(self, stage: str) -> bool:
+        budget = config.ADMISSION_STAGE_BUDGET_S.get(stage)
+        p95 = self.stage_p95(stage)
+        return budget is not None and p95 is not None and p95 > budget
+
+    # Decisions -------------------------------------------------------------
+
+    def decide(self, generate_image: bool, generate_audio: bool, in_flight: int) -> Ticket:
+        """
+        Build the degraded request plan for the given load
+
+        Args:
+            generate_image: Client asked for an image
+            generate_audio: Client asked for audio
+            in_flight: Admitted chat requests including this one
+        """
+        ticket = Ticket(
+            generate_image=generate_image,
+            generate_audio=generate_audio,
+            top_k=config.RETRIEVAL_TOP_K,
+            max_tokens=config.LLM_MAX_TOKENS
+        )
+
+        if ticket.generate_audio and (in_flight >= config.ADMISSION_SKIP_AUDIO_AT or self._over_budget("audio")):
+            ticket.generate_audio = False
+            ticket.degraded.append(SKIP_AUDIO)
+
+        if ticket.generate_image and (in_flight >= config.ADMISSION_SKIP_IMAGE_AT or self._over_budget("image")):
+            ticket.generate_image = False
+            ticket.degraded.append(SKIP_IMAGE)
+
+        if in_flight >= config.ADMISSION_SHRINK_AT or self._over_budget("llm"):
+            if ticket.top_k > config.ADMISSION_DEGRADED_TOP_K:
+                ticket.top_k = config.ADMISSION_DEGRADED_TOP_K
+                ticket.degraded.append(SHRINK_CONTEXT)
+            if ticket.max_tokens > config.ADMISSION_DEGRADED_MAX_TOKENS:
+                ticket.max_tokens = config.ADMISSION_DEGRADED_MAX_TOKENS
+                ticket.degraded.append(SHRINK_ANSWER)
+
+        return ticket
+
+    @contextmanager
+    def admit(self, generate_image: bool, generate_audio: bool):
+        """
+        Admit a chat request for the duration of the block
+
+        Yields:
+            Ticket describing what the request may do
+
+        Raises:
+            OverloadedError: When the hard limit is reached
+        """
+        with self._lock:
+            if self.in_flight >= config.ADMISSION_REJECT_AT:
+                ADMISSION_DECISIONS.inc(action="rejected")
+                raise OverloadedError(config.ADMISSION_RETRY_AFTER_S)
+            self.in_flight += 1
+            in_flight = self.in_flight
+        CHAT_IN_FLIGHT.inc()
+
+        try:
+            ticket = self.decide(generate_image, generate_audio, in_flight)
+            ADMISSION_DECISIONS.inc(action="admitted")
+            for reason in ticket.degraded:
+                ADMISSION_DECISIONS.inc(action=reason)
+            if ticket.degraded:
+                logger.info(f"🪫 Degraded request at {in_flight} in flight: {', '.join(ticket.degraded)}")
+            yield ticket
+        finally:
+            with self._lock:
+                self.in_flight -= 1
+            CHAT_IN_FLIGHT.dec()
+
+    def status(self) -> Dict:
+        """Snapshot for health reporting"""
+        return {
+            "in_flight": self.in_flight,
+            "reject_at": config.ADMISSION_REJECT_AT,
+            "stage_p95_s": {
+                stage: round(p95, 3)
+                for stage in ("retrieval", "llm", "image", "audio")
+                if (p95 := self.stage_p95(stage)) is not None
+            }
+        }
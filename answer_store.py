@@ -0,0 +1,271 @@
+"""
+Answer Store Module
+Persistent store of pre-generated answers (text, image, audio) for
+config.SUGGESTED_QUESTIONS, plus the warm-up job that fills it
+
+Run the warm-up as a CLI:
+    python answer_store.py --languages en es
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import config
+from coalescing import normalize_question
+from media_store import get_media_store
+from metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+# Pseudo-question under which each language's pre-rendered off-topic fallback is stored
+FALLBACK_QUESTION = "__fallback__"
+
+
+class AnswerStore:
+    """JSON-backed map of (normalized question, language) -> generated response"""
+
+    def __init__(self, path: Path = None, media_store=None):
+        self.path = Path(path or config.ANSWER_STORE_PATH)
+        self.media_store = media_store or get_media_store()
+        self.entries: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+        self._load()
+
+    @staticmethod
+    def _key(question: str, language: str) -> str:
+        return f"{language}::{normalize_question(question)}"
+
+    def _load(self):
+        if not self.path.exists():
+            return
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                self.entries = json.load(f)
+            logger.info(f"✅ Loaded {len(self.entries)} precomputed answers")
+        except Exception as e:
+            logger.warning(f"Answer store load failed: {e}, starting empty")
+            self.entries = {}
+
+    def save(self):
+        """Atomically persist the store"""
+        with self._lock:
+            snapshot = json.dumps(self.entries, ensure_ascii=False)
+        tmp_path = self.path.with_suffix(".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(snapshot)
+        os.replace(tmp_path, self.path)
+
+    def get(self, question: str, language: str, generate_image: bool = True, generate_audio: bool = True) -> Optional[Dict]:
+        """
+        Look up a precomputed response shaped like Storyteller.generate_response output
+
+        Media URLs the client did not ask for are dropped. Entries whose media
+        files have disappeared are treated as misses so the live path regenerates them.
+        """
+        return self._lookup(self._key(question, language), "answers", generate_image, generate_audio)
+
+    def get_fallback(self, language: str, generate_image: bool = True, generate_audio: bool = True) -> Optional[Dict]:
+        """Pre-rendered off-topic fallback (text + media) for a language, or None"""
+        return self._lookup(self._key(FALLBACK_QUESTION, language), "fallbacks", generate_image, generate_audio)
+
+    def _lookup(self, key: str, cache: str, generate_image: bool, generate_audio: bool) -> Optional[Dict]:
+        with self._lock:
+            entry = self.entries.get(key)
+        if entry is None:
+            record_cache(cache, False)
+            return None
+
+        for media_key in ("image_url", "audio_url"):
+            url = entry.get(media_key)
+            if url and not self.media_store.url_exists(url):
+                record_cache(cache, False)
+                return None
+
+        record_cache(cache, True)
+        result = {
+            "answer": entry["answer"],
+            "image_url": entry.get("image_url") if generate_image else None,
+            "audio_url": entry.get("audio_url") if generate_audio else None,
+            "is_relevant": entry["is_relevant"],
+            "sources": list(entry.get("sources", [])),
+            "timings": {}
+        }
+        return result
+
+    def put(self, question: str, language: str, result: Dict):
+        """Store a generated response"""
+        with self._lock:
+            self.entries[self._key(question, language)] = {
+                "question": question,
+                "language": language,
+                "answer": result["answer"],
+                "image_url": result.get("image_url"),
+                "audio_url": result.get("audio_url"),
+                "is_relevant": result.get("is_relevant", True),
+                "sources": result.get("sources", []),
+                "generated_at": time.time()
+            }
+
+    def has_fallback(self, language: str, answer: str) -> bool:
+        """A fallback for this exact text is stored and its media still exists"""
+        with self._lock:
+            entry = self.entries.get(self._key(FALLBACK_QUESTION, language))
+        if entry is None or entry["answer"] != answer:
+            return False
+        return all(
+            self.media_store.url_exists(url)
+            for url in (entry.get("image_url"), entry.get("audio_url")) if url
+        )
+
+    def is_fresh(self, question: str, language: str) -> bool:
+        """Entry exists and is younger than config.WARMUP_REFRESH_INTERVAL_S"""
+        with self._lock:
+            entry = self.entries.get(self._key(question, language))
+        return entry is not None and time.time() - entry["generated_at"] < config.WARMUP_REFRESH_INTERVAL_S
+
+    def pin_media(self, result: Dict, pinned: bool = True):
+        """Keep an entry's media out of reach of quota eviction (or release it)"""
+        for url in (result.get("image_url"), result.get("audio_url")):
+            if url:
+                self.media_store.pin_url(url, pinned)
+
+    def prune(self, questions: List[str], languages: List[str]) -> int:
+        """Drop entries no longer in the suggested question/language set and unpin their media (fallbacks are kept)"""
+        wanted = {self._key(q, lang) for q in questions for lang in languages}
+        with self._lock:
+            stale = [
+                self.entries.pop(key) for key in list(self.entries)
+                if key not in wanted and self.entries[key]["question"] != FALLBACK_QUESTION
+            ]
+        for entry in stale:
+            self.pin_media(entry, pinned=False)
+        return len(stale)
+
+
+def _incomplete(result: Dict) -> Optional[str]:
+    """Why a generated result must not be stored (None if it's a complete answer)"""
+    if not result.get("is_relevant"):
+        return "off-topic fallback"
+    if result.get("text_failed"):
+        return "LLM error"
+    if config.IMAGE_GENERATION_ENABLED and not result.get("image_url"):
+        return "no image"
+    if config.AUDIO_ENABLED and config.ELEVENLABS_API_KEY and not result.get("audio_url"):
+        return "no audio"
+    return None
+
+
+async def warm_up(storyteller, store: AnswerStore, questions: List[str] = None, languages: List[str] = None,
+                  force: bool = False) -> Dict:
+    """
+    Pre-generate answer, image and audio for each suggested question per language,
+    plus each language's off-topic fallback
+
+    Args:
+        storyteller: Storyteller with a loaded knowledge base
+        store: AnswerStore to fill
+        questions: Questions to warm (defaults to config.SUGGESTED_QUESTIONS)
+        languages: Language codes (defaults to config.WARMUP_LANGUAGES)
+        force: Regenerate even fresh entries
+
+    Returns:
+        Counts of generated, skipped and failed entries
+    """
+    questions = questions or config.SUGGESTED_QUESTIONS
+    languages = languages or config.WARMUP_LANGUAGES
+    semaphore = asyncio.Semaphore(config.WARMUP_CONCURRENCY)
+    counts = {"generated": 0, "skipped": 0, "failed": 0}
+
+    async def warm_one(question: str, language: str):
+        if not force and store.is_fresh(question, language):
+            counts["skipped"] += 1
+            return
+        async with semaphore:
+            try:
+                # Stored answers need real files, not ephemeral stream URLs
+                result = await storyteller.generate_response(question=question, language=language, stream_audio=False)
+                # Stored entries stay fresh for a day, so errors and medium-less answers are never stored
+                problem = _incomplete(result)
+                if problem:
+                    logger.warning(f"⚠️ Warm-up not storing '{question[:40]}' ({language}): {problem}")
+                    counts["failed"] += 1
+                    return
+                store.put(question, language, result)
+                store.pin_media(result)
+                counts["generated"] += 1
+            except Exception as e:
+                logger.warning(f"⚠️ Warm-up failed for '{question[:40]}' ({language}): {e}")
+                counts["failed"] += 1
+
+    async def warm_fallback(language: str):
+        if not force and store.has_fallback(language, storyteller._get_fallback_message(language)):
+            counts["skipped"] += 1
+            return
+        async with semaphore:
+            if await storyteller.refresh_fallback(language, save=False, store=store):
+                counts["generated"] += 1
+            else:
+                counts["failed"] += 1
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(warm_one(q, lang) for lang in languages for q in questions),
+        *(warm_fallback(lang) for lang in languages)
+    )
+    store.prune(questions, languages)
+    await asyncio.to_thread(store.save)
+    logger.info(f"🔥 Answer warm-up finished in {time.perf_counter() - start:.1f}s: {counts}")
+    return counts
+
+
+async def run_warm_up_loop(storyteller, store: AnswerStore):
+    """Background task: warm up now, then re-run every config.WARMUP_REFRESH_INTERVAL_S"""
+    while True:
+        try:
+            await warm_up(storyteller, store)
+        except Exception as e:
+            logger.error(f"❌ Answer warm-up failed: {str(e)}")
+        await asyncio.sleep(config.WARMUP_REFRESH_INTERVAL_S)
+
+
+# Global instance
+_store_instance = None
+_store_lock = threading.Lock()
+
+
+def get_answer_store() -> AnswerStore:
+    """Get or create global answer store instance"""
+    global _store_instance
+    with _store_lock:
+        if _store_instance is None:
+            _store_instance = AnswerStore()
+    return _store_instance
+
+
+if __name__ == "__main__":
+    from document_processor import get_processor
+    from storyteller import Storyteller
+
+    parser = argparse.ArgumentParser(description="Pre-generate answers for suggested questions")
+    parser.add_argument("--languages", nargs="+", default=config.WARMUP_LANGUAGES)
+    parser.add_argument("--force", action="store_true", help="Regenerate fresh entries too")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL))
+
+    async def main():
+        # Run as a script this module is __main__, whose global store isn't the one storyteller imports
+        store = get_answer_store()
+        storyteller = Storyteller(get_processor(), answer_store=store)
+        counts = await warm_up(storyteller, store, languages=args.languages, force=args.force)
+        storyteller.media_store.save_index()
+        print(f"\n✅ Warm-up complete: {counts}")
+
+    asyncio.run(main())
@@ -3,10 +3,9 @@ FastAPI Backend for Ask The Storytell AI
 Handles API requests for chat, image generation, audio generation, and audio transcription
 """
 
-from fastapi import FastAPI, HTTPException, UploadFile, File, Request
+from fastapi import FastAPI, HTTPException, UploadFile, File, Header, Request, Response, WebSocket
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.staticfiles import StaticFiles
-from fastapi.responses import FileResponse
+from fastapi.responses import FileResponse, PlainTextResponse, RedirectResponse, StreamingResponse
 from pydantic import BaseModel
 from typing import Optional, List, Dict
 import logging
@@ -14,7 +13,22 @@ import uvicorn
 import config
 from document_processor import get_processor
 from storyteller import Storyteller
-import tempfile
+from admission import AdmissionController, OverloadedError
+from coalescing import SingleFlight, normalize_question
+from media_io import MediaStaticFiles, spool_upload, UploadTooLargeError
+from media_store import get_media_store
+from answer_store import get_answer_store, run_warm_up_loop
+from voice_session import VoiceSession
+from kb_reloader import KnowledgeBaseReloader
+from sharding import ShardedRetriever
+from library_registry import get_library_registry, UnknownLibraryError
+from history_compactor import HistoryCompactor
+from payloads import json_response
+from media_jobs import MediaJobQueue, DONE as JOB_DONE
+from metrics import registry, server_timing_header, HTTP_IN_FLIGHT, HTTP_LATENCY, STAGE_LATENCY
+from startup_profiler import profiler, STATUS_PENDING, STATUS_LOADING, STATUS_READY, STATUS_FAILED
+import asyncio
+import time
 import os
 
 # Set up logging
@@ -44,34 +58,178 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-# Mount static directories
-app.mount("/static", StaticFiles(directory="static"), name="static")
+
+_known_routes = set()  # Route paths used as metric labels (filled on first request)
+
+
+def _route_label(path: str) -> str:
+    """Collapse request paths to a bounded set of metric labels"""
+    if path.startswith("/static/"):
+        return "/static"
+    if path.startswith("/api/narrate/"):
+        return "/api/narrate/{narration_id}"
+    if path.startswith("/api/history/"):
+        return "/api/history/{session_id}"
+    if path.startswith("/api/media/"):
+        return "/api/media/{job_id}"
+    if path in _known_routes:
+        return path
+    return "other"
+
+
+@app.middleware("http")
+async def metrics_middleware(request: Request, call_next):
+    """Track in-flight requests and request latency per route"""
+    if not _known_routes:
+        _known_routes.update(getattr(route, "path", "") for route in app.routes)
+    
+    route = _route_label(request.url.path)
+    start = time.perf_counter()
+    status = 500
+    with HTTP_IN_FLIGHT.track(route=route):
+        try:
+            response = await call_next(request)
+            status = response.status_code
+            return response
+        finally:
+            HTTP_LATENCY.observe(time.perf_counter() - start, route=route, status=str(status))
+
+
+# Mount static directories (ETag/Range/Cache-Control aware; accesses feed the media store's LRU)
+app.mount(
+    "/static",
+    MediaStaticFiles(
+        directory=str(config.STATIC_DIR),
+        on_access=lambda path: get_media_store().touch_path(path),
+        resolve=lambda path: get_media_store().resolve_path(path)
+    ),
+    name="static"
+)
 
 # Initialize components on startup
 processor = None
 storyteller = None
+reloader: Optional[KnowledgeBaseReloader] = None  # Background PDF ingestion / index swaps
 conversation_sessions: Dict[str, List[Dict]] = {}  # Session-based conversation memory
+history_versions: Dict[str, int] = {}  # Session -> messages ever appended (history ETag)
+retrieval_sessions: Dict[str, object] = {}  # Session -> last turn's RetrievalState (follow-up reuse)
+history_compactor = HistoryCompactor()  # Session -> rolling summary + recent messages for prompts
+admission = AdmissionController()  # Load shedding / feature degradation for /api/chat
+media_jobs = MediaJobQueue(on_timing=admission.record_timings)  # Background image/audio renders (media_mode "async")
+chat_flights = SingleFlight("chat")  # Coalesces identical history-free questions
+_startup_tasks: List[asyncio.Task] = []  # Keep references so background loaders aren't garbage collected
+
+
+async def _load_knowledge_base():
+    """Build the document processor off the event loop and attach it to the storyteller"""
+    global processor, reloader
+    profiler.set_status("knowledge_base", STATUS_LOADING)
+    try:
+        if config.SHARD_URLS:
+            # Coordinator only: the shards hold the index, this process just encodes queries
+            loaded = await asyncio.to_thread(ShardedRetriever, config.SHARD_URLS)
+            await loaded.refresh()
+        else:
+            loaded = await asyncio.to_thread(get_processor)
+    except Exception as e:
+        logger.error(f"❌ Knowledge base failed to load: {str(e)}")
+        profiler.set_status("knowledge_base", STATUS_FAILED, str(e))
+        return
+    
+    processor = loaded
+    storyteller.processor = loaded
+    
+    if config.SHARD_URLS:
+        # Shards ingest/reload their own books; keep their health and chunk counts current
+        _startup_tasks.append(asyncio.create_task(_watch_shards(loaded)))
+    else:
+        # Created even when empty, so PDFs added later can still bring the knowledge base up
+        reloader = KnowledgeBaseReloader(loaded, on_swap=_on_index_swap)
+        if config.KB_WATCH_ENABLED:
+            _startup_tasks.append(asyncio.create_task(reloader.run_watcher()))
+    
+    if not loaded.is_initialized():
+        if config.SHARD_URLS:
+            logger.error(f"❌ No retrieval shard is reachable: {', '.join(config.SHARD_URLS)}")
+        else:
+            logger.error("❌ No PDFs found or processed. Please add PDF files to data/pdfs/")
+        profiler.set_status("knowledge_base", STATUS_FAILED, "no chunks loaded")
+    else:
+        logger.info(f"✅ Knowledge base loaded with {loaded.chunk_count()} chunks")
+        profiler.set_status("knowledge_base", STATUS_READY, f"{loaded.chunk_count()} chunks")
+
+
+async def _watch_shards(retriever: ShardedRetriever):
+    """Background task: shard health probes; the knowledge base is ready while any shard is"""
+    while True:
+        await asyncio.sleep(config.SHARD_HEALTH_INTERVAL_S)
+        try:
+            await retriever.refresh()
+        except Exception as e:
+            logger.error(f"❌ Shard health pass failed: {str(e)}")
+            continue
+        if retriever.is_initialized():
+            profiler.set_status("knowledge_base", STATUS_READY, f"{retriever.chunk_count()} chunks")
+        else:
+            profiler.set_status("knowledge_base", STATUS_FAILED, "no retrieval shard reachable")
+
+
+def _on_index_swap(generation):
+    """A reload put a new generation live (also recovers a knowledge base that started empty)"""
+    profiler.set_status("knowledge_base", STATUS_READY, f"{len(generation.chunks)} chunks")
+
+
+async def _start_media_gc():
+    """Index existing media, then run quota/LRU GC passes forever"""
+    store = get_media_store()
+    await asyncio.to_thread(store.scan)
+    await store.run_gc_loop()
+
+
+async def _load_components():
+    """Load heavy components concurrently in the background and log the timing report"""
+    loaders = [_load_knowledge_base(), asyncio.to_thread(storyteller.init_llm)]
+    if config.PRELOAD_WHISPER:
+        loaders.append(asyncio.to_thread(storyteller.load_whisper))
+    
+    await asyncio.gather(*loaders, return_exceptions=True)
+    profiler.log_report()
+    logger.info("✅ All startup components finished loading")
+    
+    if config.WARMUP_ON_STARTUP and processor and processor.is_initialized():
+        _startup_tasks.append(asyncio.create_task(run_warm_up_loop(storyteller, get_answer_store())))
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Initialize document processor and storyteller on startup"""
-    global processor, storyteller
+    """Create lightweight components and schedule heavy loading in the background"""
+    global storyteller
     
     logger.info("🚀 Starting Ask The Storytell AI...")
     
-    # Initialize document processor
-    processor = get_processor()
-    
-    if not processor.is_initialized():
-        logger.error("❌ No PDFs found or processed. Please add PDF files to data/pdfs/")
-    else:
-        logger.info(f"✅ Knowledge base loaded with {len(processor.chunks)} chunks")
+    for component in ("knowledge_base", "llm", "whisper"):
+        profiler.set_status(component, STATUS_PENDING)
     
-    # Initialize storyteller
+    # Storyteller construction is cheap; SDKs and models load lazily
     storyteller = Storyteller(processor)
+    profiler.set_status("storyteller", STATUS_READY)
     logger.info("✅ Storyteller initialized")
     
-    logger.info(f"🎯 Server ready at http://{config.API_HOST}:{config.API_PORT}")
+    _startup_tasks.append(asyncio.create_task(_load_components()))
+    _startup_tasks.append(asyncio.create_task(_start_media_gc()))
+    _startup_tasks.extend(media_jobs.start())
+    
+    logger.info(f"🎯 Server accepting traffic at http://{config.API_HOST}:{config.API_PORT} (components loading in background)")
+
+
+@app.on_event("shutdown")
+async def shutdown_event():
+    """Stop background tasks and persist the media index"""
+    for task in _startup_tasks:
+        task.cancel()
+    if isinstance(processor, ShardedRetriever):
+        await processor.close()
+    await asyncio.to_thread(get_media_store().save_index)
 
 
 # Request/Response models
@@ -81,6 +239,9 @@ class ChatRequest(BaseModel):
     generate_audio: bool = True
     language: str = "en"
     session_id: str = "default"
+    library: str = config.DEFAULT_LIBRARY
+    history_mode: str = "full"  # "delta": return only the new turn + history_version (full history via /api/history)
+    media_mode: str = "inline"  # "async": return media job ids at once (poll /api/media/{job_id}) instead of waiting
 
 
 class ChatResponse(BaseModel):
@@ -89,7 +250,26 @@ class ChatResponse(BaseModel):
     audio_url: Optional[str] = None
     is_relevant: bool
     sources: list = []
-    conversation_history: list = []
+    conversation_history: list = []  # history_mode "full" only
+    turn: list = []  # history_mode "delta" only: this question and answer
+    history_version: int = 0
+    media_jobs: Dict[str, str] = {}  # media_mode "async": {"image"/"audio": job_id} still rendering or just queued
+    timings: Dict[str, float] = {}
+    degraded: List[str] = []
+
+
+def _response_payload(result: Dict, history_mode: str) -> Dict:
+    """
+    ChatResponse-shaped dict built without model validation (the history can be long)
+    
+    "delta" responses leave out conversation_history, "full" ones leave out turn.
+    """
+    omit = "conversation_history" if history_mode == "delta" else "turn"
+    return {
+        name: result.get(name, field.get_default())
+        for name, field in ChatResponse.model_fields.items()
+        if name != omit
+    }
 
 
 # API Routes
@@ -99,7 +279,7 @@ async def root():
     return {
         "status": "running",
         "name": config.STORYTELLER_NAME,
-        "chunks_loaded": len(processor.chunks) if processor else 0
+        "chunks_loaded": processor.chunk_count() if processor else 0
     }
 
 
@@ -115,27 +295,44 @@ async def get_languages():
     return {"languages": config.SUPPORTED_LANGUAGES}
 
 
+@app.get("/api/libraries")
+async def get_libraries():
+    """Available libraries, which are resident in memory and the memory budget"""
+    return get_library_registry().status()
+
+
+@app.get("/api/narrate/{narration_id}")
+async def narrate(narration_id: str):
+    """Chunked MP3 narration of an answer, played back sentence by sentence as segments are synthesized"""
+    if not storyteller or not storyteller.narrator.has_stream(narration_id):
+        raise HTTPException(status_code=404, detail="Narration not found or expired")
+    
+    return StreamingResponse(
+        storyteller.narrator.stream(narration_id),
+        media_type="audio/mpeg",
+        headers={"Cache-Control": "no-store"}
+    )
+
+
 @app.post("/api/transcribe")
 async def transcribe_audio(audio: UploadFile = File(...)):
     """Transcribe audio to text using Whisper"""
     temp_path = None
+    if not storyteller:
+        raise HTTPException(status_code=503, detail="Server is still starting up")
+    
     try:
         logger.info(f"🎤 Received audio file: {audio.filename}, type: {audio.content_type}")
         
-        # Save uploaded file temporarily with original extension
+        # Spool upload to a temp file in bounded chunks, keeping the original extension
         file_ext = os.path.splitext(audio.filename)[1] if audio.filename else ".webm"
         if not file_ext:
             file_ext = ".webm"
-            
-        # Create temp file but keep it open so Windows doesn't delete it
-        temp_file = tempfile.NamedTemporaryFile(delete=False, suffix=file_ext)
+        
         try:
-            content = await audio.read()
-            temp_file.write(content)
-            temp_file.flush()  # Ensure data is written to disk
-            temp_path = temp_file.name
-        finally:
-            temp_file.close()  # Close but don't delete yet
+            temp_path = await spool_upload(audio, suffix=file_ext)
+        except UploadTooLargeError as e:
+            raise HTTPException(status_code=413, detail=str(e))
         
         logger.info(f"📁 Saved to: {temp_path}, size: {os.path.getsize(temp_path)} bytes")
         
@@ -149,6 +346,8 @@ async def transcribe_audio(audio: UploadFile = File(...)):
         logger.info(f"✅ Transcription successful: {text[:50]}...")
         return {"text": text}
         
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error transcribing audio: {str(e)}")
         import traceback
@@ -164,83 +363,278 @@ async def transcribe_audio(audio: UploadFile = File(...)):
                 logger.warning(f"⚠️ Could not delete temp file {temp_path}: {e}")
 
 
+async def _generate_with_admission(request: ChatRequest, conversation_history: List[Dict], on_event=None,
+                                   retriever=None, previous_retrieval=None, history_summary: str = "") -> Dict:
+    """
+    Run the storyteller pipeline under admission control, coalescing identical first-turn questions
+    
+    Requests with an on_event callback stream to one client and are never coalesced.
+    """
+    try:
+        with admission.admit(request.generate_image, request.generate_audio) as ticket:
+            def run_pipeline():
+                return storyteller.generate_response(
+                    question=request.question,
+                    generate_image=ticket.generate_image,
+                    generate_audio=ticket.generate_audio,
+                    language=request.language,
+                    conversation_history=conversation_history,
+                    top_k=ticket.top_k,
+                    max_tokens=ticket.max_tokens,
+                    on_event=on_event,
+                    processor=retriever,
+                    previous_retrieval=previous_retrieval,
+                    history_summary=history_summary,
+                    media_jobs=media_jobs if request.media_mode == "async" else None
+                )
+            
+            if config.COALESCE_ENABLED and not conversation_history and on_event is None:
+                # Without history the answer depends only on these inputs, so share in-flight work
+                key = (
+                    request.library,
+                    request.media_mode,
+                    normalize_question(request.question),
+                    request.language,
+                    ticket.generate_image,
+                    ticket.generate_audio,
+                    ticket.top_k,
+                    ticket.max_tokens
+                )
+                result = await chat_flights.do(key, run_pipeline)
+            else:
+                result = await run_pipeline()
+    except OverloadedError as e:
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)})
+    
+    admission.record_timings(result.get("timings", {}))
+    result["degraded"] = ticket.degraded
+    return result
+
+
+def _absolute_url(url: Optional[str], base_url: str) -> Optional[str]:
+    """Prefix a relative media URL with the request base URL"""
+    if isinstance(url, str) and url.startswith("/"):
+        return f"{base_url}{url}"
+    return url
+
+
+async def _library_processor(library: str):
+    """
+    Index for a non-default library, loaded on first use (shares the default embedding model)
+    
+    Raises:
+        HTTPException: 404 for unknown libraries, 503 if the library has no indexed books
+    """
+    if config.SHARD_URLS:
+        # Shards serve one collection; libraries need local indexes
+        raise HTTPException(status_code=404, detail=f"Unknown library: {library}")
+    try:
+        library_processor = await get_library_registry().aget(library)
+    except UnknownLibraryError:
+        raise HTTPException(status_code=404, detail=f"Unknown library: {library}")
+    if not library_processor.is_initialized():
+        raise HTTPException(status_code=503, detail=f"Library '{library}' has no indexed books")
+    return library_processor
+
+
+def _session_key(library: str, session_id: str) -> str:
+    return session_id if library == config.DEFAULT_LIBRARY else f"{library}/{session_id}"
+
+
+async def _answer(request: ChatRequest, base_url: str, on_event=None) -> Dict:
+    """
+    Shared chat pipeline for HTTP and voice sessions: readiness check, precomputed
+    answers, admission-controlled generation and conversation history
+    
+    Raises:
+        HTTPException: 503 while the knowledge base loads or under overload, 404 for unknown libraries
+    """
+    if not processor or not processor.is_initialized():
+        if profiler.get_status("knowledge_base") in (STATUS_PENDING, STATUS_LOADING):
+            raise HTTPException(
+                status_code=503,
+                detail="Knowledge base is still loading. Please retry shortly.",
+                headers={"Retry-After": "5"}
+            )
+        raise HTTPException(
+            status_code=503,
+            detail="Knowledge base not initialized. Please add PDF files."
+        )
+    
+    retriever = None  # The storyteller's default processor
+    if request.library != config.DEFAULT_LIBRARY:
+        retriever = await _library_processor(request.library)
+    
+    logger.info(f"📝 Question received: {request.question[:100]}...")
+    
+    # Get or create conversation history (sessions are scoped to their library)
+    session_id = _session_key(request.library, request.session_id)
+    if session_id not in conversation_sessions:
+        conversation_sessions[session_id] = []
+    
+    conversation_history = conversation_sessions[session_id]
+    
+    result = None
+    if not conversation_history and retriever is None:
+        # Suggested questions are served instantly from the precomputed answer store (default library)
+        result = get_answer_store().get(
+            request.question, request.language, request.generate_image, request.generate_audio
+        )
+    if result is None:
+        # The prompt gets the rolling summary + last exchange, not the full history
+        history_summary, recent_history = history_compactor.prompt_history(session_id)
+        result = await _generate_with_admission(
+            request, recent_history, on_event, retriever,
+            retrieval_sessions.get(session_id) if conversation_history else None, history_summary
+        )
+    # Precomputed answers carry no retrieval state, so the next turn searches afresh
+    # (left in the result: payloads only carry ChatResponse fields)
+    retrieval_sessions[session_id] = result.get("retrieval")
+    
+    # Update conversation history
+    turn = [
+        {"role": "user", "content": request.question},
+        {"role": "assistant", "content": result["answer"]}
+    ]
+    conversation_history.extend(turn)
+    history_versions[session_id] = history_versions.get(session_id, 0) + len(turn)
+    
+    # Fold older turns into the session summary in the background (off the response path)
+    history_compactor.record_turn(session_id, request.question, result["answer"], storyteller.llm)
+    
+    # Trim history to max length
+    if len(conversation_history) > config.MAX_CONVERSATION_HISTORY * 2:
+        conversation_history = conversation_history[-config.MAX_CONVERSATION_HISTORY * 2:]
+    
+    conversation_sessions[session_id] = conversation_history
+    
+    # Normalize media URLs to absolute using request base URL to avoid broken links across origins/proxies
+    for key in ("image_url", "audio_url"):
+        result[key] = _absolute_url(result.get(key), base_url)
+    
+    # Add history to response
+    return {
+        **result,
+        "conversation_history": conversation_history,
+        "turn": turn,
+        "history_version": history_versions[session_id]
+    }
+
+
 @app.post("/api/chat", response_model=ChatResponse)
 async def chat(request: ChatRequest, http_request: Request):
     """
     Main chat endpoint - processes question and returns multimodal response
     Supports conversation history and multi-language
+    Per-stage timings are returned in the body and as a Server-Timing header
+    
+    With history_mode "delta" the body carries only the new turn and the
+    history_version; clients fetch the full history from /api/history.
     """
+    start = time.perf_counter()
     try:
-        if not processor or not processor.is_initialized():
-            raise HTTPException(
-                status_code=503,
-                detail="Knowledge base not initialized. Please add PDF files."
-            )
+        result = await _answer(request, str(http_request.base_url).rstrip('/'))
         
-        logger.info(f"📝 Question received: {request.question[:100]}...")
+        total = time.perf_counter() - start
+        STAGE_LATENCY.observe(total, stage="total")
+        timings = result.setdefault("timings", {})
+        timings["total"] = round(total * 1000, 1)
         
-        # Get or create conversation history
-        session_id = request.session_id
-        if session_id not in conversation_sessions:
-            conversation_sessions[session_id] = []
-        
-        conversation_history = conversation_sessions[session_id]
-        
-        # Generate response
-        result = await storyteller.generate_response(
-            question=request.question,
-            generate_image=request.generate_image,
-            generate_audio=request.generate_audio,
-            language=request.language,
-            conversation_history=conversation_history
+        return json_response(
+            _response_payload(result, request.history_mode),
+            http_request,
+            headers={"Server-Timing": server_timing_header(timings)}
         )
         
-        # Update conversation history
-        conversation_history.append({
-            "role": "user",
-            "content": request.question
-        })
-        conversation_history.append({
-            "role": "assistant",
-            "content": result["answer"]
-        })
-        
-        # Trim history to max length
-        if len(conversation_history) > config.MAX_CONVERSATION_HISTORY * 2:
-            conversation_history = conversation_history[-config.MAX_CONVERSATION_HISTORY * 2:]
-        
-        conversation_sessions[session_id] = conversation_history
-        
-        # Normalize media URLs to absolute using request base URL to avoid broken links across origins/proxies
-        try:
-            base_url = str(http_request.base_url).rstrip('/')
-            for key in ("image_url", "audio_url"):
-                url_val = result.get(key)
-                if isinstance(url_val, str) and url_val.startswith("/"):
-                    result[key] = f"{base_url}{url_val}"
-        except Exception as _e:
-            # Non-fatal; keep relative URLs if any issue occurs
-            pass
-
-        # Add history to response
-        result["conversation_history"] = conversation_history
-        
-        return ChatResponse(**result)
-        
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"❌ Error processing chat request: {str(e)}")
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@app.websocket("/ws/voice")
+async def voice(websocket: WebSocket):
+    """
+    Duplex voice session: streamed PCM16 audio in; partial transcripts, answer
+    text deltas and media events out (protocol in voice_session.py)
+    """
+    if not storyteller:
+        await websocket.close(code=1013)  # Try again later
+        return
+    
+    # Media URLs must point at the HTTP origin, not the ws:// one
+    base_url = str(websocket.base_url).rstrip('/').replace("ws", "http", 1)
+    
+    async def answer(question: str, options: Dict, on_event) -> Dict:
+        async def on_pipeline_event(event: str, data: Dict):
+            if "url" in data:
+                data = {**data, "url": _absolute_url(data["url"], base_url)}
+            await on_event(event, data)
+        
+        start = time.perf_counter()
+        request = ChatRequest(question=question, **options)
+        result = await _answer(request, base_url, on_pipeline_event)
+        timings = result.setdefault("timings", {})
+        timings["total"] = round((time.perf_counter() - start) * 1000, 1)
+        return _response_payload(result, request.history_mode)
+    
+    await VoiceSession(websocket, storyteller, answer).run()
+
+
+@app.get("/api/history/{session_id}")
+async def get_history(session_id: str, http_request: Request, library: str = config.DEFAULT_LIBRARY,
+                      if_none_match: Optional[str] = Header(default=None)):
+    """Full conversation history of a session; ETag is the history_version, so unchanged history is a 304"""
+    key = _session_key(library, session_id)
+    version = history_versions.get(key, 0)
+    etag = f'"{version}"'
+    if if_none_match and etag in (tag.strip() for tag in if_none_match.split(",")):
+        return Response(status_code=304, headers={"ETag": etag})
+    return json_response(
+        {"session_id": session_id, "library": library, "history_version": version,
+         "conversation_history": conversation_sessions.get(key, [])},
+        http_request,
+        headers={"ETag": etag, "Cache-Control": "no-cache"}
+    )
+
+
+@app.get("/api/media/{job_id}")
+async def media_job(job_id: str, http_request: Request, redirect: bool = True):
+    """
+    Status of a background media job: 202 while queued/running, a 303
+    redirect to the file when done (or its status with redirect=false)
+    """
+    job = media_jobs.get(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Media job not found or expired")
+    
+    status = job.to_dict()
+    status["url"] = _absolute_url(job.url, str(http_request.base_url).rstrip('/'))
+    if job.status == JOB_DONE and redirect:
+        return RedirectResponse(status["url"], status_code=303)
+    if job.finished_at is None:
+        return json_response(status, http_request, status_code=202, headers={"Retry-After": "1", "Cache-Control": "no-store"})
+    return json_response(status, http_request, headers={"Cache-Control": "no-store"})
+
+
 @app.get("/api/health")
 async def health_check():
-    """Detailed health check"""
+    """Detailed health check with per-component readiness"""
+    components = profiler.components_snapshot()
+    ready = profiler.is_ready("knowledge_base") and profiler.is_ready("storyteller")
     return {
-        "status": "healthy",
+        "status": "healthy" if ready else "starting",
+        "ready": ready,
+        "components": components,
         "knowledge_base": {
             "initialized": processor.is_initialized() if processor else False,
-            "chunks": len(processor.chunks) if processor else 0
+            "chunks": processor.chunk_count() if processor else 0
         },
+        "shards": processor.status() if isinstance(processor, ShardedRetriever) else None,
+        "media": get_media_store().stats(),
+        "admission": admission.status(),
+        "media_jobs": media_jobs.status(),
         "apis": {
             "gemini": bool(config.GEMINI_API_KEY),
             "stability": bool(config.STABILITY_API_KEY) and config.IMAGE_GENERATION_ENABLED,
@@ -249,6 +643,40 @@ async def health_check():
     }
 
 
+@app.get("/api/ingestion")
+async def ingestion_status():
+    """Knowledge base ingestion progress and the index generation currently serving searches"""
+    if reloader is None:
+        return {"state": profiler.get_status("knowledge_base"), "generation": 0}
+    return reloader.status()
+
+
+@app.post("/api/ingestion/reload", status_code=202)
+async def ingestion_reload(force: bool = False, x_admin_token: Optional[str] = Header(default=None)):
+    """Start ingesting new or changed PDFs in the background (admin only)"""
+    if not config.ADMIN_TOKEN or x_admin_token != config.ADMIN_TOKEN:
+        raise HTTPException(status_code=403, detail="Admin token required")
+    if reloader is None:
+        raise HTTPException(status_code=503, detail="Knowledge base is still loading")
+    if reloader.running:
+        return {"started": False, **reloader.status()}
+    
+    _startup_tasks.append(asyncio.create_task(reloader.reload(force=force)))
+    return {"started": True, **reloader.status()}
+
+
+@app.get("/metrics")
+async def metrics():
+    """Prometheus text-format metrics"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/api/startup")
+async def startup_report():
+    """Startup timing breakdown (import, model-load and index-load phases)"""
+    return profiler.report()
+
+
 def main():
     """Run the FastAPI server"""
     uvicorn.run(
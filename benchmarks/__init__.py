@@ -0,0 +1,4 @@
+"""
+Offline benchmark suite for Ask The Storytell AI
+Run with: python -m benchmarks --output bench.json
+"""
@@ -0,0 +1,112 @@
+"""
+Benchmark CLI
+Runs retrieval and end-to-end chat benchmarks offline and writes JSON results
+
+Examples:
+    python -m benchmarks --output bench.json
+    python -m benchmarks --suite retrieval --sizes 1000 20000
+    python -m benchmarks --suite chat --concurrency 1 16 64 --llm-latency 1.5
+"""
+
+import argparse
+import json
+import platform
+import subprocess
+import sys
+import time
+
+import config
+
+
+def _git_revision() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=config.BASE_DIR, capture_output=True, text=True, timeout=5
+        ).stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+def _embedding_model(name: str):
+    """Hashing stand-in by default; 'real' loads config.EMBEDDING_MODEL (needs the model locally)"""
+    if name == "real":
+        from sentence_transformers import SentenceTransformer
+        return SentenceTransformer(config.EMBEDDING_MODEL)
+    from benchmarks.standins import HashingEmbedder
+    return HashingEmbedder()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmarks for Ask The Storytell AI")
+    parser.add_argument("--suite", choices=["all", "retrieval", "chat"], default="all")
+    parser.add_argument("--output", help="Write JSON results to this file (default: stdout)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embedder", choices=["hashing", "real"], default="hashing")
+    # Retrieval
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--ingest-books", type=int, nargs="+", default=[1, 4])
+    parser.add_argument("--pages-per-book", type=int, default=20)
+    parser.add_argument("--queries", type=int, default=200)
+    # Chat
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=64, help="Requests per concurrency level")
+    parser.add_argument("--index-chunks", type=int, default=5_000)
+    parser.add_argument("--no-media", action="store_true", help="Disable image/audio generation")
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--image-latency", type=float, default=1.0)
+    parser.add_argument("--tts-latency", type=float, default=0.3)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    results = {
+        "meta": {
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "git_revision": _git_revision(),
+            "python": sys.version.split()[0],
+            "platform": platform.platform(),
+            "embedder": args.embedder,
+            "seed": args.seed,
+            "chunk_mode": config.CHUNK_MODE,
+            "chunk_tokens": config.CHUNK_TOKENS,
+            "chunk_size": config.CHUNK_SIZE,
+            "chunk_overlap": config.CHUNK_OVERLAP,
+        }
+    }
+
+    if args.suite in ("all", "retrieval"):
+        from benchmarks import bench_retrieval
+        results["retrieval"] = bench_retrieval.run(
+            embedding_model=_embedding_model(args.embedder),
+            sizes=args.sizes,
+            ingest_books=args.ingest_books,
+            pages_per_book=args.pages_per_book,
+            queries=args.queries,
+            seed=args.seed
+        )
+
+    if args.suite in ("all", "chat"):
+        from benchmarks import bench_chat
+        results["chat"] = bench_chat.run(
+            concurrency_levels=args.concurrency,
+            requests_per_level=args.requests,
+            index_chunks=args.index_chunks,
+            generate_media=not args.no_media,
+            llm_latency=args.llm_latency,
+            image_latency=args.image_latency,
+            tts_latency=args.tts_latency,
+            error_rate=args.error_rate,
+            seed=args.seed
+        )
+
+    payload = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(payload + "\n")
+        print(f"✅ Benchmark results written to {args.output}")
+    else:
+        print(payload)
+
+
+if __name__ == "__main__":
+    main()
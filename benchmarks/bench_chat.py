@@ -0,0 +1,181 @@
+"""
+End-to-end Chat Benchmark
+Runs the real FastAPI backend in-process against the local mock upstreams
+and measures /api/chat throughput and latency under concurrent load
+"""
+
+import asyncio
+import socket
+import statistics
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Dict, List
+
+import aiohttp
+
+import config
+import document_processor
+from benchmarks.bench_retrieval import build_synthetic_index, latency_summary
+from benchmarks.mock_upstreams import MockUpstreams, start_mock
+from benchmarks.standins import HashingEmbedder, synthetic_queries
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def apply_mock_config(base_url: str, media_dir: Path):
+    """Point the already-imported config module at the mock upstreams"""
+    config.LLM_PROVIDER = "openai"
+    config.LLM_PROVIDERS = ["openai"]
+    config.LLM_MODEL = config.OPENAI_MODEL
+    config.OPENAI_API_KEY = "mock-key"
+    config.OPENAI_BASE_URL = f"{base_url}/v1"
+    config.IMAGE_API_URL = f"{base_url}/prompt"
+    config.ELEVENLABS_API_KEY = "mock-key"
+    config.ELEVENLABS_API_URL = f"{base_url}/v1/text-to-speech"
+    config.PRELOAD_WHISPER = False
+    config.IMAGES_DIR = media_dir / "images"
+    config.AUDIO_DIR = media_dir / "audio"
+    config.MEDIA_INDEX_PATH = media_dir / "media_index.json"
+    config.ANSWER_STORE_PATH = media_dir / "answer_store.json"
+    config.WARMUP_ON_STARTUP = False
+    # Synthesize narration inside /api/chat, so TTS is part of the measured latency (not a stream URL)
+    config.NARRATION_STREAMING = False
+    config.IMAGES_DIR.mkdir(parents=True, exist_ok=True)
+    config.AUDIO_DIR.mkdir(parents=True, exist_ok=True)
+
+
+class BackendThread:
+    """Serve backend.app with uvicorn on a background thread"""
+
+    def __init__(self, port: int):
+        import uvicorn
+        import backend
+
+        self.port = port
+        self.server = uvicorn.Server(uvicorn.Config(backend.app, host="127.0.0.1", port=port, log_level="warning"))
+        self.thread = threading.Thread(target=self.server.run, daemon=True)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.server.should_exit = True
+        self.thread.join(timeout=10)
+
+
+async def _wait_ready(base_url: str, timeout: float = 60.0):
+    deadline = time.monotonic() + timeout
+    async with aiohttp.ClientSession() as session:
+        while time.monotonic() < deadline:
+            try:
+                async with session.get(f"{base_url}/api/health") as response:
+                    if response.status == 200 and (await response.json()).get("ready"):
+                        return
+            except aiohttp.ClientError:
+                pass
+            await asyncio.sleep(0.1)
+    raise TimeoutError("Backend did not become ready")
+
+
+async def _load(base_url: str, questions: List[str], concurrency: int, generate_media: bool) -> Dict:
+    """Fire all questions with a fixed number of concurrent clients"""
+    queue = asyncio.Queue()
+    for question in questions:
+        queue.put_nowait(question)
+
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    stage_samples: Dict[str, List[float]] = {}
+
+    async def worker(session: aiohttp.ClientSession):
+        while True:
+            try:
+                question = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            payload = {
+                "question": question,
+                "generate_image": generate_media,
+                "generate_audio": generate_media,
+                "session_id": uuid.uuid4().hex
+            }
+            t0 = time.perf_counter()
+            try:
+                async with session.post(f"{base_url}/api/chat", json=payload) as response:
+                    body = await response.json(content_type=None)
+                    status = str(response.status)
+            except aiohttp.ClientError as e:
+                body, status = {}, type(e).__name__
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] = statuses.get(status, 0) + 1
+            timings = body.get("timings") if isinstance(body, dict) else None
+            for stage, ms in (timings or {}).items():
+                stage_samples.setdefault(stage, []).append(ms)
+
+    timeout = aiohttp.ClientTimeout(total=120)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    start = time.perf_counter()
+    async with aiohttp.ClientSession(timeout=timeout, connector=connector) as session:
+        await asyncio.gather(*(worker(session) for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "concurrency": concurrency,
+        "requests": len(questions),
+        "generate_media": generate_media,
+        "elapsed_s": round(elapsed, 4),
+        "throughput_rps": round(len(questions) / elapsed, 2) if elapsed else None,
+        "statuses": statuses,
+        "server_stage_mean_ms": {
+            stage: round(statistics.fmean(values), 2) for stage, values in stage_samples.items()
+        },
+    }
+    result.update(latency_summary(latencies))
+    return result
+
+
+async def _run_async(concurrency_levels, requests_per_level: int, index_chunks: int, generate_media: bool,
+                     mock_kwargs: Dict, seed: int) -> Dict:
+    mock = MockUpstreams(seed=seed, **mock_kwargs)
+    runner, mock_url = await start_mock(mock)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            apply_mock_config(mock_url, Path(tmp))
+
+            # Seed the global processor so backend startup skips real PDF ingestion
+            document_processor._processor_instance = build_synthetic_index(HashingEmbedder(), index_chunks, seed=seed)
+
+            port = _free_port()
+            backend_url = f"http://127.0.0.1:{port}"
+            with BackendThread(port):
+                await _wait_ready(backend_url)
+                results = []
+                for concurrency in concurrency_levels:
+                    questions = synthetic_queries(requests_per_level, seed=seed + concurrency)
+                    results.append(await _load(backend_url, questions, concurrency, generate_media))
+    finally:
+        await runner.cleanup()
+
+    return {"mock": {"latency_s": mock.latency, "calls": mock.calls}, "index_chunks": index_chunks, "levels": results}
+
+
+def run(concurrency_levels=(1, 8, 32), requests_per_level: int = 64, index_chunks: int = 5_000,
+        generate_media: bool = True, llm_latency: float = 0.5, image_latency: float = 1.0,
+        tts_latency: float = 0.3, error_rate: float = 0.0, seed: int = 0) -> Dict:
+    """Run the end-to-end chat benchmark and return JSON-serialisable results"""
+    mock_kwargs = {
+        "llm_latency": llm_latency,
+        "image_latency": image_latency,
+        "tts_latency": tts_latency,
+        "error_rate": error_rate,
+    }
+    return asyncio.run(_run_async(concurrency_levels, requests_per_level, index_chunks, generate_media,
+                                  mock_kwargs, seed))
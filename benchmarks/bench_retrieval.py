@@ -0,0 +1,160 @@
+"""
+Retrieval Benchmarks
+Ingestion throughput (pages/s, chunks/s) and semantic search latency/QPS
+over synthetic corpora of increasing size
+"""
+
+import statistics
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import numpy as np
+
+from benchmarks.standins import HashingEmbedder, synthetic_queries, synthetic_text, write_synthetic_pdf
+from chunk_store import ChunkStore
+from document_processor import DocumentProcessor
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Nearest-rank percentile"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100 * len(ordered))) - 1))
+    return ordered[index]
+
+
+def latency_summary(samples_s: List[float]) -> Dict[str, float]:
+    """Summarise latency samples (seconds) in milliseconds"""
+    return {
+        "p50_ms": round(percentile(samples_s, 50) * 1000, 3),
+        "p95_ms": round(percentile(samples_s, 95) * 1000, 3),
+        "p99_ms": round(percentile(samples_s, 99) * 1000, 3),
+        "mean_ms": round(statistics.fmean(samples_s) * 1000, 3) if samples_s else 0.0,
+    }
+
+
+def make_processor(embedding_model, cache_dir: Path) -> DocumentProcessor:
+    """DocumentProcessor using the given model and an isolated cache directory"""
+    processor = DocumentProcessor(embedding_model=embedding_model)
+    processor.cache_dir = cache_dir
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    return processor
+
+
+def bench_ingestion(embedding_model, books: int, pages_per_book: int, seed: int = 0) -> Dict:
+    """
+    Time PDF extraction, chunking and embedding for a synthetic library
+
+    Args:
+        embedding_model: Model with an encode() method
+        books: Number of synthetic PDFs
+        pages_per_book: Pages in each PDF
+        seed: Corpus seed
+    """
+    with tempfile.TemporaryDirectory() as tmp:
+        tmp_path = Path(tmp)
+        pdf_dir = tmp_path / "pdfs"
+        pdf_dir.mkdir()
+        for book in range(books):
+            write_synthetic_pdf(pdf_dir / f"book_{book:03d}.pdf", pages_per_book, seed=seed + book)
+
+        processor = make_processor(embedding_model, tmp_path / "cache")
+        start = time.perf_counter()
+        chunks = processor.process_pdfs(str(pdf_dir))
+        cold = time.perf_counter() - start
+
+        # Second pass is served from the embedding cache
+        warm_processor = make_processor(embedding_model, tmp_path / "cache")
+        start = time.perf_counter()
+        warm_processor.process_pdfs(str(pdf_dir))
+        warm = time.perf_counter() - start
+
+    pages = books * pages_per_book
+    return {
+        "books": books,
+        "pages": pages,
+        "chunks": chunks,
+        "cold_s": round(cold, 4),
+        "warm_cache_s": round(warm, 4),
+        "pages_per_s": round(pages / cold, 2) if cold else None,
+        "chunks_per_s": round(chunks / cold, 2) if cold else None,
+    }
+
+
+def build_synthetic_index(embedding_model, num_chunks: int, seed: int = 0, pool_size: int = 2000) -> DocumentProcessor:
+    """
+    Populate a processor with num_chunks synthetic chunks without touching PDFs
+
+    A pool of up to pool_size distinct chunks is embedded for real; larger
+    indexes tile the pool with small seeded noise so search cost scales
+    with index size while setup stays fast
+    """
+    processor = DocumentProcessor(embedding_model=embedding_model)
+    rng = np.random.default_rng(seed)
+
+    pool_count = min(num_chunks, pool_size)
+    text = synthetic_text(pool_count * 900, seed=seed)
+    pool = processor.chunk_text(text, "synthetic.pdf")[:pool_count]
+    pool_embeddings = np.asarray(embedding_model.encode([chunk for chunk, _ in pool], convert_to_numpy=True))
+
+    repeats = -(-num_chunks // len(pool))
+    embeddings = np.tile(pool_embeddings, (repeats, 1))[:num_chunks]
+    if num_chunks > len(pool):
+        embeddings = embeddings + rng.normal(0, 0.01, embeddings.shape).astype(embeddings.dtype)
+
+    processor.chunks = ChunkStore.from_lists(
+        [pool[i % len(pool)][0] for i in range(num_chunks)],
+        [dict(pool[i % len(pool)][1], chunk_id=i) for i in range(num_chunks)]
+    )
+    processor.embeddings = embeddings
+    return processor
+
+
+def bench_search(embedding_model, num_chunks: int, queries: int = 200, top_k: int = 5, seed: int = 0) -> Dict:
+    """
+    Measure semantic_search latency and single-threaded QPS at a given index size
+
+    Args:
+        embedding_model: Model with an encode() method
+        num_chunks: Index size
+        queries: Number of timed queries
+        top_k: Results per query
+        seed: Corpus seed
+    """
+    processor = build_synthetic_index(embedding_model, num_chunks, seed=seed)
+    query_set = synthetic_queries(queries, seed=seed + 1)
+
+    # Warm-up
+    for query in query_set[:5]:
+        processor.semantic_search(query, top_k=top_k)
+
+    samples = []
+    start = time.perf_counter()
+    for query in query_set:
+        t0 = time.perf_counter()
+        processor.semantic_search(query, top_k=top_k)
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+
+    result = {
+        "chunks": num_chunks,
+        "queries": queries,
+        "top_k": top_k,
+        "qps": round(queries / elapsed, 2),
+        "chunk_store_mb": round(processor.chunks.nbytes() / 1e6, 2)
+    }
+    result.update(latency_summary(samples))
+    return result
+
+
+def run(embedding_model=None, sizes=(1_000, 10_000, 100_000), ingest_books=(1, 4), pages_per_book: int = 20,
+        queries: int = 200, seed: int = 0) -> Dict:
+    """Run the ingestion and search benchmarks and return JSON-serialisable results"""
+    embedding_model = embedding_model or HashingEmbedder()
+    return {
+        "ingestion": [bench_ingestion(embedding_model, books, pages_per_book, seed=seed) for books in ingest_books],
+        "search": [bench_search(embedding_model, size, queries=queries, seed=seed) for size in sizes],
+    }
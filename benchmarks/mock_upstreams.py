@@ -0,0 +1,157 @@
+"""
+Mock Upstream Server
+Local stand-in for the LLM (OpenAI-compatible chat completions), Pollinations
+image and ElevenLabs TTS APIs with configurable latency
+
+Run standalone:
+    python -m benchmarks.mock_upstreams --port 9100 --llm-latency 0.8
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+
+from aiohttp import web
+
+# Tiny valid payloads so clients exercise the full read/write path
+_PNG_BYTES = bytes.fromhex(
+    "89504e470d0a1a0a0000000d4948445200000001000000010806000000"
+    "1f15c4890000000d49444154789c6360000002000154a24f5d0000000049454e44ae426082"
+)
+_MP3_FRAME = bytes.fromhex("fffb9064") + b"\x00" * 413
+
+
+class MockUpstreams:
+    """aiohttp application emulating every external provider the storyteller calls"""
+
+    def __init__(
+        self,
+        llm_latency: float = 0.5,
+        image_latency: float = 1.0,
+        tts_latency: float = 0.3,
+        jitter: float = 0.1,
+        error_rate: float = 0.0,
+        image_bytes: int = 64 * 1024,
+        audio_bytes: int = 32 * 1024,
+        seed: int = 0
+    ):
+        self.latency = {"llm": llm_latency, "image": image_latency, "tts": tts_latency}
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.image_bytes = image_bytes
+        self.audio_bytes = audio_bytes
+        self.rng = random.Random(seed)
+        self.calls = {"llm": 0, "image": 0, "tts": 0}
+
+    async def _delay(self, kind: str):
+        self.calls[kind] += 1
+        base = self.latency[kind]
+        await asyncio.sleep(max(0.0, base + self.rng.uniform(-self.jitter, self.jitter) * base))
+
+    def _should_fail(self) -> bool:
+        return self.error_rate > 0 and self.rng.random() < self.error_rate
+
+    async def chat_completions(self, request: web.Request) -> web.Response:
+        """OpenAI-compatible POST /v1/chat/completions"""
+        body = await request.json()
+        await self._delay("llm")
+        if self._should_fail():
+            return web.json_response({"error": {"message": "mock overload"}}, status=503)
+        prompt = body["messages"][-1]["content"]
+        answer = "Mock storyteller answer. Alice basically swiped left on reality! " + prompt[-80:].replace("\n", " ")
+        return web.json_response({
+            "id": "mock-chatcmpl",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": body.get("model", "mock"),
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": answer},
+                "finish_reason": "stop"
+            }],
+            "usage": {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(answer) // 4,
+                      "total_tokens": (len(prompt) + len(answer)) // 4}
+        })
+
+    async def image(self, request: web.Request) -> web.StreamResponse:
+        """Pollinations-style GET /prompt/{prompt}"""
+        await self._delay("image")
+        if self._should_fail():
+            return web.Response(status=502, text="mock image failure")
+        padding = b"\x00" * max(0, self.image_bytes - len(_PNG_BYTES))
+        return web.Response(body=_PNG_BYTES + padding, content_type="image/png")
+
+    async def tts(self, request: web.Request) -> web.StreamResponse:
+        """ElevenLabs-style POST /v1/text-to-speech/{voice_id}"""
+        await request.json()
+        await self._delay("tts")
+        if self._should_fail():
+            return web.json_response({"detail": "mock tts failure"}, status=500)
+        frames = max(1, self.audio_bytes // len(_MP3_FRAME))
+        return web.Response(body=_MP3_FRAME * frames, content_type="audio/mpeg")
+
+    async def stats(self, request: web.Request) -> web.Response:
+        return web.json_response(self.calls)
+
+    def app(self) -> web.Application:
+        application = web.Application()
+        application.router.add_post("/v1/chat/completions", self.chat_completions)
+        application.router.add_get("/prompt/{prompt:.*}", self.image)
+        application.router.add_post("/v1/text-to-speech/{voice_id}", self.tts)
+        application.router.add_get("/stats", self.stats)
+        return application
+
+    def env(self, base_url: str) -> dict:
+        """Environment variables pointing the backend at this mock"""
+        return {
+            "LLM_PROVIDER": "openai",
+            "LLM_PROVIDERS": "openai",
+            "OPENAI_API_KEY": "mock-key",
+            "OPENAI_BASE_URL": f"{base_url}/v1",
+            "IMAGE_API_URL": f"{base_url}/prompt",
+            "ELEVENLABS_API_KEY": "mock-key",
+            "ELEVENLABS_API_URL": f"{base_url}/v1/text-to-speech",
+        }
+
+
+async def start_mock(mock: MockUpstreams, host: str = "127.0.0.1", port: int = 0):
+    """
+    Start the mock server on the running loop
+
+    Returns:
+        (runner, base_url) - call runner.cleanup() to stop
+    """
+    runner = web.AppRunner(mock.app(), access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, host, port)
+    await site.start()
+    bound_port = site._server.sockets[0].getsockname()[1]
+    return runner, f"http://{host}:{bound_port}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Mock LLM/image/TTS upstreams for benchmarks")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9100)
+    parser.add_argument("--llm-latency", type=float, default=0.5)
+    parser.add_argument("--image-latency", type=float, default=1.0)
+    parser.add_argument("--tts-latency", type=float, default=0.3)
+    parser.add_argument("--jitter", type=float, default=0.1)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    args = parser.parse_args()
+
+    mock = MockUpstreams(
+        llm_latency=args.llm_latency,
+        image_latency=args.image_latency,
+        tts_latency=args.tts_latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate
+    )
+    print(json.dumps(mock.env(f"http://{args.host}:{args.port}"), indent=2))
+    web.run_app(mock.app(), host=args.host, port=args.port, access_log=None)
+
+
+if __name__ == "__main__":
+    main()
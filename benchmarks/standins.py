@@ -0,0 +1,127 @@
+"""
+Local Stand-ins for Benchmarks
+Deterministic embedder and synthetic corpus/PDF generation so benchmarks
+run offline and reproducibly
+"""
+
+import hashlib
+import random
+import re
+from pathlib import Path
+from typing import List
+
+import numpy as np
+
+# Vocabulary used for synthetic story text (seeded so corpora are reproducible)
+_WORDS = (
+    "alice rabbit queen hatter tea party gulliver lilliput giant ship sea island "
+    "genie lamp carpet sultan palace garden door key bottle cake mushroom caterpillar "
+    "cat grin trial court soldier card rose king travel storm captain rope sword "
+    "night story wonder strange curious little enormous tiny golden silver dark bright "
+    "walked ran said asked thought looked found opened closed fell grew shrank laughed"
+).split()
+
+
+class HashingEmbedder:
+    """
+    Stand-in for SentenceTransformer using feature hashing of word unigrams
+
+    Produces L2-normalised float32 vectors with the same dimensionality as
+    all-MiniLM-L6-v2, so search cost matches the real index
+    """
+
+    def __init__(self, dim: int = 384):
+        self.dim = dim
+
+    def _embed(self, text: str) -> np.ndarray:
+        vector = np.zeros(self.dim, dtype=np.float32)
+        for token in re.findall(r"\w+", text.lower()):
+            digest = hashlib.blake2b(token.encode(), digest_size=8).digest()
+            bucket = int.from_bytes(digest[:4], "little") % self.dim
+            sign = 1.0 if digest[4] & 1 else -1.0
+            vector[bucket] += sign
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def encode(self, sentences, show_progress_bar: bool = False, convert_to_numpy: bool = True, **kwargs):
+        """Mirror SentenceTransformer.encode for a list of strings"""
+        if isinstance(sentences, str):
+            sentences = [sentences]
+        return np.vstack([self._embed(s) for s in sentences]) if sentences else np.zeros((0, self.dim), dtype=np.float32)
+
+
+def synthetic_text(num_chars: int, seed: int = 0) -> str:
+    """Generate reproducible story-like text of roughly num_chars characters"""
+    rng = random.Random(seed)
+    parts = []
+    length = 0
+    while length < num_chars:
+        sentence = " ".join(rng.choice(_WORDS) for _ in range(rng.randint(6, 18)))
+        sentence = sentence.capitalize() + rng.choice([".", ".", ".", "?", "!"])
+        parts.append(sentence)
+        length += len(sentence) + 1
+    return " ".join(parts)
+
+
+def synthetic_queries(count: int, seed: int = 1) -> List[str]:
+    """Generate reproducible question strings"""
+    rng = random.Random(seed)
+    return [
+        "What happened when the " + " ".join(rng.choice(_WORDS) for _ in range(4)) + "?"
+        for _ in range(count)
+    ]
+
+
+def _pdf_escape(text: str) -> str:
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+def write_synthetic_pdf(path: Path, pages: int, chars_per_page: int = 1800, seed: int = 0):
+    """
+    Write a minimal valid PDF with one Helvetica text stream per page
+
+    Args:
+        path: Output file path
+        pages: Number of pages
+        chars_per_page: Approximate characters of text per page
+        seed: Random seed for the text
+    """
+    objects = []  # index 0 -> object 1
+
+    def add(body: bytes) -> int:
+        objects.append(body)
+        return len(objects)
+
+    catalog_id = add(b"")  # placeholder, filled below
+    pages_id = add(b"")
+    font_id = add(b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>")
+
+    page_ids = []
+    for page_num in range(pages):
+        text = synthetic_text(chars_per_page, seed=seed * 100003 + page_num)
+        lines = [text[i:i + 90] for i in range(0, len(text), 90)]
+        ops = ["BT", "/F1 10 Tf", "12 TL", "40 800 Td"]
+        ops.extend(f"({_pdf_escape(line)}) '" for line in lines)
+        ops.append("ET")
+        stream = "\n".join(ops).encode("latin-1", "replace")
+        content_id = add(b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream")
+        page_ids.append(add(
+            b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 595 842] "
+            b"/Resources << /Font << /F1 %d 0 R >> >> /Contents %d 0 R >>" % (pages_id, font_id, content_id)
+        ))
+
+    objects[catalog_id - 1] = b"<< /Type /Catalog /Pages %d 0 R >>" % pages_id
+    kids = b" ".join(b"%d 0 R" % pid for pid in page_ids)
+    objects[pages_id - 1] = b"<< /Type /Pages /Kids [" + kids + b"] /Count %d >>" % len(page_ids)
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(out))
+        out += b"%d 0 obj\n" % number + body + b"\nendobj\n"
+    xref_at = len(out)
+    out += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    for offset in offsets:
+        out += b"%010d 00000 n \n" % offset
+    out += b"trailer\n<< /Size %d /Root %d 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, catalog_id, xref_at)
+    Path(path).write_bytes(bytes(out))
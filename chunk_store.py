@@ -0,0 +1,202 @@
+"""
+Chunk Store Module
+Compact corpus representation: all chunk text in one UTF-8 blob addressed
+by an offsets array, source names interned into a small table referenced
+by integer ids, and positions held in NumPy arrays. Chunk strings and
+metadata dicts are only materialized for the rows that are asked for.
+
+Chunks collapsed by ingest-time dedup keep every extra (source, chunk_id,
+start_char) record in CSR-style provenance arrays: the records of row i are
+prov_*[prov_offsets[i]:prov_offsets[i + 1]].
+"""
+
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+import numpy as np
+
+
+class ChunkStore:
+    """Read-only, array-backed list of chunks with lazy str/dict access"""
+
+    def __init__(self, blob: bytes = b"", offsets: np.ndarray = None, source_ids: np.ndarray = None,
+                 chunk_ids: np.ndarray = None, start_chars: np.ndarray = None, sources: List[str] = None,
+                 prov_offsets: np.ndarray = None, prov_source_ids: np.ndarray = None,
+                 prov_chunk_ids: np.ndarray = None, prov_start_chars: np.ndarray = None):
+        self.blob = blob
+        self.offsets = offsets if offsets is not None else np.zeros(1, dtype=np.int64)
+        self.source_ids = source_ids if source_ids is not None else np.zeros(0, dtype=np.int32)
+        self.chunk_ids = chunk_ids if chunk_ids is not None else np.zeros(0, dtype=np.int32)
+        self.start_chars = start_chars if start_chars is not None else np.zeros(0, dtype=np.int64)
+        self.sources = sources or []
+        # Extra provenance (None when no chunk was collapsed)
+        self.prov_offsets = prov_offsets
+        self.prov_source_ids = prov_source_ids if prov_source_ids is not None else np.zeros(0, dtype=np.int32)
+        self.prov_chunk_ids = prov_chunk_ids if prov_chunk_ids is not None else np.zeros(0, dtype=np.int32)
+        self.prov_start_chars = prov_start_chars if prov_start_chars is not None else np.zeros(0, dtype=np.int64)
+        self.metadata = ChunkMetadata(self)
+
+    @classmethod
+    def from_lists(cls, chunks: Sequence[str], metadata: Sequence[Dict]) -> "ChunkStore":
+        """Pack parallel lists of chunk strings and {"source", "chunk_id", "start_char"} dicts"""
+        encoded = [chunk.encode("utf-8") for chunk in chunks]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+
+        source_index: Dict[str, int] = {}
+        source_ids = np.fromiter(
+            (source_index.setdefault(meta["source"], len(source_index)) for meta in metadata),
+            dtype=np.int32, count=len(metadata)
+        )
+
+        return cls(
+            blob=b"".join(encoded),
+            offsets=offsets,
+            source_ids=source_ids,
+            chunk_ids=np.fromiter((meta["chunk_id"] for meta in metadata), dtype=np.int32, count=len(metadata)),
+            start_chars=np.fromiter((meta["start_char"] for meta in metadata), dtype=np.int64, count=len(metadata)),
+            sources=list(source_index)
+        )
+
+    @classmethod
+    def concat(cls, stores: Sequence["ChunkStore"]) -> "ChunkStore":
+        """Join stores, re-interning their source tables"""
+        stores = [store for store in stores if len(store)]
+        if not stores:
+            return cls()
+
+        source_index: Dict[str, int] = {}
+        offsets = [np.zeros(1, dtype=np.int64)]
+        source_ids = []
+        prov_offsets = [np.zeros(1, dtype=np.int64)]
+        prov_source_ids = []
+        base = 0
+        prov_base = 0
+        for store in stores:
+            remap = np.array([source_index.setdefault(name, len(source_index)) for name in store.sources], dtype=np.int32)
+            source_ids.append(remap[store.source_ids])
+            offsets.append(store.offsets[1:] + base)
+            base += len(store.blob)
+            store_prov_offsets = store.prov_offsets if store.prov_offsets is not None else np.zeros(len(store) + 1, dtype=np.int64)
+            prov_offsets.append(store_prov_offsets[1:] + prov_base)
+            prov_source_ids.append(remap[store.prov_source_ids])
+            prov_base += len(store.prov_source_ids)
+
+        return cls(
+            blob=b"".join(store.blob for store in stores),
+            offsets=np.concatenate(offsets),
+            source_ids=np.concatenate(source_ids),
+            chunk_ids=np.concatenate([store.chunk_ids for store in stores]),
+            start_chars=np.concatenate([store.start_chars for store in stores]),
+            sources=list(source_index),
+            prov_offsets=np.concatenate(prov_offsets) if prov_base else None,
+            prov_source_ids=np.concatenate(prov_source_ids),
+            prov_chunk_ids=np.concatenate([store.prov_chunk_ids for store in stores]),
+            prov_start_chars=np.concatenate([store.prov_start_chars for store in stores])
+        )
+
+    def collapse(self, keep: Sequence[int], merged: Dict[int, Sequence[int]]) -> "ChunkStore":
+        """
+        New store with only the `keep` rows (in that order)
+
+        Args:
+            keep: Row indices to retain
+            merged: Kept row -> dropped duplicate rows whose provenance it absorbs
+        """
+        keep = np.asarray(keep, dtype=np.int64)
+        lengths = self.offsets[keep + 1] - self.offsets[keep]
+        offsets = np.zeros(len(keep) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+
+        prov_offsets = np.zeros(len(keep) + 1, dtype=np.int64)
+        records = []
+        for position, row in enumerate(keep):
+            row_records = list(self._provenance(row))
+            for duplicate in merged.get(int(row), ()):
+                row_records.append((self.source_ids[duplicate], self.chunk_ids[duplicate], self.start_chars[duplicate]))
+                row_records.extend(self._provenance(duplicate))
+            records.extend(row_records)
+            prov_offsets[position + 1] = prov_offsets[position] + len(row_records)
+
+        columns = list(zip(*records)) if records else [(), (), ()]
+        return ChunkStore(
+            blob=b"".join(self.blob[self.offsets[row]:self.offsets[row + 1]] for row in keep),
+            offsets=offsets,
+            source_ids=self.source_ids[keep],
+            chunk_ids=self.chunk_ids[keep],
+            start_chars=self.start_chars[keep],
+            sources=list(self.sources),
+            prov_offsets=prov_offsets if records else None,
+            prov_source_ids=np.array(columns[0], dtype=np.int32),
+            prov_chunk_ids=np.array(columns[1], dtype=np.int32),
+            prov_start_chars=np.array(columns[2], dtype=np.int64)
+        )
+
+    def _provenance(self, index: int) -> Iterator[Tuple[int, int, int]]:
+        """Extra (source_id, chunk_id, start_char) records of one row"""
+        if self.prov_offsets is None:
+            return
+        for record in range(self.prov_offsets[index], self.prov_offsets[index + 1]):
+            yield self.prov_source_ids[record], self.prov_chunk_ids[record], self.prov_start_chars[record]
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index: int) -> str:
+        return self.text(index)
+
+    def __iter__(self) -> Iterator[str]:
+        for index in range(len(self)):
+            yield self.text(index)
+
+    def text(self, index: int) -> str:
+        """Decode one chunk's text"""
+        if index < 0:
+            index += len(self)
+        return self.blob[self.offsets[index]:self.offsets[index + 1]].decode("utf-8")
+
+    def meta(self, index: int) -> Dict:
+        """Metadata dict for one chunk, in the shape chunk_text() produces (+ "also_in" for collapsed duplicates)"""
+        meta = {
+            "source": self.sources[self.source_ids[index]],
+            "chunk_id": int(self.chunk_ids[index]),
+            "start_char": int(self.start_chars[index])
+        }
+        also_in = [
+            {"source": self.sources[source_id], "chunk_id": int(chunk_id), "start_char": int(start_char)}
+            for source_id, chunk_id, start_char in self._provenance(index)
+        ]
+        if also_in:
+            meta["also_in"] = also_in
+        return meta
+
+    def nbytes(self) -> int:
+        """Approximate resident size of the store"""
+        arrays = (self.offsets, self.source_ids, self.chunk_ids, self.start_chars,
+                  self.prov_source_ids, self.prov_chunk_ids, self.prov_start_chars)
+        if self.prov_offsets is not None:
+            arrays += (self.prov_offsets,)
+        return len(self.blob) + sum(array.nbytes for array in arrays) + sum(len(name) for name in self.sources)
+
+    def __getstate__(self):
+        return {key: value for key, value in self.__dict__.items() if key != "metadata"}
+
+    def __setstate__(self, state):
+        # Stores pickled before provenance support get empty provenance arrays
+        self.__init__(**{key: value for key, value in state.items() if key != "metadata"})
+
+
+class ChunkMetadata:
+    """List-like view over a ChunkStore's metadata, building dicts on access"""
+
+    def __init__(self, store: ChunkStore):
+        self._store = store
+
+    def __len__(self) -> int:
+        return len(self._store)
+
+    def __getitem__(self, index: int) -> Dict:
+        return self._store.meta(index)
+
+    def __iter__(self) -> Iterator[Dict]:
+        for index in range(len(self._store)):
+            yield self._store.meta(index)
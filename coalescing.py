@@ -0,0 +1,77 @@
+"""
+Request Coalescing Module
+Single-flight deduplication: concurrent callers with the same key share
+one underlying task instead of repeating the retrieval/LLM/media pipeline
+"""
+
+import asyncio
+import copy
+import logging
+import re
+from typing import Any, Awaitable, Callable, Dict
+
+import config
+from metrics import registry, Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+COALESCED_REQUESTS = registry.register(Counter(
+    "storyteller_coalesced_requests_total",
+    "Requests through single-flight groups by role (leader runs the work, follower shares it)"
+))
+FLIGHTS_IN_PROGRESS = registry.register(Gauge(
+    "storyteller_coalescing_flights",
+    "Shared tasks currently in flight"
+))
+
+
+def normalize_question(question: str) -> str:
+    """Case-fold, collapse whitespace and drop trailing punctuation so trivial variants coalesce"""
+    return re.sub(r"\s+", " ", question).strip().lower().rstrip("?!. ")
+
+
+class SingleFlight:
+    """Share one in-flight task per key between concurrent awaiters"""
+
+    def __init__(self, name: str = "default"):
+        self.name = name
+        self._flights: Dict[Any, asyncio.Task] = {}
+
+    async def do(self, key: Any, factory: Callable[[], Awaitable], timeout: float = None):
+        """
+        Run factory() once for all concurrent callers with the same key
+
+        The shared task is shielded, so a cancelled or timed-out waiter never
+        cancels work other waiters depend on; the task itself is bounded by
+        the timeout. Each caller receives its own deep copy of the result.
+
+        Args:
+            key: Hashable coalescing key
+            factory: Zero-argument callable returning a coroutine
+            timeout: Per-key deadline in seconds (defaults to config.COALESCE_TIMEOUT_S)
+        """
+        timeout = timeout or config.COALESCE_TIMEOUT_S
+        task = self._flights.get(key)
+        if task is None:
+            COALESCED_REQUESTS.inc(group=self.name, role="leader")
+            task = asyncio.create_task(asyncio.wait_for(factory(), timeout))
+            self._flights[key] = task
+            FLIGHTS_IN_PROGRESS.inc(group=self.name)
+            task.add_done_callback(lambda done, k=key: self._finish(k, done))
+        else:
+            COALESCED_REQUESTS.inc(group=self.name, role="follower")
+            logger.info(f"🤝 Coalesced onto in-flight request ({self.name})")
+
+        result = await asyncio.wait_for(asyncio.shield(task), timeout)
+        return copy.deepcopy(result)
+
+    def _finish(self, key: Any, task: asyncio.Task):
+        if self._flights.get(key) is task:
+            del self._flights[key]
+        FLIGHTS_IN_PROGRESS.dec(group=self.name)
+        # Retrieve the exception so an abandoned shared task doesn't log "never retrieved"
+        if not task.cancelled():
+            task.exception()
+
+    def in_flight(self) -> int:
+        return len(self._flights)
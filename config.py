@@ -30,21 +30,81 @@ GEMINI_API_KEY = os.getenv("GEMINI_API_KEY", "")
 STABILITY_API_KEY = os.getenv("STABILITY_API_KEY", "")
 ELEVENLABS_API_KEY = os.getenv("ELEVENLABS_API_KEY", "")
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY", "")
+OPENAI_BASE_URL = os.getenv("OPENAI_BASE_URL") or None  # Override for OpenAI-compatible endpoints (e.g. benchmark mock)
 
 # LLM Configuration
-LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")  # Options: "gemini" or "openai"
-LLM_MODEL = "gemini-2.0-flash-exp" if LLM_PROVIDER == "gemini" else "gpt-4o-mini"
+LLM_PROVIDER = os.getenv("LLM_PROVIDER", "gemini")  # Options: "gemini", "openai" or "mock"
+GEMINI_MODEL = "gemini-2.0-flash-exp"
+OPENAI_MODEL = "gpt-4o-mini"
+LLM_MODEL = GEMINI_MODEL if LLM_PROVIDER == "gemini" else OPENAI_MODEL
 LLM_TEMPERATURE = 0.9  # More creative responses
 LLM_MAX_TOKENS = 800  # Longer, better answers
 
+# LLM Routing (priority order; providers without an API key are skipped)
+LLM_PROVIDERS = [
+    name.strip() for name in
+    os.getenv("LLM_PROVIDERS", ",".join(dict.fromkeys([LLM_PROVIDER, "gemini", "openai"]))).split(",")
+    if name.strip()
+]
+LLM_TIMEOUT_S = float(os.getenv("LLM_TIMEOUT_S", "20"))  # Deadline per answer, across hedges and failover
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", "16"))  # In-flight calls per provider
+LLM_HEDGE_ENABLED = os.getenv("LLM_HEDGE_ENABLED", "true").lower() == "true"
+LLM_HEDGE_PERCENTILE = 95  # Fire the next provider once the first is slower than this
+LLM_HEDGE_MIN_SAMPLES = 20  # Latency samples needed before the percentile is trusted
+LLM_HEDGE_DEFAULT_DELAY_S = 6.0  # Hedge delay until enough samples exist
+LLM_HEDGE_MIN_DELAY_S = 1.0
+LLM_LATENCY_SAMPLES = 200
+MOCK_LLM_LATENCY_S = float(os.getenv("MOCK_LLM_LATENCY_S", "0.05"))  # "mock" provider, for tests/offline runs
+MOCK_LLM_ERROR_RATE = float(os.getenv("MOCK_LLM_ERROR_RATE", "0"))
+
 # Embedding Model Configuration
 EMBEDDING_MODEL = "sentence-transformers/all-MiniLM-L6-v2"
 # CPU-friendly, fast, accurate
 
 # Retrieval Configuration
-CHUNK_SIZE = 1000  # Optimized for faster processing
+CHUNK_MODE = os.getenv("CHUNK_MODE", "chars")  # "chars": CHUNK_SIZE characters; "tokens": windows measured with the embedding tokenizer (re-embeds cached PDFs)
+CHUNK_TOKENS = 256  # Token budget per chunk incl. special tokens (capped at the model's max_seq_length, 256 for MiniLM)
+CHUNK_OVERLAP_TOKENS = 48  # Tokens shared between consecutive chunks
+CHUNK_SIZE = 1000  # Optimized for faster processing (chars mode, or models without a tokenizer)
 CHUNK_OVERLAP = 200  # Good continuity
 TOP_K_RESULTS = 3  # Faster, more focused results
+RETRIEVAL_TOP_K = 5  # Chunks retrieved per chat question (wider coverage than TOP_K_RESULTS)
+
+# Corpus Encoding (cold-path embedding of new/changed PDFs)
+ENCODE_BATCH_SIZE = int(os.getenv("ENCODE_BATCH_SIZE", "64"))  # Chunks per length-sorted batch
+ENCODE_WORKERS = int(os.getenv("ENCODE_WORKERS", "0"))  # Encoder processes (0 = cpu_count / ENCODE_TORCH_THREADS)
+ENCODE_TORCH_THREADS = int(os.getenv("ENCODE_TORCH_THREADS", "2"))  # torch intra-op threads per worker
+ENCODE_MIN_PARALLEL_CHUNKS = 2000  # Smaller corpora encode in-process (worker model loads cost more than they save)
+
+# Ingest Dedup (boilerplate stripping + near-duplicate chunk collapsing)
+BOILERPLATE_STRIP = os.getenv("BOILERPLATE_STRIP", "false").lower() == "true"  # Drop running headers/footers before chunking (re-extracts cached PDFs)
+BOILERPLATE_EDGE_LINES = 2  # Lines at the top and bottom of each page checked for repeats
+BOILERPLATE_MIN_PAGE_FRACTION = 0.3  # A line on at least this share of pages is boilerplate
+DEDUP_ENABLED = os.getenv("DEDUP_ENABLED", "false").lower() == "true"  # Collapse near-duplicate chunks across books
+DEDUP_SHINGLE_WORDS = 5  # Words per shingle
+DEDUP_NUM_PERM = 64  # MinHash permutations
+DEDUP_LSH_BANDS = 16  # LSH bands (4 rows each; candidate pairs from ~0.5 Jaccard upwards)
+DEDUP_JACCARD = 0.8  # Estimated shingle Jaccard needed to merge
+DEDUP_COSINE = 0.95  # ...and embedding cosine similarity
+
+# Prebuilt Index Artifact (python index_artifact.py build-index)
+INDEX_ARTIFACT_DIR = DATA_DIR / "index"  # Default build output
+INDEX_ARTIFACT = os.getenv("INDEX_ARTIFACT", "")  # Artifact (or build output) dir to start from instead of ingesting PDFs
+
+# Knowledge Base Hot Reload (new or changed PDFs are ingested in the background)
+KB_WATCH_ENABLED = os.getenv("KB_WATCH_ENABLED", "false" if INDEX_ARTIFACT else "true").lower() == "true"  # Poll PDF_DIR for changes (off when serving an artifact)
+KB_WATCH_INTERVAL_S = int(os.getenv("KB_WATCH_INTERVAL_S", "60"))  # Seconds between directory scans
+ADMIN_TOKEN = os.getenv("ADMIN_TOKEN", "")  # X-Admin-Token for admin endpoints (unset = admin endpoints disabled)
+
+# Sharded Retrieval (python sharding.py runs a shard; the chat server fans out when SHARD_URLS is set)
+SHARD_URLS = [url for url in os.getenv("SHARD_URLS", "").split(",") if url]  # Empty = search the local index
+SHARD_TIMEOUT_S = float(os.getenv("SHARD_TIMEOUT_S", "1.0"))  # Per-shard search deadline; late shards are left out
+SHARD_HEALTH_INTERVAL_S = 30  # Seconds between shard /health probes
+
+# Library Namespaces (each subdirectory of LIBRARIES_DIR holds one library's PDFs; the default library is PDF_DIR)
+LIBRARIES_DIR = DATA_DIR / "libraries"
+DEFAULT_LIBRARY = "default"
+LIBRARY_MEMORY_BUDGET_MB = int(os.getenv("LIBRARY_MEMORY_BUDGET_MB", "1024"))  # RAM for non-default library indexes before LRU eviction (0 = unlimited)
 
 # Image Generation Configuration (Using Gemini Imagen)
 IMAGE_GENERATION_ENABLED = True  # Enable image generation with answers
@@ -52,18 +112,26 @@ IMAGE_PROVIDER = "gemini"  # Options: "gemini" or "stability"
 IMAGE_WIDTH = 512
 IMAGE_HEIGHT = 512
 IMAGE_STYLE = "fantasy-art"  # For storybook-style images
+IMAGE_API_URL = os.getenv("IMAGE_API_URL", "https://image.pollinations.ai/prompt")
 
 # Audio Configuration (ElevenLabs)
 AUDIO_ENABLED = True
-ELEVENLABS_API_URL = "https://api.elevenlabs.io/v1/text-to-speech"
+ELEVENLABS_API_URL = os.getenv("ELEVENLABS_API_URL", "https://api.elevenlabs.io/v1/text-to-speech")
 ELEVENLABS_VOICE_ID = "21m00Tcm4TlvDq8ikWAM"  # Rachel - warm storyteller voice
 # Other options: "EXAVITQu4vr4xnSDxMaL" (Bella), "ErXwobaYiN019PkySvjV" (Antoni)
 AUDIO_STABILITY = 0.5
 AUDIO_SIMILARITY_BOOST = 0.75
+NARRATION_STREAMING = os.getenv("NARRATION_STREAMING", "true").lower() == "true"  # audio_url is a chunked stream
+TTS_MAX_CONCURRENCY = int(os.getenv("TTS_MAX_CONCURRENCY", "3"))  # Parallel per-sentence ElevenLabs calls
+NARRATION_MIN_SENTENCE_CHARS = 20  # Shorter fragments are merged into the next sentence
+NARRATION_MAX_SEGMENT_CHARS = 300  # Longer sentences are split at commas/spaces
+NARRATION_STREAMS_MAX = 512  # Recent narrations kept addressable at /api/narrate/{id}
 
 # Storyteller Persona Configuration
 STORYTELLER_NAME = "Ask The Storytell AI"
-STORYTELLER_PROMPT = """You are "Ask The Storytell AI" — a hilariously witty, sarcastically brilliant storyteller who treats classic literature like juicy gossip. Think of yourself as a stand-up comedian who moonlights as a librarian! 😏
+# Prompt parts are assembled by prompt_builder in this order so the persona is a
+# stable prefix providers can cache: persona -> context -> history -> question
+STORYTELLER_PERSONA = """You are "Ask The Storytell AI" — a hilariously witty, sarcastically brilliant storyteller who treats classic literature like juicy gossip. Think of yourself as a stand-up comedian who moonlights as a librarian! 😏
 
 Your COMEDY STYLE:
 - You're sassy, cheeky, and throw shade at characters (in a fun way!)
@@ -83,15 +151,17 @@ CRITICAL COMEDY RULES:
 6. If something is absurd in the story, CALL IT OUT humorously
 7. NEVER fabricate plot points - work with what's given, but make it funny!
 
-Your vibe: Imagine if a sarcastic best friend read you classic novels while cracking jokes.
+Your vibe: Imagine if a sarcastic best friend read you classic novels while cracking jokes."""
 
-Context from the storybooks (the actual tea ☕):
-{context}
+STORYTELLER_CONTEXT_TEMPLATE = """Context from the storybooks (the actual tea ☕):
+{context}"""
 
-User's burning question: {question}
+STORYTELLER_QUESTION_TEMPLATE = """User's burning question: {question}
 
 Now spill the literary tea with HUMOR (based on the context above - keep it factual but FUNNY):"""
 
+STORYTELLER_PROMPT = "\n\n".join([STORYTELLER_PERSONA, STORYTELLER_CONTEXT_TEMPLATE, STORYTELLER_QUESTION_TEMPLATE])
+
 UNKNOWN_QUERY_RESPONSE = """Whoa whoa WHOA! 🛑 That question just yeeted itself RIGHT out of my storybook collection! 
 Listen bestie, I'm here to roast Alice's questionable life choices and mock Gulliver's terrible travel luck — 
 NOT to explain quantum physics or solve world hunger! 
@@ -117,9 +187,94 @@ SUPPORTED_LANGUAGES = {
     "ja": "Japanese"
 }
 
+# Startup Configuration
+PRELOAD_WHISPER = os.getenv("PRELOAD_WHISPER", "true").lower() == "true"  # Load Whisper in background at startup (else on first transcription)
+
+# Media I/O Configuration
+MEDIA_CHUNK_SIZE = 64 * 1024  # Bytes per streamed read/write for media and uploads
+MAX_UPLOAD_BYTES = int(os.getenv("MAX_UPLOAD_BYTES", str(25 * 1024 * 1024)))  # Voice upload size limit
+STATIC_CACHE_MAX_AGE = 7 * 24 * 3600  # Seconds clients/CDNs may cache generated media (content-hashed names)
+
+# Media Store Configuration (generated images/audio lifecycle)
+MEDIA_INDEX_PATH = DATA_DIR / "media_index.json"
+MEDIA_QUOTA_MB = int(os.getenv("MEDIA_QUOTA_MB", "500"))  # Disk quota for static/images + static/audio (0 = unlimited)
+MEDIA_QUOTA_LOW_WATERMARK = 0.9  # Evict down to this fraction of the quota
+MEDIA_MIN_AGE_S = 300  # Never evict assets accessed more recently than this
+MEDIA_GC_INTERVAL_S = 300  # Seconds between background GC passes
+MEDIA_TRANSCODE_IMAGES = os.getenv("MEDIA_TRANSCODE_IMAGES", "false").lower() == "true"  # PNG -> WebP (needs Pillow)
+MEDIA_TRANSCODE_AUDIO = os.getenv("MEDIA_TRANSCODE_AUDIO", "false").lower() == "true"  # MP3 -> Opus (needs ffmpeg)
+MEDIA_WEBP_QUALITY = 80
+MEDIA_OPUS_BITRATE = "32k"
+
+# Media Jobs (media_mode "async": /api/chat returns job ids, clients poll /api/media/{job_id})
+MEDIA_JOB_WORKERS = int(os.getenv("MEDIA_JOB_WORKERS", "4"))  # Concurrent image/audio renders
+MEDIA_JOB_QUEUE_SIZE = 64  # Jobs waiting beyond this are not queued (the answer goes out without that medium)
+MEDIA_JOB_TTL_S = 600  # Finished jobs stay pollable/deduplicated this long
+
+# Admission Control (load shedding on the chat path)
+ADMISSION_SKIP_AUDIO_AT = int(os.getenv("ADMISSION_SKIP_AUDIO_AT", "8"))  # In-flight chats before audio is skipped
+ADMISSION_SKIP_IMAGE_AT = int(os.getenv("ADMISSION_SKIP_IMAGE_AT", "16"))  # ...before images are skipped
+ADMISSION_SHRINK_AT = int(os.getenv("ADMISSION_SHRINK_AT", "24"))  # ...before top_k / max tokens shrink
+ADMISSION_REJECT_AT = int(os.getenv("ADMISSION_REJECT_AT", "32"))  # ...before requests get 503
+ADMISSION_RETRY_AFTER_S = 5
+ADMISSION_DEGRADED_TOP_K = 3
+ADMISSION_DEGRADED_MAX_TOKENS = 300
+ADMISSION_STAGE_BUDGET_S = {"audio": 8.0, "image": 15.0, "llm": 10.0}  # Recent p95 above budget degrades that stage
+ADMISSION_LATENCY_WINDOW_S = 60  # Only samples this recent count towards p95
+ADMISSION_LATENCY_SAMPLES = 200  # Max samples kept per stage
+
+# Request Coalescing (identical first-turn questions share one pipeline run)
+COALESCE_ENABLED = os.getenv("COALESCE_ENABLED", "true").lower() == "true"
+COALESCE_TIMEOUT_S = 90  # Deadline for a shared chat task and for each waiter
+
+# Response Payloads (JSON encoding/compression for /api/chat and /api/history)
+JSON_COMPRESS_MIN_BYTES = 1024  # Smaller bodies go out uncompressed
+JSON_GZIP_LEVEL = 6
+JSON_BROTLI_QUALITY = 5  # Used when the optional brotli package is installed and the client sends "br"
+
+# Precomputed Answers for SUGGESTED_QUESTIONS and off-topic fallbacks
+ANSWER_STORE_PATH = DATA_DIR / "answer_store.json"
+WARMUP_ON_STARTUP = os.getenv("WARMUP_ON_STARTUP", "true").lower() == "true"  # Warm suggested answers in the background
+WARMUP_LANGUAGES = os.getenv("WARMUP_LANGUAGES", "en").split(",")  # Language codes to pre-generate
+WARMUP_REFRESH_INTERVAL_S = int(os.getenv("WARMUP_REFRESH_INTERVAL_S", str(24 * 3600)))  # Regenerate entries older than this
+WARMUP_CONCURRENCY = 2  # Parallel warm-up generations (keeps upstream pressure low)
+FALLBACK_RENDER_RETRY_S = 300  # Min seconds between on-demand fallback media renders per language
+
+# Transcription Configuration
+TRANSCRIBE_MAX_CONCURRENCY = int(os.getenv("TRANSCRIBE_MAX_CONCURRENCY", "2"))  # Concurrent Whisper runs; extra requests queue
+
+# Voice Sessions (WebSocket /ws/voice, clients stream 16-bit mono PCM)
+VOICE_SAMPLE_RATE = 16000  # Whisper's native rate; clients resample before sending
+VOICE_PARTIAL_INTERVAL_S = 1.5  # New audio needed before another partial transcript
+VOICE_WINDOW_S = 10  # Audio older than this is transcribed once and committed
+VOICE_SILENCE_S = 0.9  # Trailing silence that ends an utterance
+VOICE_SILENCE_RMS = 0.01  # Frame RMS (of full scale) below which audio counts as silence
+VOICE_MIN_SPEECH_S = 0.3  # Shorter buffers are not sent to Whisper
+VOICE_MAX_UTTERANCE_S = 60
+
 # Conversation Memory
 MAX_CONVERSATION_HISTORY = 10  # Max messages to keep in memory
 
+# History Compaction (rolling per-session summary + last exchange verbatim in the prompt)
+HISTORY_COMPACTION_ENABLED = os.getenv("HISTORY_COMPACTION_ENABLED", "true").lower() == "true"
+HISTORY_MAX_TOKENS = 900  # Cap on the prompt's history section (summary + recent messages)
+HISTORY_SUMMARY_MAX_TOKENS = 250  # Rolling summary length
+HISTORY_SUMMARY_MODE = os.getenv("HISTORY_SUMMARY_MODE", "llm")  # "llm" (extractive if the call fails) or "extractive"
+HISTORY_SUMMARY_TEMPERATURE = 0.2
+HISTORY_SUMMARY_PROMPT = """You maintain a running summary of a conversation between a user and a storyteller bot about classic books.
+Merge the new messages into the existing summary. Keep the books, characters and events discussed, the user's questions and any preferences they stated.
+Drop jokes, emojis and wording. Write plain, compact prose of at most {max_words} words. Reply with the updated summary only."""
+
+# Follow-up Retrieval (reuse the previous turn's chunks for follow-up questions)
+FOLLOWUP_REUSE_ENABLED = os.getenv("FOLLOWUP_REUSE_ENABLED", "true").lower() == "true"
+FOLLOWUP_MAX_WORDS = 10  # Short questions with continuation words/pronouns count as follow-ups
+FOLLOWUP_SIMILARITY = 0.7  # ...as does any question this close (cosine) to the previous query
+FOLLOWUP_CUE_SIMILARITY = 0.25  # Cosine to the previous query a continuation/pronoun cue also needs
+FOLLOWUP_MIN_SCORE = 0.25  # Reused chunks must score this well against the new question alone (Storyteller's relevance threshold), else full search
+FOLLOWUP_NEIGHBOURS = 2  # Chunks before/after each previous chunk added as candidates
+FOLLOWUP_QUERY_WEIGHT = 0.5  # Weight of the new question vs the previous query in the blended vector
+FOLLOWUP_BLEND_SEARCH = os.getenv("FOLLOWUP_BLEND_SEARCH", "false").lower() == "true"  # Also run a full search with the blended query and merge
+
 # Logging Configuration
 LOG_LEVEL = "INFO"
 LOG_FILE = BASE_DIR / "storytell_ai.log"
@@ -0,0 +1,99 @@
+"""
+Corpus Encoder Module
+Cold-path embedding of many chunks at once: inputs are sorted by token
+length so each batch pads to a similar size, batches are spread over a
+pool of worker processes (each with its own model copy and a fixed number
+of torch intra-op threads), and vectors are written back in input order
+"""
+
+import logging
+import multiprocessing
+import os
+import time
+from typing import List, Optional
+
+import numpy as np
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Per-worker model, loaded once by the pool initializer
+_worker_model = None
+
+
+def _init_worker(model_name: str, torch_threads: int):
+    global _worker_model
+    import torch
+    torch.set_num_threads(torch_threads)
+    from sentence_transformers import SentenceTransformer
+    _worker_model = SentenceTransformer(model_name, device="cpu")
+
+
+def _encode_batch(batch: List[str]) -> np.ndarray:
+    return _worker_model.encode(batch, batch_size=len(batch), convert_to_numpy=True, show_progress_bar=False)
+
+
+def resolve_workers(num_chunks: int) -> int:
+    """Worker processes for a corpus of this size (1 = encode in-process)"""
+    if num_chunks < config.ENCODE_MIN_PARALLEL_CHUNKS:
+        return 1
+    workers = config.ENCODE_WORKERS or (os.cpu_count() or 1) // config.ENCODE_TORCH_THREADS
+    return max(1, workers)
+
+
+def _lengths(texts: List[str], tokenizer) -> np.ndarray:
+    """Token lengths when a tokenizer is available, else character lengths"""
+    if tokenizer is None:
+        return np.fromiter((len(text) for text in texts), dtype=np.int64, count=len(texts))
+    encoded = tokenizer(texts, add_special_tokens=True, verbose=False)["input_ids"]
+    return np.fromiter((len(ids) for ids in encoded), dtype=np.int64, count=len(texts))
+
+
+def encode_corpus(model, texts: List[str], tokenizer=None, model_name: Optional[str] = None) -> np.ndarray:
+    """
+    Embed texts in length-sorted batches, in parallel where it pays off
+
+    Args:
+        model: In-process embedding model (used when not parallelizing)
+        texts: Chunks to embed
+        tokenizer: The model's tokenizer, for sorting by token length
+        model_name: Name workers load the model by; without it encoding stays in-process
+
+    Returns:
+        (len(texts), dim) embeddings in the order of texts
+    """
+    if not texts:
+        return np.zeros((0, 0), dtype=np.float32)
+
+    start = time.perf_counter()
+    # Longest first: the slowest batches start early and memory peaks right away
+    order = np.argsort(-_lengths(texts, tokenizer), kind="stable")
+    batch_size = config.ENCODE_BATCH_SIZE
+    batches = [order[i:i + batch_size] for i in range(0, len(order), batch_size)]
+    workers = resolve_workers(len(texts)) if model_name else 1
+
+    embeddings = None
+    if workers > 1:
+        context = multiprocessing.get_context("spawn")
+        with context.Pool(workers, initializer=_init_worker, initargs=(model_name, config.ENCODE_TORCH_THREADS)) as pool:
+            results = pool.imap(_encode_batch, ([texts[i] for i in batch] for batch in batches))
+            for batch, vectors in zip(batches, results):
+                if embeddings is None:
+                    embeddings = np.empty((len(texts), vectors.shape[1]), dtype=vectors.dtype)
+                embeddings[batch] = vectors
+    else:
+        for batch in batches:
+            vectors = np.asarray(model.encode(
+                [texts[i] for i in batch], batch_size=len(batch), convert_to_numpy=True, show_progress_bar=False
+            ))
+            if embeddings is None:
+                embeddings = np.empty((len(texts), vectors.shape[1]), dtype=vectors.dtype)
+            embeddings[batch] = vectors
+
+    elapsed = time.perf_counter() - start
+    logger.info(
+        f"⚡ Encoded {len(texts)} chunks in {elapsed:.1f}s ({len(texts) / max(elapsed, 1e-9):.0f} chunks/s, "
+        f"{workers} worker(s), batch {batch_size})"
+    )
+    return embeddings
@@ -0,0 +1,145 @@
+"""
+Dedup Module
+Ingest-time cleanup of repeated text: page headers/footers that recur
+across a book are stripped before chunking, and near-duplicate chunks
+(front matter, stories reprinted across volumes) are found with MinHash/LSH
+over word shingles, confirmed by embedding similarity and collapsed into
+one stored chunk that keeps every provenance record
+"""
+
+import logging
+import re
+import zlib
+from collections import Counter
+from typing import Dict, List, Tuple
+
+import numpy as np
+
+import config
+from chunk_store import ChunkStore
+
+logger = logging.getLogger(__name__)
+
+_MERSENNE_PRIME = (1 << 31) - 1  # Shingle hashes are masked to 31 bits, so a * x + b stays within uint64
+_WORD_RE = re.compile(r"\w+")
+_DIGITS_RE = re.compile(r"\d+")
+
+
+def _normalize_line(line: str) -> str:
+    """Case/whitespace-folded line with numbers masked, so "Page 12" matches "Page 13" """
+    return _DIGITS_RE.sub("#", " ".join(line.lower().split()))
+
+
+def strip_boilerplate(pages: List[str]) -> List[str]:
+    """
+    Remove running headers/footers from extracted pages
+
+    A line near the top or bottom of a page (config.BOILERPLATE_EDGE_LINES)
+    counts as boilerplate when its normalized form appears on at least
+    config.BOILERPLATE_MIN_PAGE_FRACTION of the pages.
+    """
+    edge = config.BOILERPLATE_EDGE_LINES
+    min_pages = max(3, int(len(pages) * config.BOILERPLATE_MIN_PAGE_FRACTION))
+    if len(pages) < min_pages:
+        return pages
+
+    page_lines = [page.splitlines() for page in pages]
+    counts = Counter()
+    for lines in page_lines:
+        edges = {_normalize_line(line) for line in lines[:edge] + lines[-edge:]}
+        counts.update(line for line in edges if line)
+    boilerplate = {line for line, count in counts.items() if count >= min_pages}
+    if not boilerplate:
+        return pages
+
+    stripped = []
+    for lines in page_lines:
+        edge_rows = set(range(min(edge, len(lines)))) | set(range(max(len(lines) - edge, 0), len(lines)))
+        stripped.append("\n".join(
+            line for row, line in enumerate(lines)
+            if row not in edge_rows or _normalize_line(line) not in boilerplate
+        ))
+    logger.info(f"🧹 Stripped {len(boilerplate)} recurring header/footer lines from {len(pages)} pages")
+    return stripped
+
+
+def _shingles(text: str) -> np.ndarray:
+    """31-bit hashes of the text's word n-grams (config.DEDUP_SHINGLE_WORDS)"""
+    words = _WORD_RE.findall(text.lower())
+    size = config.DEDUP_SHINGLE_WORDS
+    grams = {" ".join(words[i:i + size]) for i in range(max(len(words) - size + 1, 1))}
+    return np.fromiter((zlib.crc32(gram.encode()) & _MERSENNE_PRIME for gram in grams), dtype=np.uint64, count=len(grams))
+
+
+def minhash_signatures(texts: List[str], seed: int = 1) -> np.ndarray:
+    """(len(texts), config.DEDUP_NUM_PERM) MinHash signatures"""
+    rng = np.random.default_rng(seed)
+    a = rng.integers(1, _MERSENNE_PRIME, config.DEDUP_NUM_PERM, dtype=np.uint64)
+    b = rng.integers(0, _MERSENNE_PRIME, config.DEDUP_NUM_PERM, dtype=np.uint64)
+    signatures = np.empty((len(texts), config.DEDUP_NUM_PERM), dtype=np.uint64)
+    for row, text in enumerate(texts):
+        signatures[row] = ((np.outer(_shingles(text), a) + b) % _MERSENNE_PRIME).min(axis=0)
+    return signatures
+
+
+def find_duplicates(texts: List[str], embeddings: np.ndarray) -> Dict[int, List[int]]:
+    """
+    Group near-duplicate rows
+
+    LSH buckets propose candidate pairs; a pair is merged only if its
+    estimated Jaccard similarity reaches config.DEDUP_JACCARD and its
+    embedding cosine similarity reaches config.DEDUP_COSINE.
+
+    Returns:
+        First row of each group -> the later rows that duplicate it
+    """
+    signatures = minhash_signatures(texts)
+    normalized = embeddings / np.maximum(np.linalg.norm(embeddings, axis=1, keepdims=True), 1e-12)
+    rows_per_band = config.DEDUP_NUM_PERM // config.DEDUP_LSH_BANDS
+
+    parent = list(range(len(texts)))
+
+    def root(row: int) -> int:
+        while parent[row] != row:
+            parent[row] = parent[parent[row]]
+            row = parent[row]
+        return row
+
+    for band in range(config.DEDUP_LSH_BANDS):
+        buckets: Dict[bytes, List[int]] = {}
+        for row, signature in enumerate(signatures[:, band * rows_per_band:(band + 1) * rows_per_band]):
+            buckets.setdefault(signature.tobytes(), []).append(row)
+        for members in buckets.values():
+            for i, left in enumerate(members):
+                for right in members[i + 1:]:
+                    left_root, right_root = root(left), root(right)
+                    if left_root == right_root:
+                        continue
+                    if np.mean(signatures[left] == signatures[right]) < config.DEDUP_JACCARD:
+                        continue
+                    if float(normalized[left] @ normalized[right]) < config.DEDUP_COSINE:
+                        continue
+                    # The earliest occurrence stays the representative
+                    parent[max(left_root, right_root)] = min(left_root, right_root)
+
+    groups: Dict[int, List[int]] = {}
+    for row in range(len(texts)):
+        representative = root(row)
+        if representative != row:
+            groups.setdefault(representative, []).append(row)
+    return groups
+
+
+def deduplicate(store: ChunkStore, embeddings: np.ndarray) -> Tuple[ChunkStore, np.ndarray]:
+    """Collapse near-duplicate chunks, keeping the first copy's text/embedding and all provenance"""
+    if len(store) < 2:
+        return store, embeddings
+
+    groups = find_duplicates(list(store), embeddings)
+    if not groups:
+        return store, embeddings
+
+    dropped = {row for duplicates in groups.values() for row in duplicates}
+    keep = [row for row in range(len(store)) if row not in dropped]
+    logger.info(f"🧹 Collapsed {len(dropped)} near-duplicate chunks into {len(groups)} ({len(store)} → {len(keep)})")
+    return store.collapse(keep, groups), embeddings[keep]
@@ -4,35 +4,75 @@ Handles PDF ingestion, text extraction, chunking, and embedding storage
 Lightweight in-memory approach with disk caching for fast startup
 """
 
+import asyncio
 import logging
 import pickle
 import hashlib
+import threading
+import time
+from dataclasses import dataclass, field, replace
 from pathlib import Path
-from typing import List, Tuple
+from typing import Callable, Dict, List, Optional, Tuple
 import PyPDF2
 import numpy as np
-from sentence_transformers import SentenceTransformer
 import config
+from chunk_store import ChunkStore
+from corpus_encoder import encode_corpus
+from dedup import deduplicate, strip_boilerplate
+from follow_up import RetrievalState, is_follow_up, neighbour_rows, unit
+from metrics import record_cache
+from startup_profiler import profiler
 
 # Set up logging
 logging.basicConfig(level=getattr(logging, config.LOG_LEVEL))
 logger = logging.getLogger(__name__)
 
 
+@dataclass(frozen=True)
+class IndexGeneration:
+    """Immutable snapshot of the searchable index; swapped in as a whole"""
+    number: int = 0
+    chunks: ChunkStore = field(default_factory=ChunkStore)
+    embeddings: Optional[np.ndarray] = None
+    files: Dict[str, str] = field(default_factory=dict)  # PDF filename -> cache key it was built from
+    truncation: Dict[str, Dict] = field(default_factory=dict)  # PDF filename -> truncation_stats()
+    built_at: float = field(default_factory=time.time)
+
+
 class DocumentProcessor:
     """Handles document ingestion and in-memory embedding storage with caching"""
     
-    def __init__(self):
-        """Initialize the document processor with embeddings model"""
+    def __init__(self, embedding_model=None, model_name: str = None):
+        """
+        Initialize the document processor with embeddings model
+        
+        Args:
+            embedding_model: Optional pre-loaded model exposing SentenceTransformer's
+                encode() API; loads config.EMBEDDING_MODEL when omitted
+            model_name: Name a pre-loaded model was loaded by (lets processors that
+                share one model also share caches and encoder workers)
+        """
         logger.info(f"Initializing DocumentProcessor with embedding model: {config.EMBEDDING_MODEL}")
         
-        # Initialize embeddings model
-        self.embedding_model = SentenceTransformer(config.EMBEDDING_MODEL)
+        # Worker processes can only re-create a model we loaded by name ourselves
+        self.model_name = config.EMBEDDING_MODEL if embedding_model is None else model_name
+        if embedding_model is None:
+            # Initialize embeddings model (imported here so importing this module stays cheap)
+            with profiler.phase("sentence_transformers", "import"):
+                from sentence_transformers import SentenceTransformer
+            with profiler.phase("embedding_model", "model_load"):
+                embedding_model = SentenceTransformer(config.EMBEDDING_MODEL)
+        self.embedding_model = embedding_model
         
-        # In-memory storage
-        self.chunks = []  # List of text chunks
-        self.embeddings = None  # Numpy array of embeddings
-        self.metadata = []  # List of metadata dicts
+        # Token-budgeted chunking needs the model's own tokenizer (SentenceTransformer exposes it)
+        self.tokenizer = getattr(embedding_model, "tokenizer", None)
+        self.max_seq_length = getattr(embedding_model, "max_seq_length", None) or config.CHUNK_TOKENS
+        if config.CHUNK_MODE == "tokens" and self.tokenizer is None:
+            logger.warning("⚠️ Embedding model has no tokenizer; falling back to character chunking")
+        
+        # In-memory storage: the current index generation (chunk store + embeddings).
+        # Readers take one reference to it, so a reload can swap generations atomically.
+        self._index = IndexGeneration()
         
         # Cache directory
         self.cache_dir = config.DATA_DIR / "cache"
@@ -40,40 +80,92 @@ class DocumentProcessor:
         
         logger.info("Document processor initialized with caching enabled")
     
+    @property
+    def chunks(self) -> ChunkStore:
+        """Chunk text packed in a ChunkStore (indexable like a list)"""
+        return self._index.chunks
+    
+    @chunks.setter
+    def chunks(self, value: ChunkStore):
+        self._index = replace(self._index, chunks=value)
+    
+    @property
+    def embeddings(self) -> Optional[np.ndarray]:
+        """Numpy array of embeddings"""
+        return self._index.embeddings
+    
+    @embeddings.setter
+    def embeddings(self, value: np.ndarray):
+        self._index = replace(self._index, embeddings=value)
+    
+    @property
+    def metadata(self):
+        """Per-chunk metadata dicts, built on access"""
+        return self.chunks.metadata
+    
+    @property
+    def generation(self) -> IndexGeneration:
+        return self._index
+    
+    def swap(self, generation: IndexGeneration):
+        """Make a new index generation live; searches already running keep the old one"""
+        self._index = generation
+        logger.info(f"🔁 Index generation {generation.number} live with {len(generation.chunks)} chunks")
+    
+    @property
+    def token_chunking(self) -> bool:
+        return config.CHUNK_MODE == "tokens" and self.tokenizer is not None
+    
+    def _cache_key(self, pdf_path: str) -> str:
+        """Hash of PDF name, modification time and extraction/chunking config; changes whenever any of them does"""
+        pdf_file = Path(pdf_path)
+        key = f"{pdf_file.name}_{pdf_file.stat().st_mtime}"
+        if self.model_name is None:
+            # Injected models (e.g. the benchmark/shard hashing embedder) must not share caches with the real one
+            key += f"_{type(self.embedding_model).__name__}"
+        if config.BOILERPLATE_STRIP:
+            key += "_boilerplate"
+        if self.token_chunking:
+            key += f"_tokens:{self._token_budget()}:{config.CHUNK_OVERLAP_TOKENS}:{config.EMBEDDING_MODEL}"
+        return hashlib.md5(key.encode()).hexdigest()
+    
     def _get_cache_path(self, pdf_path: str) -> Path:
         """Get cache file path for a PDF"""
-        pdf_file = Path(pdf_path)
-        # Create hash of PDF path and modification time
-        file_hash = hashlib.md5(f"{pdf_file.name}_{pdf_file.stat().st_mtime}".encode()).hexdigest()
-        return self.cache_dir / f"{file_hash}.pkl"
+        return self.cache_dir / f"{self._cache_key(pdf_path)}.pkl"
     
-    def _load_from_cache(self, pdf_path: str) -> Tuple[List[str], List[dict], np.ndarray]:
-        """Load cached embeddings for a PDF"""
+    def _load_from_cache(self, pdf_path: str) -> Tuple[Optional[ChunkStore], Optional[np.ndarray], Optional[Dict]]:
+        """Load cached chunks and embeddings for a PDF"""
         cache_path = self._get_cache_path(pdf_path)
         
         if cache_path.exists():
             try:
                 with open(cache_path, 'rb') as f:
                     cached_data = pickle.load(f)
-                logger.info(f"✅ Loaded {len(cached_data['chunks'])} chunks from cache for {Path(pdf_path).name}")
-                return cached_data['chunks'], cached_data['metadata'], cached_data['embeddings']
+                store = cached_data.get('store')
+                if store is None:
+                    # Caches written before the compact chunk store
+                    store = ChunkStore.from_lists(cached_data['chunks'], cached_data['metadata'])
+                logger.info(f"✅ Loaded {len(store)} chunks from cache for {Path(pdf_path).name}")
+                record_cache("embeddings", True)
+                return store, cached_data['embeddings'], cached_data.get('truncation')
             except Exception as e:
                 logger.warning(f"Cache load failed: {e}, will regenerate")
         
+        record_cache("embeddings", False)
         return None, None, None
     
-    def _save_to_cache(self, pdf_path: str, chunks: List[str], metadata: List[dict], embeddings: np.ndarray):
-        """Save embeddings to cache"""
+    def _save_to_cache(self, pdf_path: str, store: ChunkStore, embeddings: np.ndarray, truncation: Dict = None):
+        """Save chunks and embeddings to cache"""
         cache_path = self._get_cache_path(pdf_path)
         
         try:
             with open(cache_path, 'wb') as f:
                 pickle.dump({
-                    'chunks': chunks,
-                    'metadata': metadata,
-                    'embeddings': embeddings
+                    'store': store,
+                    'embeddings': embeddings,
+                    'truncation': truncation
                 }, f)
-            logger.info(f"💾 Cached {len(chunks)} chunks for {Path(pdf_path).name}")
+            logger.info(f"💾 Cached {len(store)} chunks for {Path(pdf_path).name}")
         except Exception as e:
             logger.warning(f"Cache save failed: {e}")
     
@@ -88,17 +180,18 @@ class DocumentProcessor:
             Extracted text as string
         """
         logger.info(f"Extracting text from: {pdf_path}")
-        text = ""
         
         try:
             with open(pdf_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
                 num_pages = len(pdf_reader.pages)
-                
-                for page_num in range(num_pages):
-                    page = pdf_reader.pages[page_num]
-                    text += page.extract_text() + "\n"
-                    
+                pages = [pdf_reader.pages[page_num].extract_text() for page_num in range(num_pages)]
+            
+            # Running headers/footers would otherwise be chunked and embedded on every page
+            if config.BOILERPLATE_STRIP:
+                pages = strip_boilerplate(pages)
+            text = "".join(page + "\n" for page in pages)
+            
             logger.info(f"Extracted {len(text)} characters from {num_pages} pages")
             return text
             
@@ -117,6 +210,9 @@ class DocumentProcessor:
         Returns:
             List of (chunk_text, metadata) tuples
         """
+        if self.token_chunking:
+            return self._chunk_by_tokens(text, source)
+        
         chunks_with_metadata = []
         
         # Simple chunking by characters with overlap
@@ -154,46 +250,161 @@ class DocumentProcessor:
         
         return chunks_with_metadata
     
-    def process_pdfs(self, pdf_directory: str = None) -> int:
+    def _token_budget(self) -> int:
+        """Content tokens per chunk, leaving room for the [CLS]/[SEP] the encoder adds"""
+        return min(config.CHUNK_TOKENS, self.max_seq_length) - 2
+    
+    def _chunk_by_tokens(self, text: str, source: str) -> List[Tuple[str, dict]]:
+        """
+        Split text into windows of at most _token_budget() embedding tokens
+        
+        Windows and overlap are counted in the embedding model's word-pieces,
+        so no stored chunk runs past what the encoder actually reads.
+        """
+        budget = self._token_budget()
+        overlap = min(config.CHUNK_OVERLAP_TOKENS, budget // 2)
+        offsets = self.tokenizer(
+            text, add_special_tokens=False, return_offsets_mapping=True, verbose=False
+        )["offset_mapping"]
+        
+        chunks_with_metadata = []
+        start = 0
+        chunk_id = 0
+        
+        while start < len(offsets):
+            end = min(start + budget, len(offsets))
+            
+            # Try to break at sentence boundary (only if we're past halfway)
+            if end < len(offsets):
+                for last in range(end - 1, start + budget // 2, -1):
+                    if text[offsets[last][1] - 1] in ".?!":
+                        end = last + 1
+                        break
+            
+            chunk = text[offsets[start][0]:offsets[end - 1][1]].strip()
+            if chunk:
+                metadata = {
+                    "source": source,
+                    "chunk_id": chunk_id,
+                    "start_char": offsets[start][0]
+                }
+                chunks_with_metadata.append((chunk, metadata))
+                chunk_id += 1
+            
+            if end == len(offsets):
+                break
+            start = max(end - overlap, start + 1)
+        
+        return chunks_with_metadata
+    
+    def truncation_stats(self, chunks: List[str]) -> Optional[Dict]:
+        """
+        Measure how much of each chunk the embedding model actually sees
+        
+        Returns:
+            Counts of chunks and tokens over max_seq_length, or None without a tokenizer
+        """
+        if self.tokenizer is None or not chunks:
+            return None
+        encoded = self.tokenizer(list(chunks), add_special_tokens=True, verbose=False)["input_ids"]
+        lengths = np.array([len(ids) for ids in encoded])
+        dropped = np.maximum(lengths - self.max_seq_length, 0)
+        return {
+            "chunks": len(lengths),
+            "truncated": int(np.count_nonzero(dropped)),
+            "tokens": int(lengths.sum()),
+            "dropped_tokens": int(dropped.sum()),
+            "max_tokens": int(lengths.max())
+        }
+    
+    def truncation_report(self, generation: IndexGeneration = None) -> Optional[Dict]:
+        """Truncation rates across a generation (the live one by default)"""
+        generation = generation or self._index
+        stats = [entry for entry in generation.truncation.values() if entry]
+        if not stats:
+            return None
+        totals = {key: sum(entry[key] for entry in stats) for key in ("chunks", "truncated", "tokens", "dropped_tokens")}
+        return {
+            **totals,
+            "max_tokens": max(entry["max_tokens"] for entry in stats),
+            "max_seq_length": self.max_seq_length,
+            "chunk_mode": "tokens" if self.token_chunking else "chars",
+            "truncation_rate": round(totals["truncated"] / max(totals["chunks"], 1), 4),
+            "dropped_token_rate": round(totals["dropped_tokens"] / max(totals["tokens"], 1), 4),
+            "files_measured": len(stats)
+        }
+    
+    def process_pdfs(self, pdf_directory: str = None, books: List[str] = None) -> int:
         """
         Process all PDFs and create in-memory embeddings with caching
         
         Args:
             pdf_directory: Path to directory containing PDFs
+            books: Optional PDF filenames to restrict ingestion to (e.g. one shard's books)
             
         Returns:
             Number of chunks processed
         """
+        generation = self.build_generation(pdf_directory, books=books)
+        if generation is None:
+            return 0
+        self.swap(generation)
+        return len(self.chunks)
+    
+    def build_generation(self, pdf_directory: str = None,
+                         progress: Callable[[str, int, int], None] = None,
+                         books: List[str] = None) -> Optional[IndexGeneration]:
+        """
+        Build a new index generation from the PDF directory without touching the live one
+        
+        Unchanged PDFs come from the per-file cache, so only new or modified
+        files are extracted and embedded.
+        
+        Args:
+            pdf_directory: Path to directory containing PDFs
+            progress: Optional callback(filename, files_done, files_total)
+            books: Optional PDF filenames to restrict ingestion to
+            
+        Returns:
+            The new generation, or None if there was nothing to index
+        """
         if pdf_directory is None:
             pdf_directory = config.PDF_DIR
             
         pdf_dir = Path(pdf_directory)
         if not pdf_dir.exists():
             logger.warning(f"PDF directory does not exist: {pdf_dir}")
-            return 0
+            return None
         
         pdf_files = list(pdf_dir.glob("*.pdf"))
+        if books is not None:
+            pdf_files = [pdf_file for pdf_file in pdf_files if pdf_file.name in books]
         
         if not pdf_files:
             logger.warning(f"No PDF files found in {pdf_dir}")
-            return 0
+            return None
         
         logger.info(f"Found {len(pdf_files)} PDF files to process")
         
-        all_chunks = []
-        all_metadata = []
-        all_embeddings_list = []
+        parts: Dict[str, Tuple[ChunkStore, np.ndarray]] = {}
+        pending: List[Tuple[Path, List[str], List[dict]]] = []
+        files = {}
+        truncation = {}
         
-        for pdf_file in pdf_files:
+        # Pass 1: cached PDFs load as-is, the rest are extracted and chunked
+        for done, pdf_file in enumerate(pdf_files):
+            if progress:
+                progress(pdf_file.name, done, len(pdf_files))
             try:
+                files[pdf_file.name] = self._cache_key(str(pdf_file))
+
                 # Try to load from cache first
-                cached_chunks, cached_metadata, cached_embeddings = self._load_from_cache(str(pdf_file))
+                cached_store, cached_embeddings, cached_truncation = self._load_from_cache(str(pdf_file))
                 
-                if cached_chunks is not None:
+                if cached_store is not None:
                     # Use cached data
-                    all_chunks.extend(cached_chunks)
-                    all_metadata.extend(cached_metadata)
-                    all_embeddings_list.append(cached_embeddings)
+                    parts[pdf_file.name] = (cached_store, cached_embeddings)
+                    truncation[pdf_file.name] = cached_truncation
                 else:
                     # Process PDF from scratch
                     logger.info(f"📄 Processing {pdf_file.name}...")
@@ -202,32 +413,9 @@ class DocumentProcessor:
                     if text:
                         # Chunk text
                         chunks_with_meta = self.chunk_text(text, pdf_file.name)
-                        
-                        pdf_chunks = []
-                        pdf_metadata = []
-                        
-                        for chunk, meta in chunks_with_meta:
-                            pdf_chunks.append(chunk)
-                            pdf_metadata.append(meta)
-                        
-                        if pdf_chunks:
-                            # Generate embeddings for this PDF
-                            logger.info(f"🔄 Generating embeddings for {len(pdf_chunks)} chunks from {pdf_file.name}...")
-                            pdf_embeddings = self.embedding_model.encode(
-                                pdf_chunks,
-                                show_progress_bar=True,
-                                convert_to_numpy=True
-                            )
-                            
-                            # Save to cache
-                            self._save_to_cache(str(pdf_file), pdf_chunks, pdf_metadata, pdf_embeddings)
-                            
-                            # Add to collection
-                            all_chunks.extend(pdf_chunks)
-                            all_metadata.extend(pdf_metadata)
-                            all_embeddings_list.append(pdf_embeddings)
-                            
-                            logger.info(f"✅ Created {len(pdf_chunks)} chunks from {pdf_file.name}")
+                        if chunks_with_meta:
+                            pdf_chunks, pdf_metadata = map(list, zip(*chunks_with_meta))
+                            pending.append((pdf_file, pdf_chunks, pdf_metadata))
                     
             except Exception as e:
                 logger.error(f"Error processing {pdf_file.name}: {str(e)}")
@@ -235,17 +423,94 @@ class DocumentProcessor:
                 logger.error(traceback.format_exc())
                 continue
         
-        if not all_chunks:
+        # Pass 2: embed every pending book's chunks in one length-sorted, batched run
+        if pending:
+            all_pending = [chunk for _, pdf_chunks, _ in pending for chunk in pdf_chunks]
+            if progress:
+                progress(f"encoding {len(all_pending)} chunks", len(pdf_files), len(pdf_files))
+            logger.info(f"🔄 Generating embeddings for {len(all_pending)} chunks from {len(pending)} PDFs...")
+            encoded = []
+            try:
+                all_pending_embeddings = encode_corpus(
+                    self.embedding_model, all_pending, tokenizer=self.tokenizer, model_name=self.model_name
+                )
+                offset = 0
+                for pdf_file, pdf_chunks, pdf_metadata in pending:
+                    encoded.append((pdf_file, pdf_chunks, pdf_metadata, all_pending_embeddings[offset:offset + len(pdf_chunks)]))
+                    offset += len(pdf_chunks)
+            except Exception as e:
+                # Don't lose every new book to one failure: retry per book, in-process
+                logger.error(f"Error generating embeddings: {str(e)}; encoding books one at a time")
+                for pdf_file, pdf_chunks, pdf_metadata in pending:
+                    try:
+                        pdf_embeddings = encode_corpus(self.embedding_model, pdf_chunks, tokenizer=self.tokenizer)
+                    except Exception as e:
+                        logger.error(f"Error generating embeddings for {pdf_file.name}: {str(e)}")
+                        continue
+                    encoded.append((pdf_file, pdf_chunks, pdf_metadata, pdf_embeddings))
+            
+            for pdf_file, pdf_chunks, pdf_metadata, pdf_embeddings in encoded:
+                
+                pdf_truncation = self.truncation_stats(pdf_chunks)
+                truncation[pdf_file.name] = pdf_truncation
+                if pdf_truncation:
+                    logger.info(
+                        f"📏 {pdf_file.name}: {pdf_truncation['truncated']}/{pdf_truncation['chunks']} chunks "
+                        f"exceed {self.max_seq_length} tokens ({pdf_truncation['dropped_tokens']} tokens not embedded)"
+                    )
+                
+                # Pack and save to cache
+                pdf_store = ChunkStore.from_lists(pdf_chunks, pdf_metadata)
+                self._save_to_cache(str(pdf_file), pdf_store, pdf_embeddings, pdf_truncation)
+                parts[pdf_file.name] = (pdf_store, pdf_embeddings)
+                
+                logger.info(f"✅ Created {len(pdf_chunks)} chunks from {pdf_file.name}")
+        
+        if progress:
+            progress("", len(pdf_files), len(pdf_files))
+        
+        # Keep directory order regardless of which books came from cache
+        all_stores = [parts[pdf_file.name][0] for pdf_file in pdf_files if pdf_file.name in parts]
+        all_embeddings_list = [parts[pdf_file.name][1] for pdf_file in pdf_files if pdf_file.name in parts]
+        
+        if not all_stores:
             logger.warning("No chunks created from PDFs")
-            return 0
+            return None
         
-        # Combine all embeddings
-        self.chunks = all_chunks
-        self.metadata = all_metadata
-        self.embeddings = np.vstack(all_embeddings_list) if all_embeddings_list else np.array([])
+        # Only books actually in the index: failed ones aren't recorded (or checksummed in artifacts) as ingested
+        skipped = sorted(set(files) - set(parts))
+        if skipped:
+            logger.warning(f"⚠️ Not indexed this build: {', '.join(skipped)}")
+        files = {name: key for name, key in files.items() if name in parts}
         
-        logger.info(f"✨ Knowledge base ready with {len(self.chunks)} chunks from {len(pdf_files)} books")
-        return len(self.chunks)
+        # Combine all chunks and embeddings
+        chunks = ChunkStore.concat(all_stores)
+        embeddings = np.vstack(all_embeddings_list)
+        if config.DEDUP_ENABLED:
+            # Across books, so it runs on the combined index rather than per-PDF caches
+            chunks, embeddings = deduplicate(chunks, embeddings)
+        
+        generation = IndexGeneration(
+            number=self._index.number + 1,
+            chunks=chunks,
+            embeddings=embeddings,
+            files=files,
+            truncation=truncation
+        )
+        
+        report = self.truncation_report(generation)
+        if report:
+            logger.info(
+                f"📏 Embedding truncation ({report['chunk_mode']} chunking): "
+                f"{report['truncated']}/{report['chunks']} chunks ({report['truncation_rate']:.1%}) exceed "
+                f"{report['max_seq_length']} tokens, {report['dropped_token_rate']:.1%} of stored tokens are never embedded"
+            )
+        
+        logger.info(
+            f"✨ Knowledge base ready with {len(generation.chunks)} chunks from {len(pdf_files)} books "
+            f"({generation.chunks.nbytes() / 1e6:.1f} MB chunk store)"
+        )
+        return generation
     
     def semantic_search(self, query: str, top_k: int = None) -> List[Tuple[str, dict, float]]:
         """
@@ -261,47 +526,156 @@ class DocumentProcessor:
         if top_k is None:
             top_k = config.TOP_K_RESULTS
         
-        if self.embeddings is None or len(self.chunks) == 0:
+        # One reference for the whole search, so a concurrent reload can't mix generations
+        index = self._index
+        if index.embeddings is None or len(index.chunks) == 0:
             logger.warning("No embeddings available for search")
             return []
         
         # Encode query
         query_embedding = self.embedding_model.encode([query], convert_to_numpy=True)[0]
         
+        results = self.search_embedding(query_embedding, top_k, index)
+        logger.info(f"Found {len(results)} relevant chunks for query: {query[:50]}...")
+        return results
+    
+    def search_embedding(self, query_embedding: np.ndarray, top_k: int,
+                         index: IndexGeneration = None) -> List[Tuple[str, dict, float]]:
+        """
+        Top-k chunks for an already-encoded query (shards receive vectors, not text)
+        
+        Args:
+            query_embedding: Query vector from the same embedding model
+            top_k: Number of results to return
+            index: Generation to search (the live one by default)
+            
+        Returns:
+            List of (chunk_text, metadata, similarity_score) tuples
+        """
+        index = index or self._index
+        if index.embeddings is None or len(index.chunks) == 0:
+            return []
+        return self._materialize(index, *self._top_rows(index, query_embedding, top_k))
+    
+    def _top_rows(self, index: IndexGeneration, query_embedding: np.ndarray, top_k: int,
+                  rows: np.ndarray = None) -> Tuple[np.ndarray, np.ndarray]:
+        """Best top_k rows (of all rows, or of `rows`) by cosine similarity, with their scores"""
+        embeddings = index.embeddings if rows is None else index.embeddings[rows]
+        
         # Compute cosine similarities
-        similarities = np.dot(self.embeddings, query_embedding) / (
-            np.linalg.norm(self.embeddings, axis=1) * np.linalg.norm(query_embedding)
+        similarities = np.dot(embeddings, query_embedding) / (
+            np.linalg.norm(embeddings, axis=1) * np.linalg.norm(query_embedding)
         )
         
         # Get top k indices
         top_indices = np.argsort(similarities)[-top_k:][::-1]
+        top_rows = top_indices if rows is None else rows[top_indices]
+        return top_rows, similarities[top_indices]
+    
+    def _materialize(self, index: IndexGeneration, rows: np.ndarray, scores: np.ndarray) -> List[Tuple[str, dict, float]]:
+        # Chunk strings/metadata are materialized only for the returned rows
+        return [
+            (index.chunks.text(row), index.chunks.meta(row), float(score))
+            for row, score in zip(rows, scores)
+        ]
+    
+    async def search(self, query: str, top_k: int = None) -> List[Tuple[str, dict, float]]:
+        """semantic_search off the event loop (same interface as ShardedRetriever.search)"""
+        return await asyncio.to_thread(self.semantic_search, query, top_k)
+    
+    def session_search(self, query: str, top_k: int = None,
+                       previous: Optional[RetrievalState] = None) -> Tuple[List[Tuple[str, dict, float]], Optional[RetrievalState]]:
+        """
+        Search that can reuse the previous turn's retrieval
         
-        # Return results
-        results = []
-        for idx in top_indices:
-            results.append((
-                self.chunks[idx],
-                self.metadata[idx],
-                float(similarities[idx])
-            ))
+        A follow-up (see follow_up.is_follow_up) is ranked over the previous
+        rows and their neighbouring chunks using the new query blended with
+        the previous one, skipping the full-index scan; with
+        config.FOLLOWUP_BLEND_SEARCH the blended query also runs a full
+        search and the two result sets are merged. If none of the reused
+        chunks reaches config.FOLLOWUP_MIN_SCORE against the new question
+        alone, the topic has moved on and a full search runs instead.
         
-        logger.info(f"Found {len(results)} relevant chunks for query: {query[:50]}...")
-        return results
+        The state always carries the new question's own embedding, so
+        chained follow-ups don't drift towards older topics.
+        
+        Returns:
+            (results, state to pass as `previous` on the next turn)
+        """
+        if top_k is None:
+            top_k = config.TOP_K_RESULTS
+        
+        index = self._index
+        if index.embeddings is None or len(index.chunks) == 0:
+            logger.warning("No embeddings available for search")
+            return [], None
+        
+        query_embedding = unit(self.embedding_model.encode([query], convert_to_numpy=True)[0])
+        
+        reuse = (config.FOLLOWUP_REUSE_ENABLED and previous is not None and previous.generation == index.number
+                 and is_follow_up(query, query_embedding, previous))
+        if reuse:
+            candidates = neighbour_rows(index.chunks, previous.rows)
+            _, own_scores = self._top_rows(index, query_embedding, 1, rows=candidates)
+            if float(own_scores[0]) < config.FOLLOWUP_MIN_SCORE:
+                logger.info(f"🔗 Follow-up cue, but reused chunks don't match (best {float(own_scores[0]):.2f}); full search for: {query[:50]}...")
+                reuse = False
+        
+        if reuse:
+            blended = unit(config.FOLLOWUP_QUERY_WEIGHT * query_embedding
+                           + (1 - config.FOLLOWUP_QUERY_WEIGHT) * previous.query_embedding)
+            rows, scores = self._top_rows(index, blended, top_k, rows=candidates)
+            if config.FOLLOWUP_BLEND_SEARCH:
+                full_rows, full_scores = self._top_rows(index, blended, top_k)
+                best = {}
+                for row, score in zip(np.concatenate([rows, full_rows]), np.concatenate([scores, full_scores])):
+                    best[int(row)] = max(score, best.get(int(row), score))
+                ranked = sorted(best.items(), key=lambda item: item[1], reverse=True)[:top_k]
+                rows = np.array([row for row, _ in ranked], dtype=np.int64)
+                scores = np.array([score for _, score in ranked])
+            record_cache("follow_up_retrieval", True)
+            logger.info(f"🔗 Follow-up reused {len(previous.rows)} chunks (+{len(candidates) - len(previous.rows)} neighbours) for: {query[:50]}...")
+        else:
+            rows, scores = self._top_rows(index, query_embedding, top_k)
+            if previous is not None:
+                record_cache("follow_up_retrieval", False)
+            logger.info(f"Found {len(rows)} relevant chunks for query: {query[:50]}...")
+        
+        state = RetrievalState(generation=index.number, rows=tuple(int(row) for row in rows), query_embedding=query_embedding)
+        return self._materialize(index, rows, scores), state
+    
+    async def search_session(self, query: str, top_k: int = None,
+                             previous: Optional[RetrievalState] = None) -> Tuple[List[Tuple[str, dict, float]], Optional[RetrievalState]]:
+        """session_search off the event loop"""
+        return await asyncio.to_thread(self.session_search, query, top_k, previous)
+    
+    def chunk_count(self) -> int:
+        return len(self._index.chunks)
     
     def is_initialized(self) -> bool:
         """Check if knowledge base is loaded"""
-        return self.embeddings is not None and len(self.chunks) > 0
+        index = self._index
+        return index.embeddings is not None and len(index.chunks) > 0
 
 
 # Global instance
 _processor_instance = None
+_processor_lock = threading.Lock()
 
 def get_processor() -> DocumentProcessor:
-    """Get or create global document processor instance"""
+    """Get or create global document processor instance (safe to call from worker threads)"""
     global _processor_instance
-    if _processor_instance is None:
-        _processor_instance = DocumentProcessor()
-        _processor_instance.process_pdfs()
+    with _processor_lock:
+        if _processor_instance is None:
+            processor = DocumentProcessor()
+            with profiler.phase("knowledge_base", "index_load"):
+                if config.INDEX_ARTIFACT:
+                    # Prebuilt and checksum-verified; no PDF extraction or corpus encoding
+                    from index_artifact import load_index
+                    processor.swap(load_index(config.INDEX_ARTIFACT))
+                else:
+                    processor.process_pdfs()
+            _processor_instance = processor
     return _processor_instance
 
 
@@ -0,0 +1,69 @@
+"""
+Follow-up Module
+Session-level retrieval reuse: each turn leaves behind the rows it
+retrieved and the query vector it used, and a follow-up question ("and
+what happened next?", "why did she do that?") is answered from those rows
+plus their neighbouring chunks instead of a fresh full-index search
+"""
+
+import re
+from dataclasses import dataclass
+from typing import Tuple
+
+import numpy as np
+
+import config
+from chunk_store import ChunkStore
+
+# Continuation openers, or pronouns/deictics that only make sense with a previous turn
+_FOLLOW_UP_RE = re.compile(
+    r"^\s*(and|but|so|then|also|what about|what happened|what else|how come|after that|tell me more|more)\b"
+    r"|\b(he|she|they|him|her|them|his|their|it|its|that|this|those|these|there|next|afterwards|later)\b",
+    re.IGNORECASE
+)
+
+
+@dataclass(frozen=True)
+class RetrievalState:
+    """What one turn retrieved; only meaningful against the same index generation"""
+    generation: int
+    rows: Tuple[int, ...]
+    query_embedding: np.ndarray  # Unit-length embedding of the turn's own question (not the blend)
+
+
+def unit(vector: np.ndarray) -> np.ndarray:
+    return vector / max(float(np.linalg.norm(vector)), 1e-12)
+
+
+def is_follow_up(question: str, query_embedding: np.ndarray, previous: RetrievalState) -> bool:
+    """
+    Cheap follow-up test
+
+    Short questions leaning on the previous turn (continuations, pronouns)
+    count if they are also somewhat close to the previous query (a pronoun
+    alone doesn't stop "How did Scheherazade save her life?" being a new
+    topic); any question very close to the previous query counts too.
+    """
+    similarity = float(unit(query_embedding) @ previous.query_embedding)
+    if len(question.split()) <= config.FOLLOWUP_MAX_WORDS and _FOLLOW_UP_RE.search(question):
+        return similarity >= config.FOLLOWUP_CUE_SIMILARITY
+    return similarity >= config.FOLLOWUP_SIMILARITY
+
+
+def neighbour_rows(chunks: ChunkStore, rows: Tuple[int, ...], radius: int = None) -> np.ndarray:
+    """
+    Rows plus the chunks up to `radius` positions before/after them in the same book
+
+    Rows of one book are contiguous and ordered by chunk_id (dedup only
+    removes rows), so neighbours are adjacent rows with a close chunk_id.
+    """
+    radius = config.FOLLOWUP_NEIGHBOURS if radius is None else radius
+    expanded = set(rows)
+    for row in rows:
+        for offset in range(-radius, radius + 1):
+            neighbour = row + offset
+            if (0 <= neighbour < len(chunks)
+                    and chunks.source_ids[neighbour] == chunks.source_ids[row]
+                    and abs(int(chunks.chunk_ids[neighbour]) - int(chunks.chunk_ids[row])) <= radius):
+                expanded.add(neighbour)
+    return np.array(sorted(expanded), dtype=np.int64)
@@ -6,6 +6,8 @@ import ChatMessage from './components/ChatMessage'
 import SuggestionPill from './components/SuggestionPill'
 
 const API_BASE = '/api'
+const MEDIA_POLL_MS = 1000
+const MEDIA_POLL_ATTEMPTS = 90
 
 function App() {
   const [messages, setMessages] = useState([])
@@ -159,6 +161,24 @@ function App() {
     setFollowUpSuggestions([...new Set(followUps)].slice(0, 3))
   }
 
+  // Poll a background media job and attach its URL to the message once it is ready
+  const pollMediaJob = async (messageId, field, jobId) => {
+    for (let attempt = 0; attempt < MEDIA_POLL_ATTEMPTS; attempt++) {
+      await new Promise(resolve => setTimeout(resolve, MEDIA_POLL_MS))
+      try {
+        const { data } = await axios.get(`${API_BASE}/media/${jobId}`, { params: { redirect: false } })
+        if (data.status === 'done') {
+          setMessages(prev => prev.map(msg => msg.id === messageId ? { ...msg, [field]: data.url } : msg))
+          return
+        }
+        if (data.status === 'failed') return
+      } catch (error) {
+        console.error('Media job error:', error)
+        return
+      }
+    }
+  }
+
   const handleSend = async (question = null) => {
     const textToSend = question || inputValue.trim()
     
@@ -181,10 +201,14 @@ function App() {
         generate_image: true,  // Always generate images
         generate_audio: true,  // Enable audio narration
         language: selectedLanguage,
-        session_id: sessionId
+        session_id: sessionId,
+        history_mode: 'delta',  // Messages are kept client-side; only the new turn comes back
+        media_mode: 'async'  // Text first; image/narration are polled for below
       })
 
+      const messageId = `msg_${Date.now()}`
       const botMessage = {
+        id: messageId,
         role: 'assistant',
         content: response.data.answer,
         imageUrl: response.data.image_url,
@@ -195,6 +219,10 @@ function App() {
 
       setMessages(prev => [...prev, botMessage])
       
+      const jobs = response.data.media_jobs || {}
+      if (jobs.image && !botMessage.imageUrl) pollMediaJob(messageId, 'imageUrl', jobs.image)
+      if (jobs.audio && !botMessage.audioUrl) pollMediaJob(messageId, 'audioUrl', jobs.audio)
+      
       // Generate follow-up suggestions based on the topic
       generateFollowUpSuggestions(textToSend, response.data.answer)
     } catch (error) {
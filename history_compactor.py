@@ -0,0 +1,193 @@
+"""
+History Compactor Module
+Bounded conversation history for prompts: each session keeps a rolling
+summary plus the messages not yet folded into it. After every turn the
+older messages are merged into the summary in the background, so the next
+prompt carries the summary and only the last exchange verbatim, capped at
+config.HISTORY_MAX_TOKENS however long the session runs.
+"""
+
+import asyncio
+import logging
+import re
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Tuple
+
+import config
+from metrics import Counter, STAGE_LATENCY, registry
+from prompt_builder import BuiltPrompt, count_tokens
+
+logger = logging.getLogger(__name__)
+
+HISTORY_COMPACTIONS = registry.register(Counter(
+    "storyteller_history_compactions_total",
+    "Rolling-summary updates by summarizer (llm, extractive)"
+))
+
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s")
+
+
+@dataclass
+class _Session:
+    summary: str = ""
+    pending: List[Dict] = field(default_factory=list)  # Messages not yet folded into the summary, oldest first
+    folding: bool = False
+
+
+class SummaryPrompt(BuiltPrompt):
+    """Summary update request: the previous summary and the new messages instead of book context"""
+
+    def context_message(self) -> str:
+        return f"Existing summary:\n{self.context or '(empty)'}"
+
+    def question_message(self) -> str:
+        return f"New messages:\n{self.question}"
+
+
+def _truncate(text: str, max_tokens: int, keep_end: bool = False) -> str:
+    """Cut text to roughly max_tokens, keeping its start (or its end)"""
+    tokens = count_tokens(text)
+    if tokens <= max_tokens:
+        return text
+    if max_tokens <= 0:
+        return ""
+    keep = int(len(text) * max_tokens / tokens)
+    return "…" + text[-keep:].lstrip() if keep_end else text[:keep].rstrip() + "…"
+
+
+def _render(messages: List[Dict]) -> str:
+    return "\n".join(f"{'User' if msg['role'] == 'user' else 'Assistant'}: {msg['content']}" for msg in messages)
+
+
+def fit_history(summary: str, messages: List[Dict], max_tokens: int = None) -> Tuple[str, List[Dict]]:
+    """
+    Trim a summary and recent messages to the history token cap
+
+    The last exchange is kept first (its answer shortened if it alone is
+    over the cap), then as much of the summary as fits (newest end), then
+    any older unfolded messages, newest first.
+
+    Returns:
+        (summary, messages) for build_prompt
+    """
+    budget = config.HISTORY_MAX_TOKENS if max_tokens is None else max_tokens
+    messages = [{"role": msg["role"], "content": msg["content"]} for msg in messages]
+    last, older = messages[-2:], messages[:-2]
+
+    for msg in last:
+        budget -= count_tokens(msg["content"])
+    if budget < 0 and last:
+        # Over the cap on its own: shorten the answer, the question stays intact
+        longest = max(last, key=lambda msg: count_tokens(msg["content"]))
+        longest["content"] = _truncate(longest["content"], count_tokens(longest["content"]) + budget)
+        budget = 0
+
+    summary = _truncate(summary, budget, keep_end=True)
+    budget -= count_tokens(summary) if summary else 0
+
+    kept = []
+    for msg in reversed(older):
+        tokens = count_tokens(msg["content"])
+        if tokens > budget:
+            break
+        kept.append(msg)
+        budget -= tokens
+    return summary, kept[::-1] + last
+
+
+def extractive_summary(summary: str, messages: List[Dict], max_tokens: int = None) -> str:
+    """LLM-free summary update: each question with its answer's first sentence, oldest lines dropped past the cap"""
+    max_tokens = max_tokens or config.HISTORY_SUMMARY_MAX_TOKENS
+    lines = [summary] if summary else []
+    question = None
+    for msg in messages:
+        content = " ".join(msg["content"].split())
+        if msg["role"] == "user":
+            question = content
+            continue
+        answer = _SENTENCE_END.split(content, 1)[0]
+        lines.append(f"User asked: {question} Answer: {answer}" if question else f"Answer: {answer}")
+        question = None
+    if question:
+        lines.append(f"User asked: {question}")
+    return _truncate(" ".join(lines), max_tokens, keep_end=True)
+
+
+class HistoryCompactor:
+    """Per-session rolling summaries, updated off the request path"""
+
+    def __init__(self):
+        self.sessions: Dict[str, _Session] = {}
+        self._tasks = set()  # Keep references so running folds aren't garbage collected
+
+    def prompt_history(self, session_id: str) -> Tuple[str, List[Dict]]:
+        """
+        Summary and recent messages for the session's next prompt, within the token cap
+
+        Never waits for a running fold: messages it hasn't merged yet are
+        still pending and are included (or trimmed) here.
+        """
+        session = self.sessions.get(session_id)
+        if session is None:
+            return "", []
+        return fit_history(session.summary, session.pending)
+
+    def record_turn(self, session_id: str, question: str, answer: str, llm=None):
+        """Add a finished exchange and start folding older messages into the summary in the background"""
+        session = self.sessions.setdefault(session_id, _Session())
+        session.pending.append({"role": "user", "content": question})
+        session.pending.append({"role": "assistant", "content": answer})
+
+        if not config.HISTORY_COMPACTION_ENABLED:
+            # No summary: a plain window over the last three exchanges
+            del session.pending[:-6]
+            return
+        if not session.folding:
+            # Bounded even if summaries keep failing (the fold only ever removes a prefix, so not mid-fold)
+            del session.pending[:-config.MAX_CONVERSATION_HISTORY * 2]
+        if session.folding or len(session.pending) <= 2:
+            return
+        session.folding = True
+        task = asyncio.create_task(self._fold(session_id, session, llm))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    def clear(self, session_id: str):
+        self.sessions.pop(session_id, None)
+
+    async def _fold(self, session_id: str, session: _Session, llm):
+        """Merge everything but the last exchange into the summary, until nothing is left over"""
+        try:
+            while len(session.pending) > 2:
+                batch = session.pending[:-2]
+                start = time.perf_counter()
+                session.summary = await self._summarize(session.summary, batch, llm)
+                # Turns recorded meanwhile were appended after the batch, so it is still the prefix
+                del session.pending[:len(batch)]
+                STAGE_LATENCY.observe(time.perf_counter() - start, stage="history_compaction")
+                logger.debug(f"🧾 Folded {len(batch)} messages into the summary of session {session_id}")
+        except Exception as e:
+            logger.warning(f"⚠️ History compaction failed for session {session_id}: {e}")
+        finally:
+            session.folding = False
+
+    async def _summarize(self, summary: str, messages: List[Dict], llm) -> str:
+        if config.HISTORY_SUMMARY_MODE == "llm" and llm is not None and llm.available:
+            prompt = SummaryPrompt(
+                system=config.HISTORY_SUMMARY_PROMPT.format(max_words=int(config.HISTORY_SUMMARY_MAX_TOKENS * 0.75)),
+                context=summary,
+                question=_render(messages)
+            )
+            try:
+                updated = await llm.generate(
+                    prompt,
+                    max_tokens=config.HISTORY_SUMMARY_MAX_TOKENS,
+                    temperature=config.HISTORY_SUMMARY_TEMPERATURE
+                )
+                HISTORY_COMPACTIONS.inc(summarizer="llm")
+                return _truncate(updated.strip(), config.HISTORY_SUMMARY_MAX_TOKENS, keep_end=True)
+            except Exception as e:
+                logger.warning(f"⚠️ LLM summary failed, using extractive summary: {e}")
+        HISTORY_COMPACTIONS.inc(summarizer="extractive")
+        return extractive_summary(summary, messages)
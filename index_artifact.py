@@ -0,0 +1,236 @@
+"""
+Index Artifact Module
+Offline knowledge-base builds: ingest the PDFs once (e.g. in CI) and write
+a versioned artifact directory the server can start from with checksum
+verification and no corpus encoding
+
+Layout:
+    <output>/LATEST                 name of the newest version
+    <output>/<version>/manifest.json  model, chunk config, source/file checksums
+    <output>/<version>/chunks.npz     ChunkStore arrays (no pickle)
+    <output>/<version>/embeddings.npy
+
+Build / verify as a CLI:
+    python index_artifact.py build-index --output data/index
+    python index_artifact.py verify data/index
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import shutil
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+
+import config
+from chunk_store import ChunkStore
+
+logger = logging.getLogger(__name__)
+
+ARTIFACT_FORMAT = 1
+MANIFEST_NAME = "manifest.json"
+LATEST_NAME = "LATEST"
+
+_STORE_ARRAYS = ("offsets", "source_ids", "chunk_ids", "start_chars",
+                 "prov_offsets", "prov_source_ids", "prov_chunk_ids", "prov_start_chars")
+
+
+class ArtifactError(Exception):
+    """Artifact is missing, corrupt or incompatible with this server's config"""
+    pass
+
+
+def _sha256(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(config.MEDIA_CHUNK_SIZE), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def chunk_config() -> Dict:
+    """Settings that change which chunks/vectors an ingest produces"""
+    return {
+        "mode": config.CHUNK_MODE,
+        "tokens": config.CHUNK_TOKENS,
+        "overlap_tokens": config.CHUNK_OVERLAP_TOKENS,
+        "size": config.CHUNK_SIZE,
+        "overlap": config.CHUNK_OVERLAP,
+        "boilerplate_strip": config.BOILERPLATE_STRIP,
+        "dedup": config.DEDUP_ENABLED,
+        "dedup_jaccard": config.DEDUP_JACCARD,
+        "dedup_cosine": config.DEDUP_COSINE
+    }
+
+
+def _write_store(store: ChunkStore, path: Path):
+    arrays = {name: getattr(store, name) for name in _STORE_ARRAYS if getattr(store, name) is not None}
+    np.savez(path, blob=np.frombuffer(store.blob, dtype=np.uint8), **arrays)
+
+
+def _read_store(path: Path, sources) -> ChunkStore:
+    with np.load(path, allow_pickle=False) as data:
+        arrays = {name: data[name] for name in _STORE_ARRAYS if name in data.files}
+        return ChunkStore(blob=data["blob"].tobytes(), sources=list(sources), **arrays)
+
+
+def build_index(output_dir: Path = None, pdf_directory: Path = None, processor=None) -> Path:
+    """
+    Ingest the PDFs and write a new artifact version
+
+    Returns:
+        Path of the version directory
+    """
+    from document_processor import DocumentProcessor
+
+    output_dir = Path(output_dir or config.INDEX_ARTIFACT_DIR)
+    pdf_dir = Path(pdf_directory or config.PDF_DIR)
+    processor = processor or DocumentProcessor()
+
+    start = time.time()
+    generation = processor.build_generation(str(pdf_dir))
+    if generation is None:
+        raise ArtifactError(f"No chunks built from {pdf_dir}")
+
+    pdf_checksums = {name: _sha256(pdf_dir / name) for name in sorted(generation.files)}
+    fingerprint = hashlib.sha256(json.dumps(
+        {"model": config.EMBEDDING_MODEL, "chunking": chunk_config(), "pdfs": pdf_checksums}, sort_keys=True
+    ).encode()).hexdigest()[:12]
+    version = f"{time.strftime('%Y%m%dT%H%M%SZ', time.gmtime())}-{fingerprint}"
+
+    # Write into a temp dir and rename, so a half-written version is never visible
+    output_dir.mkdir(parents=True, exist_ok=True)
+    staging = output_dir / f".{version}.tmp"
+    shutil.rmtree(staging, ignore_errors=True)
+    staging.mkdir()
+    _write_store(generation.chunks, staging / "chunks.npz")
+    np.save(staging / "embeddings.npy", generation.embeddings)
+
+    manifest = {
+        "format": ARTIFACT_FORMAT,
+        "version": version,
+        "created_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "embedding_model": config.EMBEDDING_MODEL,
+        "embedding_dim": int(generation.embeddings.shape[1]),
+        "max_seq_length": processor.max_seq_length,
+        "chunking": dict(chunk_config(), effective_mode="tokens" if processor.token_chunking else "chars"),
+        "chunks": len(generation.chunks),
+        "sources": generation.chunks.sources,
+        "pdfs": pdf_checksums,
+        "truncation": {name: stats for name, stats in generation.truncation.items() if stats},
+        "files": {
+            name: {"sha256": _sha256(staging / name), "bytes": (staging / name).stat().st_size}
+            for name in ("chunks.npz", "embeddings.npy")
+        }
+    }
+    with open(staging / MANIFEST_NAME, "w") as f:
+        json.dump(manifest, f, indent=2)
+
+    version_dir = output_dir / version
+    os.replace(staging, version_dir)
+    latest_tmp = output_dir / f".{LATEST_NAME}.tmp"
+    latest_tmp.write_text(version)
+    os.replace(latest_tmp, output_dir / LATEST_NAME)
+
+    logger.info(f"📦 Index artifact {version}: {manifest['chunks']} chunks in {time.time() - start:.1f}s → {version_dir}")
+    return version_dir
+
+
+def resolve_version(path: Path) -> Path:
+    """A version directory, or an output directory whose LATEST names one"""
+    path = Path(path)
+    if (path / MANIFEST_NAME).exists():
+        return path
+    latest = path / LATEST_NAME
+    if latest.exists():
+        return path / latest.read_text().strip()
+    raise ArtifactError(f"No index artifact at {path}")
+
+
+def verify(path: Path) -> Dict:
+    """
+    Check an artifact's checksums and compatibility with the running config
+
+    Returns:
+        The manifest
+    """
+    version_dir = resolve_version(path)
+    try:
+        with open(version_dir / MANIFEST_NAME) as f:
+            manifest = json.load(f)
+    except (OSError, ValueError) as e:
+        raise ArtifactError(f"Unreadable manifest in {version_dir}: {e}")
+
+    if manifest.get("format") != ARTIFACT_FORMAT:
+        raise ArtifactError(f"Unsupported artifact format {manifest.get('format')} (expected {ARTIFACT_FORMAT})")
+    if manifest["embedding_model"] != config.EMBEDDING_MODEL:
+        # Query vectors from a different model can't be compared with the stored ones
+        raise ArtifactError(
+            f"Artifact built with {manifest['embedding_model']}, server uses {config.EMBEDDING_MODEL}"
+        )
+    for name, expected in manifest["files"].items():
+        file_path = version_dir / name
+        if not file_path.exists():
+            raise ArtifactError(f"Missing artifact file {name}")
+        if file_path.stat().st_size != expected["bytes"] or _sha256(file_path) != expected["sha256"]:
+            raise ArtifactError(f"Checksum mismatch for {name}")
+    return manifest
+
+
+def load_index(path: Path, number: int = 1):
+    """
+    Verify an artifact and load it as an IndexGeneration
+
+    Raises:
+        ArtifactError: if verification fails
+    """
+    from document_processor import IndexGeneration
+
+    version_dir = resolve_version(path)
+    manifest = verify(version_dir)
+    chunks = _read_store(version_dir / "chunks.npz", manifest["sources"])
+    embeddings = np.load(version_dir / "embeddings.npy", allow_pickle=False)
+    if len(chunks) != manifest["chunks"] or embeddings.shape != (manifest["chunks"], manifest["embedding_dim"]):
+        raise ArtifactError(f"Artifact {manifest['version']} arrays don't match its manifest")
+
+    logger.info(f"📦 Loaded index artifact {manifest['version']} ({len(chunks)} chunks, verified)")
+    return IndexGeneration(
+        number=number,
+        chunks=chunks,
+        embeddings=embeddings,
+        files=manifest["pdfs"],
+        truncation=manifest["truncation"]
+    )
+
+
+def main(argv: Optional[list] = None):
+    parser = argparse.ArgumentParser(description="Build or verify an offline knowledge-base index artifact")
+    commands = parser.add_subparsers(dest="command", required=True)
+    build = commands.add_parser("build-index", help="Ingest PDFs and write a new artifact version")
+    build.add_argument("--output", type=Path, default=config.INDEX_ARTIFACT_DIR)
+    build.add_argument("--pdf-dir", type=Path, default=config.PDF_DIR)
+    check = commands.add_parser("verify", help="Verify an artifact against the current config")
+    check.add_argument("path", type=Path, nargs="?", default=config.INDEX_ARTIFACT_DIR)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL))
+
+    try:
+        if args.command == "build-index":
+            version_dir = build_index(args.output, args.pdf_dir)
+            print(f"\n✅ Index artifact written to {version_dir}")
+        else:
+            manifest = verify(args.path)
+            print(f"\n✅ {manifest['version']}: {manifest['chunks']} chunks, {manifest['embedding_model']}, checksums OK")
+    except ArtifactError as e:
+        print(f"\n❌ {e}")
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,147 @@
+"""
+Knowledge Base Reloader Module
+Hot reload for the PDF library: new or changed PDFs are ingested in a
+worker thread and the finished index generation is swapped in atomically,
+so searches already in flight finish on the generation they started with
+"""
+
+import asyncio
+import logging
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+
+import config
+from metrics import Counter, Gauge, registry
+
+logger = logging.getLogger(__name__)
+
+KB_GENERATION = registry.register(Gauge(
+    "storyteller_kb_generation",
+    "Index generation currently serving searches"
+))
+KB_RELOADS = registry.register(Counter(
+    "storyteller_kb_reloads_total",
+    "Knowledge base reload attempts by outcome (swapped, unchanged, empty, failed)"
+))
+
+STATE_IDLE = "idle"
+STATE_INGESTING = "ingesting"
+STATE_FAILED = "failed"
+
+
+class KnowledgeBaseReloader:
+    """Rebuilds the processor's index off the request path and reports progress"""
+
+    def __init__(self, processor, pdf_directory: Path = None, on_swap: Callable[[object], None] = None):
+        self.processor = processor
+        self.on_swap = on_swap
+        self.pdf_dir = Path(pdf_directory or config.PDF_DIR)
+        self._lock = asyncio.Lock()
+        self._seen = self.snapshot()
+        self._status = {
+            "state": STATE_IDLE,
+            "generation": processor.generation.number,
+            "chunks": len(processor.chunks),
+            "current_file": None,
+            "files_done": 0,
+            "files_total": 0,
+            "started_at": None,
+            "finished_at": None,
+            "duration_s": None,
+            "last_error": None
+        }
+        KB_GENERATION.set(processor.generation.number)
+
+    def snapshot(self) -> Dict[str, Tuple[float, int]]:
+        """PDF filename -> (mtime, size) for change detection"""
+        if not self.pdf_dir.exists():
+            return {}
+        snapshot = {}
+        for pdf_file in self.pdf_dir.glob("*.pdf"):
+            try:
+                stat = pdf_file.stat()
+            except OSError:
+                continue  # Deleted between glob and stat
+            snapshot[pdf_file.name] = (stat.st_mtime, stat.st_size)
+        return snapshot
+
+    def status(self) -> Dict:
+        return {**self._status, "truncation": self.processor.truncation_report()}
+
+    @property
+    def running(self) -> bool:
+        return self._lock.locked()
+
+    def _progress(self, filename: str, done: int, total: int):
+        # Called from the ingest thread; plain dict item assignment is atomic enough for a status view
+        self._status.update(current_file=filename or None, files_done=done, files_total=total)
+
+    async def reload(self, force: bool = False) -> bool:
+        """
+        Ingest the PDF directory and swap in the new generation
+
+        Args:
+            force: Rebuild even if no PDF changed since the last scan
+
+        Returns:
+            True if a new generation went live
+        """
+        async with self._lock:
+            snapshot = self.snapshot()
+            if not force and snapshot == self._seen:
+                KB_RELOADS.inc(outcome="unchanged")
+                return False
+
+            start = time.time()
+            self._status.update(
+                state=STATE_INGESTING, started_at=start, finished_at=None,
+                duration_s=None, last_error=None, files_done=0, files_total=len(snapshot)
+            )
+            logger.info(f"📚 Reloading knowledge base ({len(snapshot)} PDFs)")
+
+            try:
+                generation = await asyncio.to_thread(
+                    self.processor.build_generation, str(self.pdf_dir), self._progress
+                )
+            except Exception as e:
+                logger.error(f"❌ Knowledge base reload failed: {str(e)}")
+                KB_RELOADS.inc(outcome="failed")
+                self._finish(start, STATE_FAILED, str(e))
+                return False
+
+            # Remember this scan even when it built nothing, so the watcher waits for the next change
+            self._seen = snapshot
+            if generation is None:
+                # Keep serving the old generation rather than an empty index
+                logger.warning("⚠️ Reload produced no chunks; keeping the current index")
+                KB_RELOADS.inc(outcome="empty")
+                self._finish(start, STATE_FAILED, "no chunks built")
+                return False
+
+            self.processor.swap(generation)
+            KB_GENERATION.set(generation.number)
+            KB_RELOADS.inc(outcome="swapped")
+            self._status.update(generation=generation.number, chunks=len(generation.chunks))
+            self._finish(start, STATE_IDLE)
+            if self.on_swap:
+                self.on_swap(generation)
+            logger.info(f"✅ Knowledge base reloaded in {self._status['duration_s']}s")
+            return True
+
+    def _finish(self, start: float, state: str, error: Optional[str] = None):
+        finished = time.time()
+        self._status.update(
+            state=state, current_file=None, finished_at=finished,
+            duration_s=round(finished - start, 2), last_error=error
+        )
+
+    async def run_watcher(self, interval: float = None):
+        """Background task: poll the PDF directory and reload when it changes"""
+        interval = interval or config.KB_WATCH_INTERVAL_S
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.reload()
+            except Exception as e:
+                logger.error(f"❌ Knowledge base watcher pass failed: {str(e)}")
@@ -0,0 +1,153 @@
+"""
+Library Registry Module
+Multi-tenant book collections: every subdirectory of config.LIBRARIES_DIR
+is a library with its own index, built on first use and kept in RAM under
+a memory budget with least-recently-used eviction. All libraries share the
+default processor's embedding model, so it is loaded only once.
+"""
+
+import asyncio
+import logging
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, List
+
+import config
+from document_processor import DocumentProcessor, get_processor
+from metrics import Gauge, record_cache, registry
+
+logger = logging.getLogger(__name__)
+
+LIBRARY_BYTES = registry.register(Gauge(
+    "storyteller_library_resident_bytes",
+    "Chunk store + embedding bytes of loaded non-default libraries"
+))
+
+_NAME_CHARS = set("abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789-_")
+
+
+class UnknownLibraryError(KeyError):
+    """No library directory by that name"""
+    pass
+
+
+def _resident_bytes(processor: DocumentProcessor) -> int:
+    generation = processor.generation
+    embeddings = generation.embeddings.nbytes if generation.embeddings is not None else 0
+    return generation.chunks.nbytes() + embeddings
+
+
+class LibraryRegistry:
+    """Lazily loaded, LRU-evicted per-library DocumentProcessors"""
+
+    def __init__(self, libraries_dir: Path = None, budget_bytes: int = None):
+        self.libraries_dir = Path(libraries_dir or config.LIBRARIES_DIR)
+        self.budget_bytes = budget_bytes if budget_bytes is not None else config.LIBRARY_MEMORY_BUDGET_MB * 1024 * 1024
+        self._loaded: "OrderedDict[str, DocumentProcessor]" = OrderedDict()
+        self._lock = threading.Lock()  # Guards _loaded
+        self._load_locks: Dict[str, threading.Lock] = {}  # One loader per library at a time
+        self.evictions = 0
+
+    def _path(self, name: str) -> Path:
+        if not name or not set(name) <= _NAME_CHARS:
+            raise UnknownLibraryError(name)
+        path = self.libraries_dir / name
+        if not path.is_dir():
+            raise UnknownLibraryError(name)
+        return path
+
+    def names(self) -> List[str]:
+        """Default library first, then every library directory"""
+        found = []
+        if self.libraries_dir.exists():
+            found = sorted(path.name for path in self.libraries_dir.iterdir() if path.is_dir() and set(path.name) <= _NAME_CHARS)
+        return [config.DEFAULT_LIBRARY] + [name for name in found if name != config.DEFAULT_LIBRARY]
+
+    def get(self, name: str) -> DocumentProcessor:
+        """
+        The processor for a library, building its index on first use (blocking)
+
+        Raises:
+            UnknownLibraryError: if there is no such library
+        """
+        if name == config.DEFAULT_LIBRARY:
+            # The default library is the global processor: always resident, never evicted
+            return get_processor()
+
+        with self._lock:
+            processor = self._loaded.get(name)
+            if processor is not None:
+                self._loaded.move_to_end(name)
+                record_cache("libraries", True)
+                return processor
+
+        # Validate before creating a lock, so made-up names can't grow _load_locks
+        path = self._path(name)
+        with self._lock:
+            load_lock = self._load_locks.setdefault(name, threading.Lock())
+
+        with load_lock:
+            with self._lock:
+                if name in self._loaded:  # Loaded by a concurrent request while we waited
+                    self._loaded.move_to_end(name)
+                    return self._loaded[name]
+            record_cache("libraries", False)
+
+            shared = get_processor()
+            processor = DocumentProcessor(embedding_model=shared.embedding_model, model_name=shared.model_name)
+            try:
+                processor.process_pdfs(path)
+            except Exception:
+                with self._lock:
+                    if self._load_locks.get(name) is load_lock:
+                        del self._load_locks[name]
+                raise
+            logger.info(f"📚 Library '{name}' loaded: {processor.chunk_count()} chunks, {_resident_bytes(processor) / 1e6:.1f} MB")
+
+            with self._lock:
+                self._loaded[name] = processor
+                self._evict_locked(keep=name)
+        return processor
+
+    async def aget(self, name: str) -> DocumentProcessor:
+        """get() off the event loop"""
+        return await asyncio.to_thread(self.get, name)
+
+    def _evict_locked(self, keep: str):
+        """Drop least-recently-used libraries until the budget holds (never the one just used)"""
+        usage = sum(_resident_bytes(processor) for processor in self._loaded.values())
+        for name in list(self._loaded):
+            if usage <= self.budget_bytes or self.budget_bytes <= 0:
+                break
+            if name == keep:
+                continue
+            usage -= _resident_bytes(self._loaded.pop(name))
+            self._load_locks.pop(name, None)
+            self.evictions += 1
+            logger.info(f"♻️ Evicted library '{name}' from memory (LRU)")
+        LIBRARY_BYTES.set(usage)
+
+    def status(self) -> Dict:
+        with self._lock:
+            loaded = {name: _resident_bytes(processor) for name, processor in self._loaded.items()}
+        return {
+            "libraries": self.names(),
+            "loaded": loaded,
+            "resident_bytes": sum(loaded.values()),
+            "budget_bytes": self.budget_bytes,
+            "evictions": self.evictions
+        }
+
+
+# Global instance
+_registry_instance = None
+_registry_lock = threading.Lock()
+
+def get_library_registry() -> LibraryRegistry:
+    """Get or create global library registry instance"""
+    global _registry_instance
+    with _registry_lock:
+        if _registry_instance is None:
+            _registry_instance = LibraryRegistry()
+    return _registry_instance
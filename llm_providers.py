@@ -0,0 +1,418 @@
+"""
+LLM Providers Module
+Async provider layer for text generation: one native-async adapter per
+backend (Gemini, OpenAI, local mock) behind a router that applies per-call
+deadlines, bounded concurrency, hedged requests and failover
+"""
+
+import asyncio
+import logging
+import random
+import time
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional
+
+import config
+from metrics import registry, Counter, record_upstream_error
+from prompt_builder import BuiltPrompt
+from startup_profiler import profiler
+
+logger = logging.getLogger(__name__)
+
+LLM_CALLS = registry.register(Counter(
+    "storyteller_llm_calls_total",
+    "LLM provider calls by provider and outcome (success/error/cancelled)"
+))
+LLM_CACHED_TOKENS = registry.register(Counter(
+    "storyteller_llm_cached_prompt_tokens_total",
+    "Prompt tokens the provider reported as served from its prompt cache"
+))
+LLM_HEDGES = registry.register(Counter(
+    "storyteller_llm_hedges_total",
+    "Hedged or failover requests fired to a secondary provider, by reason"
+))
+
+
+class LLMUnavailableError(Exception):
+    """Raised when every provider failed or the deadline expired"""
+
+
+class LLMProvider(ABC):
+    """Base class: one backend with its own concurrency limit and latency history"""
+
+    name = "base"
+
+    def __init__(self, max_concurrency: int = None):
+        self.semaphore = asyncio.Semaphore(max_concurrency or config.LLM_MAX_CONCURRENCY)
+        self._latencies: Deque[float] = deque(maxlen=config.LLM_LATENCY_SAMPLES)
+
+    @abstractmethod
+    async def generate(self, prompt: BuiltPrompt, max_tokens: int, temperature: float) -> str:
+        """Return the whole answer text"""
+
+    async def generate_stream(self, prompt: BuiltPrompt, max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        """Yield answer text incrementally (default: the whole answer as one piece)"""
+        yield await self.generate(prompt, max_tokens, temperature)
+
+    def record_latency(self, seconds: float):
+        self._latencies.append(seconds)
+
+    def latency_percentile(self, pct: float) -> Optional[float]:
+        """Recent latency percentile, or None until enough samples exist"""
+        if len(self._latencies) < config.LLM_HEDGE_MIN_SAMPLES:
+            return None
+        samples = sorted(self._latencies)
+        return samples[min(len(samples) - 1, int(pct / 100 * len(samples)))]
+
+
+class GeminiProvider(LLMProvider):
+    """
+    Google Gemini via the SDK's native async generate_content_async
+
+    The persona goes in system_instruction (one model object per distinct
+    system prefix) on SDK versions that support it; older SDKs get the
+    same text inlined first so the prefix stays stable either way.
+    """
+
+    name = "gemini"
+
+    def __init__(self, api_key: str, model: str, **kwargs):
+        super().__init__(**kwargs)
+        with profiler.phase("google.generativeai", "import"):
+            import google.generativeai as genai
+        genai.configure(api_key=api_key)
+        self._genai = genai
+        self.model_name = model
+        self.model = genai.GenerativeModel(model)
+        self._system_models: Dict[str, object] = {}
+        self._system_supported = True
+
+    def _model_for(self, system: str):
+        """GenerativeModel bound to a system instruction, or None if the SDK lacks support"""
+        if not self._system_supported:
+            return None
+        model = self._system_models.get(system)
+        if model is None:
+            try:
+                model = self._genai.GenerativeModel(self.model_name, system_instruction=system)
+            except TypeError:
+                self._system_supported = False
+                return None
+            self._system_models[system] = model
+        return model
+
+    async def generate(self, prompt: BuiltPrompt, max_tokens: int, temperature: float) -> str:
+        model = self._model_for(prompt.system)
+        if model is not None:
+            contents = prompt.turn_text()
+        else:
+            model, contents = self.model, prompt.as_text()
+
+        generation_config = self._genai.types.GenerationConfig(
+            temperature=temperature,
+            max_output_tokens=max_tokens,
+        )
+        if hasattr(model, "generate_content_async"):
+            response = await model.generate_content_async(contents, generation_config=generation_config)
+        else:
+            response = await asyncio.to_thread(model.generate_content, contents, generation_config=generation_config)
+
+        usage = getattr(response, "usage_metadata", None)
+        cached = getattr(usage, "cached_content_token_count", 0) if usage else 0
+        if cached:
+            LLM_CACHED_TOKENS.inc(cached, provider=self.name)
+        return response.text.strip()
+
+    async def generate_stream(self, prompt: BuiltPrompt, max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        model = self._model_for(prompt.system)
+        if model is not None:
+            contents = prompt.turn_text()
+        else:
+            model, contents = self.model, prompt.as_text()
+        if not hasattr(model, "generate_content_async"):
+            yield await self.generate(prompt, max_tokens, temperature)
+            return
+
+        response = await model.generate_content_async(
+            contents,
+            generation_config=self._genai.types.GenerationConfig(temperature=temperature, max_output_tokens=max_tokens),
+            stream=True
+        )
+        async for chunk in response:
+            if chunk.text:
+                yield chunk.text
+
+
+class OpenAIProvider(LLMProvider):
+    """OpenAI (or compatible) chat completions on one shared AsyncOpenAI client"""
+
+    name = "openai"
+
+    def __init__(self, api_key: str, model: str, base_url: str = None, **kwargs):
+        super().__init__(**kwargs)
+        with profiler.phase("openai", "import"):
+            from openai import AsyncOpenAI
+        # Retries/timeouts are owned by the router; the client keeps its connection pool
+        self.client = AsyncOpenAI(api_key=api_key, base_url=base_url, timeout=config.LLM_TIMEOUT_S, max_retries=0)
+        self.model = model
+
+    @staticmethod
+    def _messages(prompt: BuiltPrompt) -> List[Dict]:
+        # Persona first as a system message: OpenAI caches identical prompt prefixes automatically
+        messages = [
+            {"role": "system", "content": prompt.system},
+            {"role": "system", "content": prompt.context_message()},
+        ]
+        if prompt.summary:
+            messages.append({"role": "system", "content": prompt.summary_message()})
+        messages.extend(prompt.history)
+        messages.append({"role": "user", "content": prompt.question_message()})
+        return messages
+
+    async def generate(self, prompt: BuiltPrompt, max_tokens: int, temperature: float) -> str:
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt),
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+
+        details = getattr(response.usage, "prompt_tokens_details", None) if response.usage else None
+        cached = getattr(details, "cached_tokens", 0) if details else 0
+        if cached:
+            LLM_CACHED_TOKENS.inc(cached, provider=self.name)
+        return response.choices[0].message.content.strip()
+
+    async def generate_stream(self, prompt: BuiltPrompt, max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        stream = await self.client.chat.completions.create(
+            model=self.model,
+            messages=self._messages(prompt),
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True
+        )
+        async for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class MockProvider(LLMProvider):
+    """Local provider for tests and benchmarks with configurable latency and failure rate"""
+
+    def __init__(self, name: str = "mock", latency: float = None, error_rate: float = None, seed: int = 0, **kwargs):
+        super().__init__(**kwargs)
+        self.name = name
+        self.latency = config.MOCK_LLM_LATENCY_S if latency is None else latency
+        self.error_rate = config.MOCK_LLM_ERROR_RATE if error_rate is None else error_rate
+        self._rng = random.Random(seed)
+        self.calls = 0
+
+    async def generate(self, prompt: BuiltPrompt, max_tokens: int, temperature: float) -> str:
+        self.calls += 1
+        await asyncio.sleep(self.latency)
+        if self._rng.random() < self.error_rate:
+            raise RuntimeError(f"{self.name} mock failure")
+        return f"[{self.name}] Mock answer to: {prompt.question[:80].strip()}"
+
+    async def generate_stream(self, prompt: BuiltPrompt, max_tokens: int, temperature: float) -> AsyncIterator[str]:
+        answer = await self.generate(prompt, max_tokens, temperature)
+        for word in answer.split(" "):
+            await asyncio.sleep(0)
+            yield word + " "
+
+
+class LLMRouter:
+    """
+    Calls providers in priority order
+
+    - Deadline: the whole call (including hedges/failover) is bounded by config.LLM_TIMEOUT_S
+    - Hedging: if the active provider has not answered by its recent p95, the next
+      provider is fired too and the first success wins
+    - Failover: when a provider errors, the next one is tried immediately
+    """
+
+    def __init__(self, providers: List[LLMProvider]):
+        self.providers = providers
+
+    @property
+    def available(self) -> bool:
+        return bool(self.providers)
+
+    def _hedge_delay(self, provider: LLMProvider) -> float:
+        p95 = provider.latency_percentile(config.LLM_HEDGE_PERCENTILE)
+        if p95 is None:
+            return config.LLM_HEDGE_DEFAULT_DELAY_S
+        return max(config.LLM_HEDGE_MIN_DELAY_S, p95)
+
+    async def _call(self, provider: LLMProvider, prompt: BuiltPrompt, max_tokens: int, temperature: float) -> str:
+        async with provider.semaphore:
+            start = time.perf_counter()
+            try:
+                answer = await provider.generate(prompt, max_tokens, temperature)
+            except asyncio.CancelledError:
+                LLM_CALLS.inc(provider=provider.name, outcome="cancelled")
+                raise
+            except Exception:
+                LLM_CALLS.inc(provider=provider.name, outcome="error")
+                record_upstream_error(provider.name)
+                raise
+            provider.record_latency(time.perf_counter() - start)
+            LLM_CALLS.inc(provider=provider.name, outcome="success")
+            return answer
+
+    async def generate(self, prompt: BuiltPrompt, max_tokens: int = None, temperature: float = None,
+                       timeout: float = None) -> str:
+        """
+        Generate text with hedging and failover
+
+        Args:
+            prompt: Prompt from prompt_builder.build_prompt
+            max_tokens: Output token limit
+            temperature: Sampling temperature
+            timeout: Overall deadline in seconds
+
+        Raises:
+            LLMUnavailableError: If no provider succeeded before the deadline
+        """
+        if not self.providers:
+            raise LLMUnavailableError("No LLM provider configured")
+
+        max_tokens = max_tokens or config.LLM_MAX_TOKENS
+        temperature = config.LLM_TEMPERATURE if temperature is None else temperature
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or config.LLM_TIMEOUT_S)
+
+        queue = list(self.providers)
+        pending: Dict[asyncio.Task, LLMProvider] = {}
+        errors: List[str] = []
+
+        def launch(reason: str = None) -> bool:
+            if not queue:
+                return False
+            provider = queue.pop(0)
+            if reason:
+                LLM_HEDGES.inc(reason=reason, provider=provider.name)
+                logger.info(f"🔀 LLM {reason}: firing {provider.name}")
+            task = asyncio.create_task(self._call(provider, prompt, max_tokens, temperature))
+            pending[task] = provider
+            return True
+
+        launch()
+        hedge_at = loop.time() + self._hedge_delay(self.providers[0])
+        hedged = not config.LLM_HEDGE_ENABLED
+
+        try:
+            while pending:
+                now = loop.time()
+                if now >= deadline:
+                    break
+                wake_at = deadline if hedged else min(deadline, hedge_at)
+                done, _ = await asyncio.wait(
+                    list(pending), timeout=max(0.0, wake_at - now), return_when=asyncio.FIRST_COMPLETED
+                )
+
+                if not done:
+                    if not hedged and loop.time() >= hedge_at:
+                        hedged = True
+                        launch("hedge")
+                    continue
+
+                for task in done:
+                    provider = pending.pop(task)
+                    if task.exception() is None:
+                        return task.result()
+                    errors.append(f"{provider.name}: {task.exception()}")
+                    logger.warning(f"⚠️ LLM provider {provider.name} failed: {task.exception()}")
+
+                if not pending:
+                    launch("failover")
+        finally:
+            for task in pending:
+                task.cancel()
+
+        if not errors:
+            errors.append("deadline exceeded")
+        raise LLMUnavailableError("; ".join(errors))
+
+    async def generate_stream(self, prompt: BuiltPrompt, on_delta: Callable[[str], Awaitable[None]],
+                              max_tokens: int = None, temperature: float = None, timeout: float = None) -> str:
+        """
+        Generate text incrementally, passing each piece to on_delta as it arrives
+
+        Providers are tried in order and fail over only until the first piece
+        has been delivered; there is no hedging, since two streams cannot be
+        merged once a client has started receiving one of them.
+
+        Returns:
+            The complete answer
+
+        Raises:
+            LLMUnavailableError: If no provider succeeded before the deadline
+        """
+        if not self.providers:
+            raise LLMUnavailableError("No LLM provider configured")
+
+        max_tokens = max_tokens or config.LLM_MAX_TOKENS
+        temperature = config.LLM_TEMPERATURE if temperature is None else temperature
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (timeout or config.LLM_TIMEOUT_S)
+        errors: List[str] = []
+
+        for index, provider in enumerate(self.providers):
+            if index:
+                LLM_HEDGES.inc(reason="failover", provider=provider.name)
+                logger.info(f"🔀 LLM failover: streaming from {provider.name}")
+            parts: List[str] = []
+
+            async def consume():
+                async for delta in provider.generate_stream(prompt, max_tokens, temperature):
+                    if delta:
+                        parts.append(delta)
+                        await on_delta(delta)
+
+            async with provider.semaphore:
+                start = time.perf_counter()
+                try:
+                    await asyncio.wait_for(consume(), max(0.0, deadline - loop.time()))
+                except asyncio.CancelledError:
+                    LLM_CALLS.inc(provider=provider.name, outcome="cancelled")
+                    raise
+                except Exception as e:
+                    LLM_CALLS.inc(provider=provider.name, outcome="error")
+                    record_upstream_error(provider.name)
+                    errors.append(f"{provider.name}: {str(e) or type(e).__name__}")
+                    logger.warning(f"⚠️ LLM provider {provider.name} stream failed: {e!r}")
+                    if parts or loop.time() >= deadline:
+                        break
+                    continue
+            provider.record_latency(time.perf_counter() - start)
+            LLM_CALLS.inc(provider=provider.name, outcome="success")
+            return "".join(parts).strip()
+
+        raise LLMUnavailableError("; ".join(errors))
+
+
+def build_providers() -> List[LLMProvider]:
+    """
+    Instantiate configured providers in priority order (config.LLM_PROVIDERS)
+
+    Providers without an API key are skipped, so the list may be empty.
+    """
+    providers = []
+    for name in config.LLM_PROVIDERS:
+        name = name.strip().lower()
+        try:
+            if name == "gemini" and config.GEMINI_API_KEY:
+                providers.append(GeminiProvider(config.GEMINI_API_KEY, config.GEMINI_MODEL))
+            elif name == "openai" and config.OPENAI_API_KEY:
+                providers.append(OpenAIProvider(config.OPENAI_API_KEY, config.OPENAI_MODEL, config.OPENAI_BASE_URL))
+            elif name == "mock":
+                providers.append(MockProvider())
+            else:
+                logger.warning(f"⚠️  LLM provider '{name}' skipped (unknown or missing API key)")
+                continue
+            logger.info(f"✅ LLM provider ready: {name}")
+        except Exception as e:
+            logger.error(f"❌ Could not initialize LLM provider {name}: {str(e)}")
+    return providers
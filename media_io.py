@@ -0,0 +1,237 @@
+"""
+Media I/O Module
+Non-blocking file writes for generated media and uploads, plus a static
+file handler with ETag, Range and Cache-Control support
+"""
+
+import asyncio
+import logging
+import os
+import re
+import tempfile
+import uuid
+from pathlib import Path
+from typing import AsyncIterator, Callable, Optional, Tuple
+
+from starlette.datastructures import Headers
+from starlette.responses import FileResponse, Response, StreamingResponse
+from starlette.staticfiles import NotModifiedResponse, StaticFiles
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class UploadTooLargeError(Exception):
+    """Raised when an upload exceeds config.MAX_UPLOAD_BYTES"""
+
+
+async def _discard(file_obj, path: str):
+    """Close and delete a partially written file"""
+    try:
+        await asyncio.to_thread(file_obj.close)
+    finally:
+        try:
+            await asyncio.to_thread(os.unlink, path)
+        except FileNotFoundError:
+            pass
+
+
+async def stream_to_file(chunks: AsyncIterator[bytes], dest: Path) -> int:
+    """
+    Write an async byte stream to disk without blocking the event loop
+
+    Chunks are written from a worker thread into a hidden temp file in the
+    destination directory, which is atomically renamed into place once
+    complete, so readers never observe a partial file.
+
+    Args:
+        chunks: Async iterator of byte chunks (e.g. response.content.iter_chunked(n))
+        dest: Final file path
+
+    Returns:
+        Number of bytes written
+    """
+    dest = Path(dest)
+    tmp_path = str(dest.with_name(f".{dest.name}.{uuid.uuid4().hex}.part"))
+    file_obj = await asyncio.to_thread(open, tmp_path, "wb")
+    size = 0
+    try:
+        async for chunk in chunks:
+            if chunk:
+                await asyncio.to_thread(file_obj.write, chunk)
+                size += len(chunk)
+        await asyncio.to_thread(file_obj.close)
+        await asyncio.to_thread(os.replace, tmp_path, dest)
+    except BaseException:
+        await _discard(file_obj, tmp_path)
+        raise
+    return size
+
+
+async def spool_upload(upload, suffix: str = "", max_bytes: int = None, chunk_size: int = None) -> str:
+    """
+    Spool an UploadFile to a temp file in bounded chunks
+
+    Args:
+        upload: Starlette/FastAPI UploadFile
+        suffix: Temp file suffix (keeps the extension for ffmpeg sniffing)
+        max_bytes: Upload size limit (defaults to config.MAX_UPLOAD_BYTES)
+        chunk_size: Read size (defaults to config.MEDIA_CHUNK_SIZE)
+
+    Returns:
+        Path to the temp file; the caller is responsible for deleting it
+
+    Raises:
+        UploadTooLargeError: If the upload exceeds max_bytes
+    """
+    max_bytes = max_bytes or config.MAX_UPLOAD_BYTES
+    chunk_size = chunk_size or config.MEDIA_CHUNK_SIZE
+
+    fd, path = tempfile.mkstemp(suffix=suffix)
+    file_obj = os.fdopen(fd, "wb")
+    size = 0
+    try:
+        while True:
+            chunk = await upload.read(chunk_size)
+            if not chunk:
+                break
+            size += len(chunk)
+            if size > max_bytes:
+                raise UploadTooLargeError(f"Upload exceeds {max_bytes} bytes")
+            await asyncio.to_thread(file_obj.write, chunk)
+        await asyncio.to_thread(file_obj.close)
+    except BaseException:
+        await _discard(file_obj, path)
+        raise
+    return path
+
+
+async def iter_file(path: Path, chunk_size: int = None) -> AsyncIterator[bytes]:
+    """Read a whole file from a worker thread in chunks"""
+    size = await asyncio.to_thread(os.path.getsize, path)
+    if size == 0:
+        return
+    async for chunk in _file_slice(str(path), 0, size - 1, chunk_size or config.MEDIA_CHUNK_SIZE):
+        yield chunk
+
+
+_RANGE_RE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def parse_range(header: str, size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single-range "bytes=" header into an inclusive (start, end)
+
+    Returns:
+        (start, end) tuple, or None if the range is malformed/unsatisfiable
+    """
+    match = _RANGE_RE.match(header.strip())
+    if not match or size == 0:
+        return None
+    start_s, end_s = match.groups()
+    if not start_s and not end_s:
+        return None
+    if not start_s:
+        # Suffix range: last N bytes
+        length = int(end_s)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(start_s)
+    end = int(end_s) if end_s else size - 1
+    if start >= size or end < start:
+        return None
+    return start, min(end, size - 1)
+
+
+async def _file_slice(path: str, start: int, end: int, chunk_size: int) -> AsyncIterator[bytes]:
+    """Read an inclusive byte range from a worker thread in chunks"""
+    file_obj = await asyncio.to_thread(open, path, "rb")
+    try:
+        await asyncio.to_thread(file_obj.seek, start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await asyncio.to_thread(file_obj.read, min(chunk_size, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+    finally:
+        await asyncio.to_thread(file_obj.close)
+
+
+class MediaStaticFiles(StaticFiles):
+    """
+    StaticFiles with cache headers and byte-range support
+
+    Generated media filenames are content hashes, so files can be cached
+    aggressively; ETag/Last-Modified revalidation (304) comes from Starlette
+    and single byte ranges (206) are served for audio seeking.
+    """
+
+    def __init__(self, *args, cache_control: str = None, on_access: Callable[[str], None] = None,
+                 resolve: Callable[[str], Optional[str]] = None, **kwargs):
+        """
+        Args:
+            cache_control: Cache-Control header value for served files
+            on_access: Optional callback receiving the path relative to the
+                static directory for every served file (e.g. MediaStore.touch_path)
+            resolve: Optional callback mapping a missing relative path to the
+                file now serving it (e.g. MediaStore.resolve_path after transcoding)
+        """
+        super().__init__(*args, **kwargs)
+        self.cache_control = cache_control or f"public, max-age={config.STATIC_CACHE_MAX_AGE}"
+        self.on_access = on_access
+        self.resolve = resolve
+
+    def lookup_path(self, path: str) -> Tuple[str, Optional[os.stat_result]]:
+        full_path, stat_result = super().lookup_path(path)
+        if stat_result is None and self.resolve is not None:
+            current = self.resolve(path)
+            if current is not None and current != path:
+                return super().lookup_path(current)
+        return full_path, stat_result
+
+    def file_response(self, full_path, stat_result, scope, status_code: int = 200) -> Response:
+        request_headers = Headers(scope=scope)
+        if self.on_access is not None and status_code == 200:
+            try:
+                self.on_access(os.path.relpath(full_path, self.directory))
+            except Exception as e:
+                logger.warning(f"Static access hook failed: {e}")
+        response = FileResponse(full_path, status_code=status_code, stat_result=stat_result)
+        response.headers["Cache-Control"] = self.cache_control
+        response.headers["Accept-Ranges"] = "bytes"
+
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+
+        range_header = request_headers.get("range")
+        if not range_header or status_code != 200:
+            return response
+
+        # If-Range: only honour the range when the validator still matches
+        if_range = request_headers.get("if-range")
+        if if_range and if_range not in (response.headers.get("etag"), response.headers.get("last-modified")):
+            return response
+
+        size = stat_result.st_size
+        byte_range = parse_range(range_header, size)
+        if byte_range is None:
+            return Response(status_code=416, headers={"Content-Range": f"bytes */{size}"})
+
+        start, end = byte_range
+        headers = {
+            key: response.headers[key]
+            for key in ("etag", "last-modified", "cache-control", "accept-ranges")
+            if key in response.headers
+        }
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            _file_slice(str(full_path), start, end, config.MEDIA_CHUNK_SIZE),
+            status_code=206,
+            media_type=response.media_type,
+            headers=headers
+        )
@@ -0,0 +1,173 @@
+"""
+Media Jobs Module
+Background image/narration generation decoupled from the chat request:
+jobs go into a bounded queue served by a fixed number of workers, are
+deduplicated by content key (the same image or narration is rendered once
+however many requests ask for it) and keep running after the client that
+asked for them disconnects. Clients poll /api/media/{job_id}.
+"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import config
+from media_store import get_media_store
+from metrics import Counter, Gauge, STAGE_LATENCY, registry
+
+logger = logging.getLogger(__name__)
+
+MEDIA_JOBS = registry.register(Counter(
+    "storyteller_media_jobs_total",
+    "Media jobs by kind and outcome (queued, deduplicated, rejected, done, failed)"
+))
+MEDIA_JOB_QUEUE = registry.register(Gauge(
+    "storyteller_media_job_queue_depth",
+    "Media jobs waiting for a worker"
+))
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+@dataclass
+class MediaJob:
+    id: str
+    kind: str  # "image" or "audio"
+    key: str
+    status: str = QUEUED
+    url: Optional[str] = None
+    error: Optional[str] = None
+    created_at: float = field(default_factory=time.time)
+    finished_at: Optional[float] = None
+
+    def to_dict(self) -> Dict:
+        return {
+            "job_id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "url": self.url,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at
+        }
+
+
+def content_key(kind: str, *parts) -> str:
+    """Jobs rendering the same content share this key"""
+    return f"{kind}:{hashlib.sha1(json.dumps(parts, ensure_ascii=False).encode()).hexdigest()}"
+
+
+class MediaJobQueue:
+    """Bounded queue of media jobs with a fixed worker pool"""
+
+    def __init__(self, workers: int = None, max_queued: int = None,
+                 on_timing: Callable[[Dict[str, float]], None] = None):
+        self.workers = workers or config.MEDIA_JOB_WORKERS
+        self.max_queued = max_queued or config.MEDIA_JOB_QUEUE_SIZE
+        self.on_timing = on_timing  # Called with {kind: ms} per finished job (e.g. admission control)
+        self.jobs: Dict[str, MediaJob] = {}
+        self._by_key: Dict[str, MediaJob] = {}
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker_tasks: List[asyncio.Task] = []
+
+    def start(self) -> List[asyncio.Task]:
+        """Start the workers (inside the running event loop); returns their tasks"""
+        if not self._worker_tasks:
+            self._queue = asyncio.Queue(maxsize=self.max_queued)
+            self._worker_tasks = [asyncio.create_task(self._worker()) for _ in range(self.workers)]
+        return self._worker_tasks
+
+    def submit(self, kind: str, key: str, render: Callable[[], Awaitable[Optional[str]]]) -> Optional[MediaJob]:
+        """
+        Queue a render, or return the live job already rendering the same content
+
+        A finished job is reused only while its file is still in the media
+        store; once evicted, the content is rendered again.
+
+        Args:
+            kind: "image" or "audio"
+            key: content_key() of what is rendered
+            render: Coroutine factory returning the media URL (None on failure)
+
+        Returns:
+            The job, or None if the queue is full
+        """
+        self.start()
+        self._prune()
+
+        existing = self._by_key.get(key)
+        if existing is not None and existing.status == DONE and not get_media_store().url_exists(existing.url):
+            existing = None
+        if existing is not None and existing.status != FAILED:
+            MEDIA_JOBS.inc(kind=kind, outcome="deduplicated")
+            return existing
+
+        job = MediaJob(id=uuid.uuid4().hex, kind=kind, key=key)
+        try:
+            self._queue.put_nowait((job, render))
+        except asyncio.QueueFull:
+            MEDIA_JOBS.inc(kind=kind, outcome="rejected")
+            logger.warning(f"⚠️ Media job queue full ({self.max_queued}), skipping {kind}")
+            return None
+        self.jobs[job.id] = job
+        self._by_key[key] = job
+        MEDIA_JOBS.inc(kind=kind, outcome="queued")
+        MEDIA_JOB_QUEUE.set(self._queue.qsize())
+        return job
+
+    def get(self, job_id: str) -> Optional[MediaJob]:
+        return self.jobs.get(job_id)
+
+    def _prune(self):
+        """Forget finished jobs after config.MEDIA_JOB_TTL_S (their files stay in the media store)"""
+        cutoff = time.time() - config.MEDIA_JOB_TTL_S
+        for job_id, job in list(self.jobs.items()):
+            if job.finished_at is not None and job.finished_at < cutoff:
+                del self.jobs[job_id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+
+    async def _worker(self):
+        while True:
+            job, render = await self._queue.get()
+            MEDIA_JOB_QUEUE.set(self._queue.qsize())
+            job.status = RUNNING
+            start = time.perf_counter()
+            try:
+                job.url = await render()
+                job.status = DONE if job.url else FAILED
+                if not job.url:
+                    job.error = f"No {job.kind} produced"
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                job.status, job.error = FAILED, str(e)[:200]
+                logger.error(f"❌ Media job {job.id} ({job.kind}) failed: {e}")
+            finally:
+                job.finished_at = time.time()
+                self._queue.task_done()
+
+            elapsed = time.perf_counter() - start
+            STAGE_LATENCY.observe(elapsed, stage=job.kind)
+            MEDIA_JOBS.inc(kind=job.kind, outcome=job.status)
+            if self.on_timing:
+                self.on_timing({job.kind: round(elapsed * 1000, 1)})
+
+    def status(self) -> Dict:
+        counts: Dict[str, int] = {}
+        for job in self.jobs.values():
+            counts[job.status] = counts.get(job.status, 0) + 1
+        return {
+            "workers": len(self._worker_tasks),
+            "queued": self._queue.qsize() if self._queue else 0,
+            "max_queued": self.max_queued,
+            "jobs": counts
+        }
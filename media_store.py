@@ -0,0 +1,425 @@
+"""
+Media Store Module
+Tracks generated images and audio in a small persistent index (size, last
+access, hit count), enforces a disk quota with LRU eviction in a background
+task and optionally transcodes assets to smaller formats
+"""
+
+import asyncio
+import json
+import logging
+import os
+import shutil
+import subprocess
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+import config
+
+logger = logging.getLogger(__name__)
+
+
+class MediaStore:
+    """Index and lifecycle manager for files under /static/images and /static/audio"""
+
+    def __init__(self, dirs: Dict[str, Path] = None, index_path: Path = None, quota_bytes: int = None):
+        """
+        Initialize the media store
+
+        Args:
+            dirs: Media kind -> directory (defaults to images/audio static dirs)
+            index_path: JSON index location (defaults to config.MEDIA_INDEX_PATH)
+            quota_bytes: Total disk quota across kinds (defaults to config.MEDIA_QUOTA_MB)
+        """
+        self.dirs = dirs or {"images": config.IMAGES_DIR, "audio": config.AUDIO_DIR}
+        self.index_path = Path(index_path or config.MEDIA_INDEX_PATH)
+        self.quota_bytes = quota_bytes if quota_bytes is not None else config.MEDIA_QUOTA_MB * 1024 * 1024
+        # "kind/stem" -> {"file", "size", "created", "last_access", "hits", "transcoded", "pinned"}
+        self.index: Dict[str, Dict] = {}
+        self._holds: Dict[str, int] = {}  # "kind/stem" -> in-use count (not persisted), e.g. live narrations
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._dirty = False
+        self._load_index()
+
+    # Paths and keys --------------------------------------------------------
+
+    @staticmethod
+    def _key(kind: str, stem: str) -> str:
+        return f"{kind}/{stem}"
+
+    def path_for(self, kind: str, stem: str, ext: str) -> Path:
+        """Disk path for a new asset (stem is the content hash used as filename)"""
+        return self.dirs[kind] / f"{stem}{ext}"
+
+    @staticmethod
+    def url_for(kind: str, filename: str) -> str:
+        return f"/static/{kind}/{filename}"
+
+    # Index persistence -----------------------------------------------------
+
+    def _load_index(self):
+        if not self.index_path.exists():
+            return
+        try:
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                self.index = json.load(f)
+            logger.info(f"✅ Loaded media index with {len(self.index)} entries")
+        except Exception as e:
+            logger.warning(f"Media index load failed: {e}, will rebuild from disk")
+            self.index = {}
+
+    def save_index(self):
+        """Atomically persist the index if it changed"""
+        with self._lock:
+            if not self._dirty:
+                return
+            snapshot = json.dumps(self.index)
+            self._dirty = False
+        tmp_path = self.index_path.with_suffix(".tmp")
+        try:
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                f.write(snapshot)
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            logger.warning(f"Media index save failed: {e}")
+
+    def scan(self) -> int:
+        """Index files already on disk (e.g. from before the index existed) and drop vanished ones"""
+        seen = set()
+        for kind, directory in self.dirs.items():
+            for path in directory.iterdir():
+                if not path.is_file() or path.name.startswith("."):
+                    continue
+                key = self._key(kind, path.stem)
+                seen.add(key)
+                with self._lock:
+                    if key not in self.index:
+                        stat = path.stat()
+                        self.index[key] = {
+                            "file": path.name,
+                            "size": stat.st_size,
+                            "created": stat.st_mtime,
+                            "last_access": max(stat.st_atime, stat.st_mtime),
+                            "hits": 0,
+                            "transcoded": False
+                        }
+                        self._dirty = True
+        with self._lock:
+            for key in [k for k in self.index if k not in seen]:
+                del self.index[key]
+                self._dirty = True
+            count = len(self.index)
+        logger.info(f"📦 Media store indexed {count} files ({self.usage_bytes() / 1e6:.1f} MB)")
+        return count
+
+    # Hot path --------------------------------------------------------------
+
+    def lookup(self, kind: str, stem: str) -> Optional[str]:
+        """
+        Return the URL of a stored asset and record a hit, or None on miss
+
+        Args:
+            kind: "images" or "audio"
+            stem: Content hash used as the filename stem
+        """
+        key = self._key(kind, stem)
+        with self._lock:
+            entry = self.index.get(key)
+        if entry is not None:
+            if (self.dirs[kind] / entry["file"]).exists():
+                self._touch(key)
+                return self.url_for(kind, entry["file"])
+            with self._lock:
+                self.index.pop(key, None)
+                self._dirty = True
+        return None
+
+    def register(self, kind: str, path: Path, transcode: bool = True) -> str:
+        """
+        Add a freshly written asset to the index and return its URL
+
+        Args:
+            transcode: False keeps the file in its format (e.g. MP3 segments that are joined byte-wise)
+        """
+        path = Path(path)
+        now = time.time()
+        with self._lock:
+            self.index[self._key(kind, path.stem)] = {
+                "file": path.name,
+                "size": path.stat().st_size,
+                "created": now,
+                "last_access": now,
+                "hits": 0,
+                "transcoded": not transcode
+            }
+            self._dirty = True
+        return self.url_for(kind, path.name)
+
+    def _touch(self, key: str):
+        with self._lock:
+            entry = self.index.get(key)
+            if entry is not None:
+                entry["last_access"] = time.time()
+                entry["hits"] += 1
+                self._dirty = True
+
+    def _parse_url(self, url: str) -> Optional[Tuple[str, str]]:
+        """Split "/static/<kind>/<file>" into (kind, file)"""
+        parts = url.split("/static/", 1)[-1].split("/")
+        if len(parts) == 2 and parts[0] in self.dirs:
+            return parts[0], parts[1]
+        return None
+
+    def _current_file(self, kind: str, filename: str) -> Optional[str]:
+        """The file now behind a name handed out earlier (same stem; may have been transcoded since)"""
+        if (self.dirs[kind] / filename).exists():
+            return filename
+        with self._lock:
+            entry = self.index.get(self._key(kind, Path(filename).stem))
+        if entry is not None and (self.dirs[kind] / entry["file"]).exists():
+            return entry["file"]
+        return None
+
+    def url_exists(self, url: str) -> bool:
+        """Check that a previously returned media URL still resolves to a file"""
+        parsed = self._parse_url(url)
+        return parsed is not None and self._current_file(*parsed) is not None
+
+    def resolve_path(self, relative_path: str) -> Optional[str]:
+        """
+        Map a static path whose file was transcoded ("images/<hash>.png") to the
+        current file ("images/<hash>.webp"), for MediaStaticFiles
+        """
+        parts = Path(relative_path).parts
+        if len(parts) != 2 or parts[0] not in self.dirs:
+            return None
+        current = self._current_file(parts[0], parts[1])
+        return f"{parts[0]}/{current}" if current is not None else None
+
+    def path_for_url(self, url: str) -> Optional[Path]:
+        """Disk path behind a "/static/<kind>/<file>" URL, or None for other URLs"""
+        parsed = self._parse_url(url)
+        return self.dirs[parsed[0]] / parsed[1] if parsed is not None else None
+
+    def pin_url(self, url: str, pinned: bool = True):
+        """Exempt (or re-expose) an asset from quota eviction, e.g. precomputed answers"""
+        parsed = self._parse_url(url)
+        if parsed is None:
+            return
+        with self._lock:
+            entry = self.index.get(self._key(parsed[0], Path(parsed[1]).stem))
+            if entry is not None:
+                entry["pinned"] = pinned
+                self._dirty = True
+
+    def _url_key(self, url: str) -> Optional[str]:
+        parsed = self._parse_url(url)
+        return self._key(parsed[0], Path(parsed[1]).stem) if parsed is not None else None
+
+    def hold_url(self, url: str):
+        """Keep an asset from being evicted or transcoded while it is in use (counted; see release_url)"""
+        key = self._url_key(url)
+        if key is not None:
+            with self._lock:
+                self._holds[key] = self._holds.get(key, 0) + 1
+
+    def release_url(self, url: str):
+        key = self._url_key(url)
+        with self._lock:
+            count = self._holds.get(key, 0)
+            if count <= 1:
+                self._holds.pop(key, None)
+            else:
+                self._holds[key] = count - 1
+
+    def touch_path(self, relative_path: str):
+        """Record a static-file access, e.g. "images/<hash>.png" (called by MediaStaticFiles)"""
+        parts = Path(relative_path).parts
+        if len(parts) == 2 and parts[0] in self.dirs:
+            self._touch(self._key(parts[0], Path(parts[1]).stem))
+
+    # Quota and GC ----------------------------------------------------------
+
+    def usage_bytes(self) -> int:
+        with self._lock:
+            return sum(entry["size"] for entry in self.index.values())
+
+    def evict_to_quota(self) -> int:
+        """
+        Delete least-recently-used assets until usage is below the low watermark
+
+        Assets accessed within config.MEDIA_MIN_AGE_S are never evicted so a
+        URL that was just returned to a client stays valid.
+
+        Returns:
+            Number of bytes freed
+        """
+        if self.quota_bytes <= 0 or self.usage_bytes() <= self.quota_bytes:
+            return 0
+
+        target = int(self.quota_bytes * config.MEDIA_QUOTA_LOW_WATERMARK)
+        cutoff = time.time() - config.MEDIA_MIN_AGE_S
+        with self._lock:
+            candidates = sorted(
+                (
+                    (key, dict(entry)) for key, entry in self.index.items()
+                    if entry["last_access"] < cutoff and not entry.get("pinned") and key not in self._holds
+                ),
+                key=lambda item: item[1]["last_access"]
+            )
+
+        usage = self.usage_bytes()
+        freed = 0
+        for key, entry in candidates:
+            if usage - freed <= target:
+                break
+            kind = key.split("/", 1)[0]
+            try:
+                (self.dirs[kind] / entry["file"]).unlink()
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                logger.warning(f"Could not evict {key}: {e}")
+                continue
+            with self._lock:
+                self.index.pop(key, None)
+                self._dirty = True
+            freed += entry["size"]
+            self.evictions += 1
+
+        logger.info(f"🧹 Media GC evicted {freed / 1e6:.1f} MB (usage {(usage - freed) / 1e6:.1f} MB)")
+        return freed
+
+    def transcode_pending(self) -> int:
+        """
+        Convert untranscoded assets to smaller formats where enabled and supported
+
+        Pinned (precomputed answers) and held (live narration) assets keep
+        their files, and assets accessed within config.MEDIA_MIN_AGE_S wait
+        for a later pass, so a URL that was just returned keeps its exact
+        file. Older URLs still naming the original file are served the
+        transcoded one by MediaStaticFiles (see resolve_path).
+        """
+        converted = 0
+        cutoff = time.time() - config.MEDIA_MIN_AGE_S
+        with self._lock:
+            pending = [
+                (key, dict(entry)) for key, entry in self.index.items()
+                if not entry.get("transcoded") and not entry.get("pinned") and key not in self._holds
+                and entry["last_access"] < cutoff
+            ]
+        for key, entry in pending:
+            kind = key.split("/", 1)[0]
+            source = self.dirs[kind] / entry["file"]
+            if kind == "images" and config.MEDIA_TRANSCODE_IMAGES:
+                target = _transcode_image(source)
+            elif kind == "audio" and config.MEDIA_TRANSCODE_AUDIO:
+                target = _transcode_audio(source)
+            else:
+                continue
+            with self._lock:
+                current = self.index.get(key)
+                if current is None or current.get("pinned") or key in self._holds:
+                    # Evicted, pinned or taken into use while transcoding: keep the original
+                    if target is not None and target != source:
+                        target.unlink(missing_ok=True)
+                    continue
+                current["transcoded"] = True
+                if target is not None:
+                    current["file"] = target.name
+                    current["size"] = target.stat().st_size
+                    converted += 1
+                self._dirty = True
+            if target is not None and target != source:
+                source.unlink(missing_ok=True)
+        return converted
+
+    def gc_once(self) -> Dict:
+        """One maintenance pass: transcode, evict, persist"""
+        converted = self.transcode_pending()
+        freed = self.evict_to_quota()
+        self.save_index()
+        return {"transcoded": converted, "freed_bytes": freed}
+
+    async def run_gc_loop(self, interval: float = None):
+        """Background task: periodic GC passes off the event loop"""
+        interval = interval or config.MEDIA_GC_INTERVAL_S
+        while True:
+            try:
+                await asyncio.to_thread(self.gc_once)
+            except Exception as e:
+                logger.error(f"❌ Media GC pass failed: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def stats(self) -> Dict:
+        with self._lock:
+            files = len(self.index)
+            hits = sum(entry["hits"] for entry in self.index.values())
+        return {
+            "files": files,
+            "usage_bytes": self.usage_bytes(),
+            "quota_bytes": self.quota_bytes,
+            "hits": hits,
+            "evictions": self.evictions
+        }
+
+
+def _transcode_image(source: Path) -> Optional[Path]:
+    """PNG -> WebP via Pillow (optional dependency); returns None if unavailable"""
+    if source.suffix.lower() == ".webp":
+        return source
+    try:
+        from PIL import Image
+    except ImportError:
+        return None
+    target = source.with_suffix(".webp")
+    tmp_path = target.with_name(f".{target.name}.part")
+    try:
+        with Image.open(source) as image:
+            image.save(tmp_path, format="WEBP", quality=config.MEDIA_WEBP_QUALITY, method=4)
+        os.replace(tmp_path, target)
+        return target
+    except Exception as e:
+        logger.warning(f"WebP transcode failed for {source.name}: {e}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+
+def _transcode_audio(source: Path) -> Optional[Path]:
+    """MP3 -> Opus (Ogg) via ffmpeg; returns None if ffmpeg is unavailable"""
+    if source.suffix.lower() == ".ogg":
+        return source
+    ffmpeg = shutil.which("ffmpeg")
+    if not ffmpeg:
+        return None
+    target = source.with_suffix(".ogg")
+    tmp_path = target.with_name(f".{target.name}.part")
+    try:
+        subprocess.run(
+            [ffmpeg, "-y", "-loglevel", "error", "-i", str(source), "-c:a", "libopus",
+             "-b:a", config.MEDIA_OPUS_BITRATE, "-f", "ogg", str(tmp_path)],
+            check=True, timeout=120
+        )
+        os.replace(tmp_path, target)
+        return target
+    except Exception as e:
+        logger.warning(f"Opus transcode failed for {source.name}: {e}")
+        tmp_path.unlink(missing_ok=True)
+        return None
+
+
+# Global instance
+_store_instance = None
+_store_lock = threading.Lock()
+
+
+def get_media_store() -> MediaStore:
+    """Get or create global media store instance"""
+    global _store_instance
+    with _store_lock:
+        if _store_instance is None:
+            _store_instance = MediaStore()
+    return _store_instance
@@ -0,0 +1,245 @@
+"""
+Metrics Module
+Dependency-free Prometheus-style counters, gauges and latency histograms,
+rendered in the Prometheus text exposition format at /metrics
+"""
+
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Dict, List, Tuple, Optional
+
+# Latency buckets in seconds (covers fast retrieval through slow media upstreams)
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 20.0, 30.0, 60.0)
+
+
+def _label_key(labels: Dict[str, str]) -> Tuple[Tuple[str, str], ...]:
+    """Stable hashable key for a label set"""
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+def _escape(value) -> str:
+    """Escape a label value for the text exposition format"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(key: Tuple[Tuple[str, str], ...], extra: Dict[str, str] = None) -> str:
+    """Render a label set as {a="b",...}"""
+    pairs = list(key) + sorted((extra or {}).items())
+    if not pairs:
+        return ""
+    body = ",".join(f'{k}="{_escape(v)}"' for k, v in pairs)
+    return "{" + body + "}"
+
+
+class _Metric:
+    """Base class holding name, help text and a lock"""
+
+    metric_type = "untyped"
+
+    def __init__(self, name: str, documentation: str):
+        self.name = name
+        self.documentation = documentation
+        self._lock = threading.Lock()
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.metric_type}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    """Monotonically increasing counter with optional labels"""
+
+    metric_type = "counter"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[Tuple, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in items]
+
+
+class Gauge(_Metric):
+    """Value that can go up and down (in-flight requests, queue depths)"""
+
+    metric_type = "gauge"
+
+    def __init__(self, name: str, documentation: str):
+        super().__init__(name, documentation)
+        self._values: Dict[Tuple, float] = {}
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[_label_key(labels)] = value
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = _label_key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def value(self, **labels) -> float:
+        with self._lock:
+            return self._values.get(_label_key(labels), 0.0)
+
+    @contextmanager
+    def track(self, **labels):
+        """Increment for the duration of a block"""
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+    def _samples(self) -> List[str]:
+        with self._lock:
+            items = list(self._values.items())
+        return [f"{self.name}{_format_labels(key)} {value}" for key, value in items]
+
+
+class Histogram(_Metric):
+    """Cumulative-bucket latency histogram with optional labels"""
+
+    metric_type = "histogram"
+
+    def __init__(self, name: str, documentation: str, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        super().__init__(name, documentation)
+        self.buckets = tuple(sorted(buckets))
+        # key -> [bucket counts..., +Inf count], sum
+        self._counts: Dict[Tuple, List[int]] = {}
+        self._sums: Dict[Tuple, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = _label_key(labels)
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            counts = self._counts.get(key)
+            if counts is None:
+                counts = self._counts[key] = [0] * (len(self.buckets) + 1)
+                self._sums[key] = 0.0
+            counts[index] += 1
+            self._sums[key] += value
+
+    def count(self, **labels) -> int:
+        with self._lock:
+            return sum(self._counts.get(_label_key(labels), []))
+
+    def _samples(self) -> List[str]:
+        lines = []
+        with self._lock:
+            items = [(key, list(counts), self._sums[key]) for key, counts in self._counts.items()]
+        for key, counts, total in items:
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                lines.append(f"{self.name}_bucket{_format_labels(key, {'le': repr(bound)})} {cumulative}")
+            cumulative += counts[-1]
+            lines.append(f"{self.name}_bucket{_format_labels(key, {'le': '+Inf'})} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(key)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(key)} {cumulative}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together"""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+        self._lock = threading.Lock()
+
+    def register(self, metric: _Metric) -> _Metric:
+        with self._lock:
+            existing = self._metrics.get(metric.name)
+            if existing is not None:
+                return existing
+            self._metrics[metric.name] = metric
+        return metric
+
+    def render(self) -> str:
+        with self._lock:
+            metrics = list(self._metrics.values())
+        lines = []
+        for metric in metrics:
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+registry = Registry()
+
+STAGE_LATENCY = registry.register(Histogram(
+    "storyteller_stage_duration_seconds",
+    "Latency of each pipeline stage (retrieval, llm, image, audio, transcription, total)"
+))
+HTTP_LATENCY = registry.register(Histogram(
+    "storyteller_http_request_duration_seconds",
+    "HTTP request latency by route and status"
+))
+HTTP_IN_FLIGHT = registry.register(Gauge(
+    "storyteller_http_requests_in_flight",
+    "HTTP requests currently being served, by route"
+))
+CACHE_REQUESTS = registry.register(Counter(
+    "storyteller_cache_requests_total",
+    "Cache lookups by cache name and result (hit/miss)"
+))
+UPSTREAM_ERRORS = registry.register(Counter(
+    "storyteller_upstream_errors_total",
+    "Errors returned by or raised while calling upstream providers"
+))
+TRANSCRIPTION_QUEUE = registry.register(Gauge(
+    "storyteller_transcription_queue_depth",
+    "Transcriptions by state (waiting for a worker slot / running)"
+))
+
+
+def record_cache(cache: str, hit: bool):
+    """Count a cache lookup"""
+    CACHE_REQUESTS.inc(cache=cache, result="hit" if hit else "miss")
+
+
+def record_upstream_error(provider: str):
+    """Count an upstream provider failure"""
+    UPSTREAM_ERRORS.inc(provider=provider)
+
+
+@contextmanager
+def stage_timer(stage: str, timings: Optional[Dict[str, float]] = None):
+    """
+    Time a pipeline stage into the latency histogram
+
+    Args:
+        stage: Stage name (e.g. "retrieval", "llm", "image", "audio")
+        timings: Optional per-request dict that receives the duration in milliseconds
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        duration = time.perf_counter() - start
+        STAGE_LATENCY.observe(duration, stage=stage)
+        if timings is not None:
+            timings[stage] = round(duration * 1000, 1)
+
+
+def server_timing_header(timings: Dict[str, float]) -> str:
+    """Format per-stage timings (ms) as a Server-Timing header value"""
+    return ", ".join(f"{stage};dur={duration}" for stage, duration in timings.items())
@@ -0,0 +1,298 @@
+"""
+Narration Module
+Sentence-level text-to-speech: answers are split into sentences that are
+synthesized concurrently (bounded), cached per sentence in the media store
+and either joined into one MP3 or streamed to the client in order as each
+sentence becomes ready
+"""
+
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+
+import aiohttp
+
+import config
+from coalescing import SingleFlight
+from media_io import iter_file, stream_to_file
+from metrics import STAGE_LATENCY, record_cache, record_upstream_error
+
+logger = logging.getLogger(__name__)
+
+_SENTENCE_END_RE = re.compile(r"(?<=[.!?।…])\s+|\n+")
+_TTS_CLEAN_RE = re.compile(r'[^\w\s.,!?\'\"-]')
+
+
+def clean_for_tts(text: str) -> str:
+    """Strip emojis and markup the voice would read out"""
+    return re.sub(r"\s+", " ", _TTS_CLEAN_RE.sub("", text)).strip()
+
+
+def _split_long(sentence: str, limit: int) -> List[str]:
+    """Break an over-long sentence at clause boundaries, falling back to word boundaries"""
+    if len(sentence) <= limit:
+        return [sentence]
+    pieces, current = [], ""
+    for clause in re.split(r"(?<=[,;:])\s+", sentence):
+        for part in ([clause] if len(clause) <= limit else clause.split()):
+            candidate = f"{current} {part}".strip()
+            if current and len(candidate) > limit:
+                pieces.append(current)
+                current = part
+            else:
+                current = candidate
+    if current:
+        pieces.append(current)
+    return pieces
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    Split text into TTS segments
+
+    Fragments shorter than config.NARRATION_MIN_SENTENCE_CHARS are merged
+    into the following sentence and anything longer than
+    config.NARRATION_MAX_SEGMENT_CHARS is broken up, so each segment is a
+    natural-sounding, similarly sized request.
+    """
+    segments, pending = [], ""
+    for sentence in _SENTENCE_END_RE.split(text.strip()):
+        sentence = sentence.strip()
+        if not sentence:
+            continue
+        pending = f"{pending} {sentence}".strip()
+        if len(pending) < config.NARRATION_MIN_SENTENCE_CHARS:
+            continue
+        segments.extend(_split_long(pending, config.NARRATION_MAX_SEGMENT_CHARS))
+        pending = ""
+    if pending:
+        if segments and len(segments[-1]) + len(pending) < config.NARRATION_MAX_SEGMENT_CHARS:
+            segments[-1] = f"{segments[-1]} {pending}"
+        else:
+            segments.append(pending)
+    return segments
+
+
+def _failed(task: asyncio.Task) -> bool:
+    return task.cancelled() or task.exception() is not None or task.result() is None
+
+
+class Narrator:
+    """Per-sentence ElevenLabs synthesis with caching, bounded parallelism and ordered streaming"""
+
+    def __init__(self, media_store):
+        self.media_store = media_store
+        self._semaphore = asyncio.Semaphore(config.TTS_MAX_CONCURRENCY)
+        self._flights = SingleFlight("tts")
+        # narration id -> {"segments": [...], "language": str, "tasks": [asyncio.Task], "held": [segment URLs]}
+        self._streams: "OrderedDict[str, Dict]" = OrderedDict()
+
+    @staticmethod
+    def _model_id(language: str) -> str:
+        return "eleven_multilingual_v2" if language != "en" else "eleven_monolingual_v1"
+
+    # Sentence synthesis ----------------------------------------------------
+
+    async def synthesize(self, sentence: str, language: str = "en") -> Optional[str]:
+        """
+        Audio URL for one sentence, synthesized at most once per (voice, model, text)
+
+        Returns:
+            URL of the cached segment, or None on failure/empty text
+        """
+        clean_text = clean_for_tts(sentence)
+        if not clean_text:
+            return None
+
+        model_id = self._model_id(language)
+        stem = hashlib.md5(f"{config.ELEVENLABS_VOICE_ID}|{model_id}|{clean_text}".encode()).hexdigest()
+        cached_url = self.media_store.lookup("audio", stem)
+        if cached_url and not cached_url.endswith(".mp3"):
+            # Transcoded segment (from before segments were exempt): joining/streaming needs MP3 frames
+            cached_url = None
+        record_cache("tts_segments", cached_url is not None)
+        if cached_url:
+            return cached_url
+
+        # Concurrent requests for the same sentence (e.g. fallback lines) share one upstream call
+        return await self._flights.do(stem, lambda: self._synthesize_uncached(clean_text, model_id, stem))
+
+    async def _synthesize_uncached(self, clean_text: str, model_id: str, stem: str) -> Optional[str]:
+        url = f"{config.ELEVENLABS_API_URL}/{config.ELEVENLABS_VOICE_ID}"
+        headers = {
+            "xi-api-key": config.ELEVENLABS_API_KEY,
+            "Content-Type": "application/json"
+        }
+        payload = {
+            "text": clean_text,
+            "model_id": model_id,
+            "voice_settings": {
+                "stability": config.AUDIO_STABILITY,
+                "similarity_boost": config.AUDIO_SIMILARITY_BOOST
+            }
+        }
+        filepath = self.media_store.path_for("audio", stem, ".mp3")
+
+        async with self._semaphore:
+            try:
+                async with aiohttp.ClientSession() as session:
+                    async with session.post(url, headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=30)) as response:
+                        if response.status != 200:
+                            record_upstream_error("elevenlabs")
+                            error_text = await response.text()
+                            logger.error(f"❌ ElevenLabs API error {response.status}: {error_text[:200]}")
+                            return None
+                        await stream_to_file(response.content.iter_chunked(config.MEDIA_CHUNK_SIZE), filepath)
+            except Exception as e:
+                record_upstream_error("elevenlabs")
+                logger.error(f"❌ Error synthesizing sentence: {str(e)}")
+                return None
+
+        # Segments are concatenated byte-wise as MP3, so they are never transcoded
+        return self.media_store.register("audio", filepath, transcode=False)
+
+    def _start(self, segments: List[str], language: str) -> List[asyncio.Task]:
+        """Schedule every segment at once; the semaphore bounds how many hit the API"""
+        return [asyncio.create_task(self.synthesize(segment, language)) for segment in segments]
+
+    def _hold_when_done(self, tasks: List[asyncio.Task], held: List[str]):
+        """Hold each segment in the media store (no eviction/transcoding) once synthesized"""
+        def hold(task: asyncio.Task):
+            if not _failed(task):
+                self.media_store.hold_url(task.result())
+                held.append(task.result())
+        for task in tasks:
+            task.add_done_callback(hold)
+
+    async def _segment_file(self, segment: str, language: str, url: Optional[str]) -> Optional[Path]:
+        """MP3 file behind a segment URL, re-synthesizing the segment if its file has gone"""
+        path = self.media_store.path_for_url(url) if url else None
+        if path is not None and path.suffix == ".mp3" and path.exists():
+            return path
+        logger.info("♻️ Narration segment missing on disk, re-synthesizing")
+        url = await self.synthesize(segment, language)
+        path = self.media_store.path_for_url(url) if url else None
+        return path if path is not None and path.exists() else None
+
+    # Whole-answer narration ------------------------------------------------
+
+    async def narrate(self, text: str, language: str = "en") -> Optional[str]:
+        """
+        Synthesize the full text (no truncation) and join segments into one MP3
+
+        Returns:
+            URL of the joined audio, or None if no segment could be synthesized
+        """
+        segments = split_sentences(text)
+        if not segments:
+            return None
+
+        ready = [
+            (segment, url)
+            for segment, url in zip(segments, await asyncio.gather(*self._start(segments, language))) if url
+        ]
+        if len(ready) < len(segments):
+            logger.warning(f"⚠️ {len(segments) - len(ready)}/{len(segments)} narration segments failed")
+        if len(ready) <= 1:
+            return ready[0][1] if ready else None
+
+        # MP3 frames concatenate cleanly, so the joined file is just the segments back to back
+        urls = [url for _, url in ready]
+        stem = hashlib.md5("|".join(urls).encode()).hexdigest()
+        cached_url = self.media_store.lookup("audio", stem)
+        if cached_url:
+            return cached_url
+        filepath = self.media_store.path_for("audio", stem, ".mp3")
+        for url in urls:
+            self.media_store.hold_url(url)
+        try:
+            size = await stream_to_file(self._read_segments(ready, language), filepath)
+        finally:
+            for url in urls:
+                self.media_store.release_url(url)
+        logger.info(f"✅ Narration joined from {len(urls)} segments ({size} bytes)")
+        return self.media_store.register("audio", filepath)
+
+    async def _read_segments(self, ready: List[Tuple[str, str]], language: str) -> AsyncIterator[bytes]:
+        for segment, url in ready:
+            path = await self._segment_file(segment, language, url)
+            if path is None:
+                logger.warning("⚠️ Narration segment unavailable, skipped in joined audio")
+                continue
+            async for chunk in iter_file(path):
+                yield chunk
+
+    # Streaming narration ---------------------------------------------------
+
+    def open_stream(self, text: str, language: str = "en") -> Optional[str]:
+        """
+        Register text for streaming and start synthesizing right away
+
+        Returns:
+            Relative URL of the chunked audio stream, or None for empty text
+        """
+        segments = split_sentences(text)
+        if not segments:
+            return None
+
+        narration_id = hashlib.md5(f"{language}|{text}".encode()).hexdigest()[:20]
+        if narration_id not in self._streams:
+            entry = self._streams[narration_id] = {
+                "segments": segments,
+                "language": language,
+                "tasks": self._start(segments, language),
+                "held": []
+            }
+            self._hold_when_done(entry["tasks"], entry["held"])
+            while len(self._streams) > config.NARRATION_STREAMS_MAX:
+                _, expired = self._streams.popitem(last=False)
+                for url in expired["held"]:
+                    self.media_store.release_url(url)
+        self._streams.move_to_end(narration_id)
+        return f"/api/narrate/{narration_id}"
+
+    def has_stream(self, narration_id: str) -> bool:
+        return narration_id in self._streams
+
+    async def stream(self, narration_id: str) -> AsyncIterator[bytes]:
+        """
+        Yield MP3 bytes segment by segment, in order, as each becomes ready
+
+        Synthesis tasks are shielded: a client that disconnects mid-stream
+        does not cancel work that fills the per-sentence cache. Segments are
+        held in the media store while the narration is addressable, and one
+        whose file is gone anyway is re-synthesized rather than failing the
+        response halfway.
+        """
+        entry = self._streams[narration_id]
+        tasks = entry["tasks"]
+        if any(task.done() and _failed(task) for task in tasks):
+            # A previous attempt failed for some segment; retry the whole set (hits the cache for the rest)
+            tasks = entry["tasks"] = self._start(entry["segments"], entry["language"])
+            self._hold_when_done(tasks, entry["held"])
+
+        start = time.perf_counter()
+        first = True
+        for segment, task in zip(entry["segments"], tasks):
+            try:
+                url = await asyncio.shield(task)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"⚠️ Narration segment failed: {e}")
+                continue
+            if url is None:
+                continue
+            path = await self._segment_file(segment, entry["language"], url)
+            if path is None:
+                continue
+            async for chunk in iter_file(path):
+                if first:
+                    STAGE_LATENCY.observe(time.perf_counter() - start, stage="audio_first_chunk")
+                    first = False
+                yield chunk
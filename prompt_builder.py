@@ -0,0 +1,120 @@
+"""
+Prompt Builder Module
+Assembles LLM prompts in a fixed order so the static part is a stable,
+cacheable prefix: persona (+ language instruction) -> retrieved context ->
+conversation summary -> recent history -> question
+"""
+
+import logging
+import threading
+from dataclasses import dataclass, field
+from typing import Dict, List
+
+import config
+from metrics import registry, Counter
+
+logger = logging.getLogger(__name__)
+
+PROMPT_TOKENS = registry.register(Counter(
+    "storyteller_prompt_tokens_total",
+    "Estimated prompt tokens by part (cacheable static prefix vs dynamic suffix)"
+))
+
+_encoder = None
+_encoder_lock = threading.Lock()
+_encoder_loaded = False
+
+
+def count_tokens(text: str) -> int:
+    """Token count via tiktoken when installed (it ships with Whisper), else a ~4 chars/token estimate"""
+    global _encoder, _encoder_loaded
+    if not _encoder_loaded:
+        with _encoder_lock:
+            if not _encoder_loaded:
+                try:
+                    import tiktoken
+                    _encoder = tiktoken.get_encoding("cl100k_base")
+                except Exception:
+                    _encoder = None
+                _encoder_loaded = True
+    if _encoder is not None:
+        return len(_encoder.encode(text, disallowed_special=()))
+    return (len(text) + 3) // 4
+
+
+@dataclass
+class BuiltPrompt:
+    """Prompt split into the stable system prefix and the per-turn parts"""
+    system: str
+    context: str
+    history: List[Dict] = field(default_factory=list)
+    question: str = ""
+    summary: str = ""  # Rolling summary of the turns before `history`
+
+    def summary_message(self) -> str:
+        return f"Conversation so far (summary): {self.summary}"
+
+    def context_message(self) -> str:
+        return config.STORYTELLER_CONTEXT_TEMPLATE.format(context=self.context)
+
+    def question_message(self) -> str:
+        return config.STORYTELLER_QUESTION_TEMPLATE.format(question=self.question)
+
+    def turn_text(self) -> str:
+        """Everything after the system prefix as one string: context, summary, history, question"""
+        parts = [self.context_message()]
+        if self.summary:
+            parts.append(self.summary_message())
+        if self.history:
+            lines = ["Previous conversation:"]
+            for msg in self.history:
+                role = "User" if msg["role"] == "user" else "Assistant"
+                lines.append(f"{role}: {msg['content']}")
+            parts.append("\n".join(lines))
+        parts.append(self.question_message())
+        return "\n\n".join(parts)
+
+    def as_text(self) -> str:
+        """Single-string rendering in cache-friendly order, for providers without system messages"""
+        return f"{self.system}\n\n{self.turn_text()}"
+
+    def token_counts(self) -> Dict[str, int]:
+        """Cacheable (system prefix) vs dynamic (context, history, question) token counts"""
+        cacheable = count_tokens(self.system)
+        dynamic = count_tokens(self.context_message()) + count_tokens(self.question_message())
+        dynamic += sum(count_tokens(msg["content"]) for msg in self.history)
+        if self.summary:
+            dynamic += count_tokens(self.summary_message())
+        return {"cacheable": cacheable, "dynamic": dynamic}
+
+
+def _language_instruction(language: str) -> str:
+    if language == "en":
+        return ""
+    lang_name = config.SUPPORTED_LANGUAGES.get(language, "English")
+    return f"\n\n**CRITICAL: You MUST respond ENTIRELY in {lang_name}. Do NOT use English. Translate everything to {lang_name}.**"
+
+
+def build_prompt(question: str, context: str, language: str = "en", history: List[Dict] = None,
+                 summary: str = "") -> BuiltPrompt:
+    """
+    Build a prompt whose system prefix is identical for every turn in a language
+
+    Args:
+        question: User's question
+        context: Retrieved context from books
+        language: Target language code (its instruction is part of the static prefix)
+        history: Previous conversation messages, already trimmed by the caller
+        summary: Rolling summary of the conversation before `history`
+    """
+    prompt = BuiltPrompt(
+        system=config.STORYTELLER_PERSONA + _language_instruction(language),
+        context=context,
+        history=[{"role": msg["role"], "content": msg["content"]} for msg in history or []],
+        question=question,
+        summary=summary
+    )
+    counts = prompt.token_counts()
+    PROMPT_TOKENS.inc(counts["cacheable"], part="cacheable")
+    PROMPT_TOKENS.inc(counts["dynamic"], part="dynamic")
+    return prompt
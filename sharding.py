@@ -0,0 +1,236 @@
+"""
+Sharding Module
+Scatter-gather retrieval across processes or machines: each shard serves
+top-k search over a subset of the books, and the chat server encodes the
+query once, fans it out to every shard in parallel, merges the results by
+score and returns whatever arrived within the per-shard timeout
+
+Run shards and point the chat server at them:
+    python sharding.py --port 9101 --books Alice_In_Wonderland.pdf Gullivers_Travels.pdf
+    python sharding.py --port 9102 --books The_Arabian_Nights.pdf
+    SHARD_URLS=http://127.0.0.1:9101,http://127.0.0.1:9102 python backend.py
+
+Shards started with --embedder hashing can be driven by
+ShardedRetriever(urls, embedding_model=HashingEmbedder()) to try the whole
+setup locally without downloading the embedding model.
+"""
+
+import argparse
+import asyncio
+import heapq
+import logging
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import aiohttp
+import numpy as np
+from fastapi import FastAPI, HTTPException
+from pydantic import BaseModel
+
+import config
+from metrics import Counter, STAGE_LATENCY, registry
+from startup_profiler import profiler
+
+logger = logging.getLogger(__name__)
+
+SHARD_REQUESTS = registry.register(Counter(
+    "storyteller_shard_requests_total",
+    "Shard search calls by shard and outcome (ok, timeout, error)"
+))
+
+
+def embedder_label(processor_or_model) -> str:
+    """Name shards and coordinator compare, so vectors from different models are never mixed"""
+    model_name = getattr(processor_or_model, "model_name", None)
+    if model_name:
+        return model_name
+    model = getattr(processor_or_model, "embedding_model", processor_or_model)
+    return type(model).__name__
+
+
+# Shard server -------------------------------------------------------------
+
+class ShardSearchRequest(BaseModel):
+    embedding: List[float]
+    top_k: int = 5
+
+
+def create_shard_app(processor) -> FastAPI:
+    """HTTP front for one shard's DocumentProcessor"""
+    app = FastAPI(title="Storytell retrieval shard")
+
+    @app.get("/health")
+    async def health():
+        generation = processor.generation
+        return {
+            "ready": processor.is_initialized(),
+            "chunks": len(generation.chunks),
+            "generation": generation.number,
+            "books": sorted(generation.files),
+            "embedder": embedder_label(processor),
+            "dim": int(generation.embeddings.shape[1]) if generation.embeddings is not None else 0
+        }
+
+    @app.post("/search")
+    async def search(request: ShardSearchRequest):
+        if not processor.is_initialized():
+            raise HTTPException(status_code=503, detail="Shard has no index")
+        embedding = np.asarray(request.embedding, dtype=np.float32)
+        results = await asyncio.to_thread(processor.search_embedding, embedding, request.top_k)
+        return {
+            "generation": processor.generation.number,
+            "results": [{"text": text, "meta": meta, "score": score} for text, meta, score in results]
+        }
+
+    return app
+
+
+# Coordinator --------------------------------------------------------------
+
+class ShardedRetriever:
+    """Drop-in for DocumentProcessor.search that fans each query out to the shards"""
+
+    def __init__(self, shard_urls: List[str], embedding_model=None):
+        if embedding_model is None:
+            with profiler.phase("sentence_transformers", "import"):
+                from sentence_transformers import SentenceTransformer
+            with profiler.phase("embedding_model", "model_load"):
+                embedding_model = SentenceTransformer(config.EMBEDDING_MODEL)
+            self.model_name = config.EMBEDDING_MODEL
+        else:
+            self.model_name = None
+        self.embedding_model = embedding_model
+        self.shards: Dict[str, Dict] = {
+            url.rstrip("/"): {
+                "healthy": False, "compatible": True, "chunks": 0, "books": [], "generation": None, "last_error": None
+            }
+            for url in shard_urls
+        }
+        self._session: Optional[aiohttp.ClientSession] = None
+
+    def _client(self) -> aiohttp.ClientSession:
+        # Created lazily: a ClientSession must be made inside the running event loop
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    async def _probe(self, url: str):
+        state = self.shards[url]
+        try:
+            async with self._client().get(f"{url}/health", timeout=aiohttp.ClientTimeout(total=config.SHARD_TIMEOUT_S * 5)) as response:
+                info = await response.json()
+        except Exception as e:
+            state.update(healthy=False, last_error=str(e) or type(e).__name__)
+            return
+        if info["embedder"] != embedder_label(self):
+            state.update(healthy=False, compatible=False, last_error=f"embedder mismatch: shard uses {info['embedder']}")
+            return
+        state.update(
+            healthy=bool(info["ready"]), compatible=True, chunks=info["chunks"], books=info["books"],
+            generation=info["generation"], last_error=None
+        )
+
+    async def refresh(self):
+        """Probe every shard's /health"""
+        await asyncio.gather(*(self._probe(url) for url in self.shards))
+        healthy = [url for url, state in self.shards.items() if state["healthy"]]
+        logger.info(f"🧭 {len(healthy)}/{len(self.shards)} retrieval shards healthy ({self.chunk_count()} chunks)")
+
+    async def _query(self, url: str, payload: Dict) -> List[Tuple[str, dict, float]]:
+        start = time.perf_counter()
+        try:
+            async with self._client().post(
+                f"{url}/search", json=payload, timeout=aiohttp.ClientTimeout(total=config.SHARD_TIMEOUT_S)
+            ) as response:
+                response.raise_for_status()
+                body = await response.json()
+        except asyncio.TimeoutError:
+            SHARD_REQUESTS.inc(shard=url, outcome="timeout")
+            raise
+        except Exception:
+            SHARD_REQUESTS.inc(shard=url, outcome="error")
+            raise
+        SHARD_REQUESTS.inc(shard=url, outcome="ok")
+        STAGE_LATENCY.observe(time.perf_counter() - start, stage="shard_search")
+        return [(result["text"], result["meta"], float(result["score"])) for result in body["results"]]
+
+    async def search(self, query: str, top_k: int = None) -> List[Tuple[str, dict, float]]:
+        """
+        Top-k chunks across all shards
+
+        Shards that fail or miss config.SHARD_TIMEOUT_S are left out; the
+        merged results from the rest are returned (partial results).
+        """
+        top_k = top_k or config.TOP_K_RESULTS
+        embedding = await asyncio.to_thread(lambda: self.embedding_model.encode([query], convert_to_numpy=True)[0])
+        payload = {"embedding": np.asarray(embedding, dtype=np.float32).tolist(), "top_k": top_k}
+
+        # Shards serving a different embedding model can't be scored against this query
+        urls = [url for url, state in self.shards.items() if state["compatible"]]
+        responses = await asyncio.gather(*(self._query(url, payload) for url in urls), return_exceptions=True)
+
+        merged, failed = [], []
+        for url, response in zip(urls, responses):
+            if isinstance(response, BaseException):
+                failed.append(url)
+                self.shards[url]["last_error"] = str(response) or type(response).__name__
+            else:
+                merged.extend(response)
+        if failed:
+            logger.warning(f"⚠️ Partial retrieval: {len(failed)}/{len(urls)} shards failed or timed out ({', '.join(failed)})")
+
+        results = heapq.nlargest(top_k, merged, key=lambda result: result[2])
+        logger.info(f"Found {len(results)} relevant chunks across {len(urls) - len(failed)} shards for query: {query[:50]}...")
+        return results
+
+    async def search_session(self, query: str, top_k: int = None, previous=None):
+        """Shard rows aren't addressable from here, so every turn is a full scatter-gather search"""
+        return await self.search(query, top_k), None
+
+    def chunk_count(self) -> int:
+        return sum(state["chunks"] for state in self.shards.values() if state["healthy"])
+
+    def is_initialized(self) -> bool:
+        return any(state["healthy"] and state["chunks"] for state in self.shards.values())
+
+    def status(self) -> Dict[str, Dict]:
+        return {url: dict(state) for url, state in self.shards.items()}
+
+
+def main(argv: Optional[list] = None):
+    import uvicorn
+    from document_processor import DocumentProcessor
+
+    parser = argparse.ArgumentParser(description="Serve semantic search over a subset of the books")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9101)
+    parser.add_argument("--pdf-dir", type=Path, default=config.PDF_DIR)
+    parser.add_argument("--books", nargs="+", help="PDF filenames this shard serves (default: all in --pdf-dir)")
+    parser.add_argument("--artifact", type=Path, help="Serve a prebuilt index artifact instead of ingesting")
+    parser.add_argument("--embedder", choices=("real", "hashing"), default="real")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=getattr(logging, config.LOG_LEVEL))
+
+    embedding_model = None
+    if args.embedder == "hashing":
+        from benchmarks.standins import HashingEmbedder
+        embedding_model = HashingEmbedder()
+    processor = DocumentProcessor(embedding_model=embedding_model)
+    if args.artifact:
+        from index_artifact import load_index
+        processor.swap(load_index(args.artifact))
+    else:
+        processor.process_pdfs(args.pdf_dir, books=args.books)
+    logger.info(f"🧩 Shard serving {processor.chunk_count()} chunks on http://{args.host}:{args.port}")
+
+    uvicorn.run(create_shard_app(processor), host=args.host, port=args.port, log_level=config.LOG_LEVEL.lower())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,117 @@
+"""
+Startup Profiler Module
+Tracks per-component readiness and breaks startup time down into
+import, model-load and index-load phases
+"""
+
+import logging
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List
+
+logger = logging.getLogger(__name__)
+
+# Phase categories reported in the startup timing breakdown
+PHASE_CATEGORIES = ("import", "model_load", "index_load", "other")
+
+# Component lifecycle states
+STATUS_PENDING = "pending"
+STATUS_LOADING = "loading"
+STATUS_READY = "ready"
+STATUS_FAILED = "failed"
+STATUS_DISABLED = "disabled"
+
+
+class StartupProfiler:
+    """Records timed startup phases and component readiness"""
+
+    def __init__(self):
+        """Initialize an empty profiler anchored at process start"""
+        self.started_at = time.time()
+        self._t0 = time.perf_counter()
+        self.phases: List[Dict] = []
+        self.components: Dict[str, Dict] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name: str, category: str = "other"):
+        """
+        Time a startup phase
+
+        Args:
+            name: Human readable phase name (e.g. "whisper")
+            category: One of PHASE_CATEGORIES
+        """
+        if category not in PHASE_CATEGORIES:
+            category = "other"
+        start = time.perf_counter()
+        error = None
+        try:
+            yield
+        except Exception as e:
+            error = str(e)
+            raise
+        finally:
+            duration = time.perf_counter() - start
+            with self._lock:
+                self.phases.append({
+                    "name": name,
+                    "category": category,
+                    "offset_s": round(start - self._t0, 4),
+                    "duration_s": round(duration, 4),
+                    "error": error
+                })
+            logger.info(f"⏱️ Startup phase {category}/{name} took {duration:.2f}s")
+
+    def set_status(self, component: str, status: str, detail: str = None):
+        """Record the readiness state of a component"""
+        with self._lock:
+            entry = self.components.setdefault(component, {})
+            entry["status"] = status
+            entry["detail"] = detail
+            entry["since_s"] = round(time.perf_counter() - self._t0, 4)
+
+    def get_status(self, component: str) -> str:
+        """Get the readiness state of a component"""
+        with self._lock:
+            return self.components.get(component, {}).get("status", STATUS_PENDING)
+
+    def is_ready(self, component: str) -> bool:
+        """Check whether a component finished loading"""
+        return self.get_status(component) == STATUS_READY
+
+    def components_snapshot(self) -> Dict[str, Dict]:
+        """Copy of the component readiness table"""
+        with self._lock:
+            return {name: dict(entry) for name, entry in self.components.items()}
+
+    def report(self) -> Dict:
+        """
+        Build the startup timing report
+
+        Returns:
+            Dictionary with per-category totals, individual phases and component states
+        """
+        with self._lock:
+            phases = list(self.phases)
+        totals = {category: 0.0 for category in PHASE_CATEGORIES}
+        for entry in phases:
+            totals[entry["category"]] += entry["duration_s"]
+        return {
+            "started_at": self.started_at,
+            "uptime_s": round(time.perf_counter() - self._t0, 4),
+            "totals_s": {k: round(v, 4) for k, v in totals.items()},
+            "phases": phases,
+            "components": self.components_snapshot()
+        }
+
+    def log_report(self):
+        """Log a one-line summary of the timing report"""
+        totals = self.report()["totals_s"]
+        summary = ", ".join(f"{k}={v:.2f}s" for k, v in totals.items())
+        logger.info(f"📊 Startup timing: {summary}")
+
+
+# Global instance shared by backend, document processor and storyteller
+profiler = StartupProfiler()
@@ -9,12 +9,21 @@ import logging
 import hashlib
 import aiohttp
 import asyncio
+import threading
+import time
 from pathlib import Path
-from typing import Dict, List, Tuple, Optional
-import google.generativeai as genai
-from openai import AsyncOpenAI
-import whisper
+from typing import Awaitable, Callable, Dict, List, Tuple, Optional
 import config
+from llm_providers import LLMRouter, LLMUnavailableError, build_providers
+from media_io import stream_to_file
+from answer_store import get_answer_store, FALLBACK_QUESTION
+from media_store import get_media_store
+from narration import Narrator
+from prompt_builder import build_prompt
+from history_compactor import fit_history
+from media_jobs import DONE as JOB_DONE, content_key
+from metrics import stage_timer, record_cache, record_upstream_error, TRANSCRIPTION_QUEUE
+from startup_profiler import profiler, STATUS_LOADING, STATUS_READY, STATUS_FAILED, STATUS_DISABLED
 
 logger = logging.getLogger(__name__)
 
@@ -22,35 +31,85 @@ logger = logging.getLogger(__name__)
 class Storyteller:
     """Witty storyteller with multimodal generation capabilities"""
     
-    def __init__(self, document_processor):
+    def __init__(self, document_processor, media_store=None, answer_store=None):
         """
         Initialize storyteller
         
         Args:
             document_processor: Initialized DocumentProcessor instance
+                (may be None and attached later once the knowledge base is loaded)
+            media_store: MediaStore for generated assets (defaults to the global store)
+            answer_store: AnswerStore holding pre-rendered fallbacks (defaults to the global store)
         """
         self.processor = document_processor
-        self.openai_client = None
-        self.gemini_model = None
+        self.media_store = media_store or get_media_store()
+        self.answer_store = answer_store or get_answer_store()
+        self.narrator = Narrator(self.media_store)
+        self.llm = LLMRouter([])
         self.whisper_model = None
         
-        # Initialize LLM based on provider
-        if config.LLM_PROVIDER == "gemini" and config.GEMINI_API_KEY:
-            genai.configure(api_key=config.GEMINI_API_KEY)
-            self.gemini_model = genai.GenerativeModel(config.LLM_MODEL)
-            logger.info(f"✅ Gemini initialized: {config.LLM_MODEL}")
-        elif config.LLM_PROVIDER == "openai" and config.OPENAI_API_KEY:
-            self.openai_client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
-            logger.info(f"✅ OpenAI initialized: {config.LLM_MODEL}")
-        else:
-            logger.warning(f"⚠️  No valid LLM configured for provider: {config.LLM_PROVIDER}")
+        # LLM SDKs and Whisper are imported lazily (see init_llm / load_whisper)
+        # so constructing the storyteller never blocks server startup
+        self._llm_initialized = False
+        self._whisper_attempted = False
+        self._llm_lock = threading.Lock()
+        self._whisper_lock = threading.Lock()
         
-        # Initialize Whisper for audio transcription
-        try:
-            self.whisper_model = whisper.load_model("base")
-            logger.info("✅ Whisper initialized for audio transcription")
-        except Exception as e:
-            logger.warning(f"⚠️  Whisper not available: {str(e)}")
+        # language -> monotonic time of the last background fallback render attempt
+        self._fallback_attempts: Dict[str, float] = {}
+        self._background_tasks = set()
+        
+        # Bounded Whisper concurrency; waiters show up as transcription queue depth
+        self._transcribe_semaphore = asyncio.Semaphore(config.TRANSCRIBE_MAX_CONCURRENCY)
+    
+    def init_llm(self):
+        """Build the LLM router from config.LLM_PROVIDERS (idempotent, thread-safe)"""
+        if self._llm_initialized:
+            return
+        
+        with self._llm_lock:
+            if self._llm_initialized:
+                return
+            
+            profiler.set_status("llm", STATUS_LOADING)
+            try:
+                providers = build_providers()
+                self.llm = LLMRouter(providers)
+                if providers:
+                    names = ", ".join(provider.name for provider in providers)
+                    logger.info(f"✅ LLM router initialized: {names}")
+                    profiler.set_status("llm", STATUS_READY, names)
+                else:
+                    logger.warning(f"⚠️  No valid LLM configured for providers: {', '.join(config.LLM_PROVIDERS)}")
+                    profiler.set_status("llm", STATUS_DISABLED, "no API key for any provider")
+            except Exception as e:
+                logger.error(f"❌ LLM initialization failed: {str(e)}")
+                profiler.set_status("llm", STATUS_FAILED, str(e))
+            finally:
+                self._llm_initialized = True
+    
+    def load_whisper(self):
+        """Import Whisper and load the transcription model (idempotent, thread-safe)"""
+        if self._whisper_attempted:
+            return
+        
+        with self._whisper_lock:
+            if self._whisper_attempted:
+                return
+            
+            profiler.set_status("whisper", STATUS_LOADING)
+            try:
+                with profiler.phase("whisper", "import"):
+                    import whisper
+                with profiler.phase("whisper_base", "model_load"):
+                    self.whisper_model = whisper.load_model("base")
+                logger.info("✅ Whisper initialized for audio transcription")
+                profiler.set_status("whisper", STATUS_READY)
+            except Exception as e:
+                logger.warning(f"⚠️  Whisper not available: {str(e)}")
+                profiler.set_status("whisper", STATUS_FAILED, str(e))
+            finally:
+                self._whisper_attempted = True
     
     async def generate_response(
         self,
@@ -58,7 +117,15 @@ class Storyteller:
         generate_image: bool = True,
         generate_audio: bool = True,
         language: str = "en",
-        conversation_history: List[Dict] = None
+        conversation_history: List[Dict] = None,
+        top_k: int = None,
+        max_tokens: int = None,
+        stream_audio: bool = None,
+        on_event: Callable[[str, Dict], Awaitable[None]] = None,
+        processor=None,
+        previous_retrieval=None,
+        history_summary: str = "",
+        media_jobs=None
     ) -> Dict:
         """
         Generate complete multimodal response
@@ -69,44 +136,50 @@ class Storyteller:
             generate_audio: Whether to generate audio
             language: Target language code
             conversation_history: Previous conversation messages
+            top_k: Chunks to retrieve (defaults to config.RETRIEVAL_TOP_K)
+            max_tokens: Answer token limit (defaults to config.LLM_MAX_TOKENS)
+            stream_audio: Return a streaming narration URL (defaults to config.NARRATION_STREAMING)
+            on_event: Optional async callback for progressive delivery, called with
+                ("sources", {...}), ("answer_delta", {"text"}), ("image", {"url"}) and ("audio", {"url"})
+            processor: Index to retrieve from (defaults to self.processor; e.g. a library's processor)
+            previous_retrieval: The session's last "retrieval" state, reused for follow-up questions
+            history_summary: Rolling summary of the turns before conversation_history
+            media_jobs: MediaJobQueue to render image/audio in the background instead of
+                waiting for them; their job ids are returned under "media_jobs"
             
         Returns:
-            Dictionary with answer, image_url, audio_url, sources
+            Dictionary with answer, image_url, audio_url, sources, per-stage timings (ms),
+            "retrieval" (state for the session's next turn, None when off-topic),
+            "text_failed" (the answer is an LLM error message, not a real answer)
+            and "media_jobs" ({kind: job_id}, when media_jobs was given)
         """
         if conversation_history is None:
             conversation_history = []
+        if stream_audio is None:
+            stream_audio = config.NARRATION_STREAMING
+        
+        async def emit(event: str, **data):
+            if on_event:
+                await on_event(event, data)
         
-        # Retrieve relevant context - INCREASED TO 5 for better coverage
-        results = self.processor.semantic_search(question, top_k=5)
+        timings = {}
+        
+        # Retrieve relevant context - wider than TOP_K_RESULTS for better coverage
+        with stage_timer("retrieval", timings):
+            results, retrieval = await (processor or self.processor).search_session(
+                question, top_k=top_k or config.RETRIEVAL_TOP_K, previous=previous_retrieval
+            )
         
         # Check relevance
         is_relevant = self._is_relevant(results)
         
         if not is_relevant:
-            # Return witty fallback but still try to generate media so UI always shows a photo/audio
-            fallback = self._get_fallback_message(language)
-
-            image_url = None
-            audio_url = None
-            if generate_image and config.IMAGE_GENERATION_ENABLED:
-                try:
-                    image_url = await self._generate_image(question, fallback)
-                except Exception as _e:
-                    image_url = None
-
-            if generate_audio and config.AUDIO_ENABLED:
-                try:
-                    audio_url = await self._generate_audio(fallback, language)
-                except Exception as _e:
-                    audio_url = None
-
-            return {
-                "answer": fallback,
-                "image_url": image_url,
-                "audio_url": audio_url,
-                "is_relevant": False,
-                "sources": []
-            }
+            # Off-topic: answer from the pre-rendered fallback without any upstream call
+            result = self._fallback_response(language, generate_image, generate_audio)
+            result["timings"] = timings
+            result["retrieval"] = None
+            await emit("answer_delta", text=result["answer"])
+            return result
         
         # Extract context and sources
         context = "\n\n".join([chunk for chunk, _, _ in results])
@@ -114,23 +187,48 @@ class Storyteller:
             {
                 "text": chunk[:200] + "...",
                 "source": meta["source"],
+                "also_in": sorted({record["source"] for record in meta.get("also_in", [])} - {meta["source"]}),
                 "score": f"{score:.2f}"
             }
             for chunk, meta, score in results
         ]
         
+        await emit("sources", sources=sources)
+        
         # Generate witty text response
-        answer = await self._generate_text(question, context, language, conversation_history)
+        on_delta = (lambda text: emit("answer_delta", text=text)) if on_event else None
+        with stage_timer("llm", timings):
+            answer, text_failed = await self._generate_text(
+                question, context, language, conversation_history, max_tokens, on_delta, history_summary
+            )
+        
+        want_image = generate_image and config.IMAGE_GENERATION_ENABLED
+        want_audio = generate_audio and config.AUDIO_ENABLED
+        if media_jobs is not None:
+            image_url, audio_url, jobs = await self._submit_media(
+                media_jobs, question, answer, language, stream_audio, want_image, want_audio
+            )
+            return {
+                "answer": answer,
+                "image_url": image_url,
+                "audio_url": audio_url,
+                "is_relevant": True,
+                "sources": sources,
+                "timings": timings,
+                "retrieval": retrieval,
+                "text_failed": text_failed,
+                "media_jobs": jobs
+            }
         
         # Generate image and audio in parallel
         tasks = []
-        if generate_image and config.IMAGE_GENERATION_ENABLED:
-            tasks.append(self._generate_image(question, answer))
+        if want_image:
+            tasks.append(self._timed("image", self._generate_image(question, answer), timings, emit))
         else:
             tasks.append(asyncio.create_task(asyncio.sleep(0)))
         
-        if generate_audio and config.AUDIO_ENABLED:
-            tasks.append(self._generate_audio(answer, language))
+        if want_audio:
+            tasks.append(self._timed("audio", self._generate_audio(answer, language, stream_audio), timings, emit))
         else:
             tasks.append(asyncio.create_task(asyncio.sleep(0)))
         
@@ -145,9 +243,51 @@ class Storyteller:
             "image_url": image_url,
             "audio_url": audio_url,
             "is_relevant": True,
-            "sources": sources
+            "sources": sources,
+            "timings": timings,
+            "retrieval": retrieval,
+            "text_failed": text_failed
         }
     
+    async def _submit_media(self, media_jobs, question: str, answer: str, language: str, stream_audio: bool,
+                      want_image: bool, want_audio: bool) -> Tuple[Optional[str], Optional[str], Dict[str, str]]:
+        """
+        Queue image/audio jobs for an answer
+        
+        Returns:
+            (image_url, audio_url, {kind: job_id}); a URL is set right away when
+            an identical job already finished, and for streamed narration
+        """
+        urls, jobs = {"image": None, "audio": None}, {}
+        renders = []
+        if want_image:
+            renders.append(("image", content_key("image", question, answer), lambda: self._generate_image(question, answer)))
+        if want_audio and stream_audio:
+            # A narration stream URL is returned at once and synthesizes as it plays: no job needed
+            urls["audio"] = await self._generate_audio(answer, language, stream=True)
+        elif want_audio:
+            renders.append((
+                "audio",
+                content_key("audio", answer, language),
+                lambda: self._generate_audio(answer, language)
+            ))
+        for kind, key, render in renders:
+            job = media_jobs.submit(kind, key, render)
+            if job is None:
+                continue
+            jobs[kind] = job.id
+            if job.status == JOB_DONE:
+                urls[kind] = job.url
+        return urls["image"], urls["audio"], jobs
+    
+    async def _timed(self, stage: str, coro, timings: Dict[str, float], emit=None):
+        """Await a coroutine while recording its stage latency, announcing a resulting URL via emit"""
+        with stage_timer(stage, timings):
+            result = await coro
+        if emit and result:
+            await emit(stage, url=result)
+        return result
+    
     def _is_relevant(self, results: List[Tuple]) -> bool:
         """Check if retrieved results are relevant"""
         if not results:
@@ -159,6 +299,70 @@ class Storyteller:
         # Threshold for relevance (lowered from 0.3 to 0.25)
         return avg_score > 0.25
     
+    def _fallback_response(self, language: str, generate_image: bool, generate_audio: bool) -> Dict:
+        """
+        Pre-rendered fallback for a language
+        
+        Until its media exist (first off-topic question after a cold start
+        without warm-up) the text is returned alone and rendering is started
+        in the background, so the request itself never waits on image/TTS APIs.
+        """
+        result = self.answer_store.get_fallback(language, generate_image, generate_audio)
+        if result is not None:
+            return result
+        
+        now = time.monotonic()
+        if now - self._fallback_attempts.get(language, float("-inf")) >= config.FALLBACK_RENDER_RETRY_S:
+            self._fallback_attempts[language] = now
+            task = asyncio.create_task(self.refresh_fallback(language))
+            self._background_tasks.add(task)
+            task.add_done_callback(self._background_tasks.discard)
+        
+        return {
+            "answer": self._get_fallback_message(language),
+            "image_url": None,
+            "audio_url": None,
+            "is_relevant": False,
+            "sources": []
+        }
+    
+    async def refresh_fallback(self, language: str, save: bool = True, store=None) -> bool:
+        """
+        Render the fallback message's image and narration once and store them
+        
+        Args:
+            language: Language code
+            save: Persist the answer store afterwards (the warm-up saves once at the end)
+            store: AnswerStore to put the entry in (defaults to self.answer_store)
+            
+        Returns:
+            True if every enabled medium was rendered and the entry stored
+        """
+        fallback = self._get_fallback_message(language)
+        want_image = config.IMAGE_GENERATION_ENABLED
+        want_audio = config.AUDIO_ENABLED and bool(config.ELEVENLABS_API_KEY)
+        
+        try:
+            image_url, audio_url = await asyncio.gather(
+                self._generate_image("", fallback) if want_image else asyncio.sleep(0),
+                self._generate_audio(fallback, language) if want_audio else asyncio.sleep(0)
+            )
+        except Exception as e:
+            logger.warning(f"⚠️ Fallback render failed ({language}): {e}")
+            return False
+        if (want_image and not image_url) or (want_audio and not audio_url):
+            logger.warning(f"⚠️ Fallback media incomplete ({language}), will retry later")
+            return False
+        
+        store = store or self.answer_store
+        result = {"answer": fallback, "image_url": image_url, "audio_url": audio_url, "is_relevant": False, "sources": []}
+        store.put(FALLBACK_QUESTION, language, result)
+        store.pin_media(result)
+        if save:
+            await asyncio.to_thread(store.save)
+        logger.info(f"🗂️ Pre-rendered fallback stored ({language})")
+        return True
+    
     def _get_fallback_message(self, language: str) -> str:
         """Get fallback message in specified language"""
         fallbacks = {
@@ -175,98 +379,58 @@ class Storyteller:
         question: str, 
         context: str, 
         language: str = "en",
-        conversation_history: List[Dict] = None
-    ) -> str:
+        conversation_history: List[Dict] = None,
+        max_tokens: int = None,
+        on_delta: Callable[[str], Awaitable[None]] = None,
+        history_summary: str = ""
+    ) -> Tuple[str, bool]:
         """
-        Generate witty text response using Gemini or OpenAI
+        Generate witty text response through the LLM router (hedging/failover across providers)
         
         Args:
             question: User's question
             context: Retrieved context from books
             language: Target language code
             conversation_history: Previous conversation messages
+            max_tokens: Answer token limit (defaults to config.LLM_MAX_TOKENS)
+            on_delta: Optional async callback receiving answer text as it streams in
+            history_summary: Rolling summary of the turns before conversation_history
             
         Returns:
-            Witty answer string
+            (witty answer string, True if it is an error message instead of an answer)
         """
         if conversation_history is None:
             conversation_history = []
+        max_tokens = max_tokens or config.LLM_MAX_TOKENS
+        
+        if not self._llm_initialized:
+            await asyncio.to_thread(self.init_llm)
         
         try:
-            # Add STRONG language instruction
-            lang_name = config.SUPPORTED_LANGUAGES.get(language, "English")
-            if language != "en":
-                lang_instruction = f"\n\n**CRITICAL: You MUST respond ENTIRELY in {lang_name}. Do NOT use English. Translate everything to {lang_name}.**"
-            else:
-                lang_instruction = ""
+            if not self.llm.available:
+                return "Sorry, text generation is not available. Please configure LLM API key.", True
             
-            # Build prompt with conversation context
-            base_prompt = config.STORYTELLER_PROMPT.format(
-                context=context,
-                question=question
-            ) + lang_instruction
+            # Persona (+ language instruction) -> context -> summary -> recent messages -> question,
+            # with summary + messages held to config.HISTORY_MAX_TOKENS
+            summary, history = fit_history(history_summary, conversation_history)
+            prompt = build_prompt(question, context, language, history, summary)
+            tokens = prompt.token_counts()
+            logger.debug(f"Prompt tokens: {tokens['cacheable']} cacheable, {tokens['dynamic']} dynamic")
             
-            if config.LLM_PROVIDER == "openai" and self.openai_client:
-                # Use OpenAI
-                messages = []
-                
-                # Add conversation history
-                for msg in conversation_history[-6:]:  # Last 3 exchanges
-                    messages.append({
-                        "role": msg["role"],
-                        "content": msg["content"]
-                    })
-                
-                # Add current prompt
-                messages.append({
-                    "role": "user",
-                    "content": base_prompt
-                })
-                
-                response = await self.openai_client.chat.completions.create(
-                    model=config.LLM_MODEL,
-                    messages=messages,
-                    temperature=config.LLM_TEMPERATURE,
-                    max_tokens=config.LLM_MAX_TOKENS
-                )
-                
-                answer = response.choices[0].message.content.strip()
-                logger.info(f"✅ OpenAI generated response ({len(answer)} chars)")
-                return answer
-                
-            elif config.LLM_PROVIDER == "gemini" and self.gemini_model:
-                # Use Gemini
-                # Add conversation history to prompt
-                if conversation_history:
-                    history_text = "\n\nPrevious conversation:\n"
-                    for msg in conversation_history[-6:]:
-                        role = "User" if msg["role"] == "user" else "Assistant"
-                        history_text += f"{role}: {msg['content']}\n"
-                    base_prompt = history_text + "\n" + base_prompt
-                
-                response = await asyncio.to_thread(
-                    self.gemini_model.generate_content,
-                    base_prompt,
-                    generation_config=genai.types.GenerationConfig(
-                        temperature=config.LLM_TEMPERATURE,
-                        max_output_tokens=config.LLM_MAX_TOKENS,
-                    )
-                )
-                
-                answer = response.text.strip()
-                logger.info(f"✅ Gemini generated response ({len(answer)} chars)")
-                return answer
+            if on_delta:
+                answer = await self.llm.generate_stream(prompt, on_delta, max_tokens=max_tokens)
             else:
-                return "Sorry, text generation is not available. Please configure LLM API key."
+                answer = await self.llm.generate(prompt, max_tokens=max_tokens)
+            logger.info(f"✅ LLM generated response ({len(answer)} chars)")
+            return answer, False
             
+        except LLMUnavailableError as e:
+            # Provider errors are already counted per provider by the router
+            logger.error(f"❌ Error generating text: {str(e)}")
+            return f"Oops! My wit machine broke down. Try asking again! 😅 (Error: {str(e)[:100]})", True
         except Exception as e:
             logger.error(f"❌ Error generating text: {str(e)}", exc_info=True)
-            logger.error(f"Full exception details: {repr(e)}")
-            import traceback
-            logger.error(f"Traceback: {traceback.format_exc()}")
-            traceback.print_exc()
-            # Return error with details for debugging
-            return f"Oops! My wit machine broke down. Try asking again! 😅 (Error: {str(e)[:100]})"
+            return f"Oops! My wit machine broke down. Try asking again! 😅 (Error: {str(e)[:100]})", True
     
     async def _generate_image(self, question: str, answer: str) -> str:
         """
@@ -296,26 +460,32 @@ class Storyteller:
             import urllib.parse
             encoded_prompt = urllib.parse.quote(prompt)
             
-            image_url = f"https://image.pollinations.ai/prompt/{encoded_prompt}?width=512&height=512&model=flux&nologo=true&enhance=true"
+            image_url = f"{config.IMAGE_API_URL}/{encoded_prompt}?width=512&height=512&model=flux&nologo=true&enhance=true"
+            
+            # Filenames are content-addressed by prompt, so a stored asset is a cache hit
+            stem = hashlib.md5(prompt.encode()).hexdigest()
+            cached_url = self.media_store.lookup("images", stem)
+            record_cache("image", cached_url is not None)
+            if cached_url:
+                logger.info(f"♻️ Reusing cached image: {cached_url}")
+                return cached_url
+            filepath = self.media_store.path_for("images", stem, ".png")
             
             async with aiohttp.ClientSession() as session:
                 async with session.get(image_url, timeout=aiohttp.ClientTimeout(total=30)) as response:
                     if response.status == 200:
-                        image_data = await response.read()
-                        
-                        filename = hashlib.md5(prompt.encode()).hexdigest() + ".png"
-                        filepath = config.IMAGES_DIR / filename
+                        # Stream straight to disk; the file appears atomically when complete
+                        size = await stream_to_file(response.content.iter_chunked(config.MEDIA_CHUNK_SIZE), filepath)
                         
-                        with open(filepath, "wb") as f:
-                            f.write(image_data)
-                        
-                        logger.info(f"✅ AI image generated: {filename}")
-                        return f"/static/images/{filename}"
+                        logger.info(f"✅ AI image generated: {filepath.name} ({size} bytes)")
+                        return self.media_store.register("images", filepath)
                     else:
+                        record_upstream_error("pollinations")
                         logger.warning(f"⚠️ Image API returned status {response.status}")
                         return None
                         
         except Exception as e:
+            record_upstream_error("pollinations")
             logger.error(f"❌ Image generation error: {str(e)}")
             return None
     
@@ -336,16 +506,18 @@ class Storyteller:
         
         return prompt[:800]
     
-    async def _generate_audio(self, text: str, language: str = "en") -> str:
+    async def _generate_audio(self, text: str, language: str = "en", stream: bool = False) -> str:
         """
-        Generate audio narration using ElevenLabs
+        Generate audio narration using ElevenLabs, one cached request per sentence
         
         Args:
-            text: Text to narrate
+            text: Text to narrate (the whole text; nothing is truncated)
             language: Language code for narration
+            stream: Return a chunked stream URL that starts playing after the
+                first sentence instead of waiting for the joined MP3
             
         Returns:
-            URL path to generated audio
+            URL path to generated audio or audio stream
         """
         if not config.ELEVENLABS_API_KEY:
             logger.warning("⚠️ ELEVENLABS_API_KEY not set - skipping audio generation")
@@ -357,57 +529,58 @@ class Storyteller:
         
         try:
             logger.info(f"🎵 Starting audio generation for {len(text)} chars...")
+            if stream:
+                return self.narrator.open_stream(text, language)
             
-            # Clean text for TTS (remove emojis)
-            import re
-            clean_text = re.sub(r'[^\w\s.,!?\'\"-]', '', text)
-            
-            if len(clean_text) == 0:
-                logger.warning("⚠️ No text to generate audio from")
-                return None
-            
-            # Call ElevenLabs API
-            url = f"{config.ELEVENLABS_API_URL}/{config.ELEVENLABS_VOICE_ID}"
-            
-            logger.info(f"📡 Calling ElevenLabs API: {url}")
-            
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "xi-api-key": config.ELEVENLABS_API_KEY,
-                    "Content-Type": "application/json"
-                }
-                
-                payload = {
-                    "text": clean_text[:500],  # Limit to 500 chars for faster generation
-                    "model_id": "eleven_multilingual_v2" if language != "en" else "eleven_monolingual_v1",
-                    "voice_settings": {
-                        "stability": config.AUDIO_STABILITY,
-                        "similarity_boost": config.AUDIO_SIMILARITY_BOOST
-                    }
-                }
-                
-                async with session.post(url, headers=headers, json=payload, timeout=aiohttp.ClientTimeout(total=30)) as response:
-                    if response.status != 200:
-                        error_text = await response.text()
-                        logger.error(f"❌ ElevenLabs API error {response.status}: {error_text}")
-                        return None
-                    
-                    audio_data = await response.read()
-                    
-                    # Save audio
-                    filename = hashlib.md5(clean_text.encode()).hexdigest() + ".mp3"
-                    filepath = config.AUDIO_DIR / filename
-                    
-                    with open(filepath, "wb") as f:
-                        f.write(audio_data)
-                    
-                    logger.info(f"✅ Audio generated successfully: {filename} ({len(audio_data)} bytes)")
-                    return f"/static/audio/{filename}"
+            audio_url = await self.narrator.narrate(text, language)
+            if audio_url:
+                logger.info(f"✅ Audio generated successfully: {audio_url}")
+            return audio_url
                     
         except Exception as e:
+            record_upstream_error("elevenlabs")
             logger.error(f"❌ Error generating audio: {str(e)}", exc_info=True)
             return None
     
+    async def _run_whisper(self, audio, language: str, **options) -> str:
+        """Run Whisper on a file path or 16 kHz float32 samples under the transcription semaphore"""
+        with TRANSCRIPTION_QUEUE.track(state="waiting"):
+            await self._transcribe_semaphore.acquire()
+        try:
+            with TRANSCRIPTION_QUEUE.track(state="running"), stage_timer("transcription"):
+                result = await asyncio.to_thread(
+                    self.whisper_model.transcribe,
+                    audio,
+                    fp16=False,  # Disable fp16 for CPU compatibility
+                    language=language,
+                    task='transcribe',
+                    **options
+                )
+        except Exception:
+            record_upstream_error("whisper")
+            raise
+        finally:
+            self._transcribe_semaphore.release()
+        return result["text"].strip()
+    
+    async def transcribe_samples(self, samples, language: str = "en", prompt: str = None) -> str:
+        """
+        Transcribe a window of raw audio (used by streaming voice sessions)
+        
+        Args:
+            samples: Mono float32 NumPy array at 16 kHz
+            language: Language hint
+            prompt: Previously transcribed text, to keep consecutive windows consistent
+            
+        Returns:
+            Transcribed text (may be empty for silence)
+        """
+        if not self._whisper_attempted:
+            await asyncio.to_thread(self.load_whisper)
+        if not self.whisper_model:
+            raise Exception("Whisper model not initialized")
+        return await self._run_whisper(samples, language=language, initial_prompt=prompt or None)
+    
     async def transcribe_audio(self, audio_path: str) -> str:
         """
         Transcribe audio to text using Whisper
@@ -418,6 +591,9 @@ class Storyteller:
         Returns:
             Transcribed text
         """
+        if not self._whisper_attempted:
+            await asyncio.to_thread(self.load_whisper)
+        
         if not self.whisper_model:
             logger.error("❌ Whisper model not initialized")
             raise Exception("Whisper model not initialized")
@@ -448,15 +624,7 @@ class Storyteller:
             
             # Transcribe with language hint (Whisper handles various audio formats including webm)
             logger.info(f"🎯 Starting Whisper transcription...")
-            result = await asyncio.to_thread(
-                self.whisper_model.transcribe,
-                audio_path,
-                fp16=False,  # Disable fp16 for CPU compatibility
-                language='en',  # Hint English for better accuracy
-                task='transcribe'
-            )
-            
-            text = result["text"].strip()
+            text = await self._run_whisper(audio_path, language='en')  # Hint English for better accuracy
             
             if not text:
                 logger.warning("⚠️ Transcription returned empty text")
@@ -0,0 +1,54 @@
+"""
+Answer store warm-up: fallbacks land in (and are saved with) the store warm_up is given
+"""
+
+import asyncio
+
+import config
+from answer_store import AnswerStore, warm_up
+from media_store import MediaStore
+from storyteller import Storyteller
+
+
+def test_warm_up_stores_fallbacks_in_given_store(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "IMAGE_GENERATION_ENABLED", True)
+    monkeypatch.setattr(config, "AUDIO_ENABLED", False)
+
+    media = MediaStore(
+        dirs={"images": tmp_path / "images", "audio": tmp_path / "audio"},
+        index_path=tmp_path / "media_index.json"
+    )
+    for directory in media.dirs.values():
+        directory.mkdir()
+    store = AnswerStore(path=tmp_path / "answers.json", media_store=media)
+    # A different instance, like the one storyteller.py imports when answer_store.py runs as __main__
+    other = AnswerStore(path=tmp_path / "other.json", media_store=media)
+    storyteller = Storyteller(None, media_store=media, answer_store=other)
+
+    async def fake_image(question, answer):
+        path = media.path_for("images", f"img{abs(hash(answer))}", ".png")
+        path.write_bytes(b"png")
+        return media.register("images", path)
+
+    async def fake_response(question, language, **kwargs):
+        return {"answer": f"About {question}", "image_url": await fake_image(question, question),
+                "audio_url": None, "is_relevant": True, "sources": []}
+
+    monkeypatch.setattr(storyteller, "_generate_image", fake_image)
+    monkeypatch.setattr(storyteller, "generate_response", fake_response)
+
+    counts = asyncio.run(warm_up(storyteller, store, questions=["Who is the hero?"], languages=["en", "es"]))
+
+    assert counts == {"generated": 4, "skipped": 0, "failed": 0}
+    for language in ("en", "es"):
+        fallback = store.get_fallback(language)
+        assert fallback is not None
+        assert fallback["answer"] == storyteller._get_fallback_message(language)
+        assert fallback["image_url"]
+        assert other.get_fallback(language) is None
+
+    # Persisted: a fresh load sees the fallbacks, and a second run skips them
+    reloaded = AnswerStore(path=tmp_path / "answers.json", media_store=media)
+    assert reloaded.get_fallback("en") is not None
+    counts = asyncio.run(warm_up(storyteller, reloaded, questions=["Who is the hero?"], languages=["en", "es"]))
+    assert counts["skipped"] == 4
@@ -0,0 +1,263 @@
+"""
+Voice Session Module
+Duplex voice over a WebSocket: the client streams 16 kHz mono PCM16 frames
+while speaking, the server transcribes buffered windows incrementally and,
+on end of speech, runs the chat pipeline and streams back transcripts,
+answer text and media events
+
+Protocol (JSON text frames unless noted):
+    client -> server
+        {"type": "start", "language", "session_id", "library", "generate_image", "generate_audio", "history_mode"}
+        <binary PCM16 little-endian frames>
+        {"type": "end"}       end of speech (optional; server-side silence detection also ends it)
+        {"type": "cancel"}    drop the current utterance
+    server -> client
+        ready, speech_start, partial_transcript, transcript,
+        sources, answer_delta, image, audio, answer, error
+"""
+
+import asyncio
+import json
+import logging
+from typing import Awaitable, Callable, Dict, List, Optional
+
+import numpy as np
+from fastapi import HTTPException, WebSocket, WebSocketDisconnect
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# (question, options, on_event) -> chat result dict
+AnswerFn = Callable[[str, Dict, Callable[[str, Dict], Awaitable[None]]], Awaitable[Dict]]
+
+
+class IncrementalTranscriber:
+    """
+    Utterance buffer with windowed Whisper passes
+
+    Audio older than config.VOICE_WINDOW_S is committed once, cut at the
+    quietest point near the window edge, so each partial pass and the final
+    pass only re-transcribe the most recent window.
+    """
+
+    def __init__(self, transcribe: Callable[..., Awaitable[str]], language: str = "en"):
+        self._transcribe = transcribe
+        self.language = language
+        self.reset()
+
+    def reset(self):
+        self._chunks: List[np.ndarray] = []
+        self._samples = 0
+        self._committed_upto = 0
+        self._committed: List[str] = []
+        self.speech_started = False
+        self._silence_s = 0.0
+        self._since_partial_s = 0.0
+
+    @property
+    def duration_s(self) -> float:
+        return self._samples / config.VOICE_SAMPLE_RATE
+
+    def feed(self, frame: bytes) -> bool:
+        """
+        Append a PCM16 frame
+
+        Returns:
+            True when end of speech is detected (trailing silence or max length)
+        """
+        samples = np.frombuffer(frame[: len(frame) // 2 * 2], dtype="<i2").astype(np.float32) / 32768.0
+        if not len(samples):
+            return False
+        self._chunks.append(samples)
+        self._samples += len(samples)
+
+        seconds = len(samples) / config.VOICE_SAMPLE_RATE
+        self._since_partial_s += seconds
+        if float(np.sqrt(np.mean(samples ** 2))) >= config.VOICE_SILENCE_RMS:
+            self.speech_started = True
+            self._silence_s = 0.0
+        elif self.speech_started:
+            self._silence_s += seconds
+
+        return (
+            (self.speech_started and self._silence_s >= config.VOICE_SILENCE_S)
+            or self.duration_s >= config.VOICE_MAX_UTTERANCE_S
+        )
+
+    def partial_due(self) -> bool:
+        return self.speech_started and self._since_partial_s >= config.VOICE_PARTIAL_INTERVAL_S
+
+    def _audio(self) -> np.ndarray:
+        if len(self._chunks) > 1:
+            self._chunks = [np.concatenate(self._chunks)]
+        return self._chunks[0] if self._chunks else np.zeros(0, dtype=np.float32)
+
+    def _quiet_point(self, audio: np.ndarray, window: int) -> int:
+        """Sample index of the quietest 100 ms frame in the last 2 s before the window edge"""
+        frame = config.VOICE_SAMPLE_RATE // 10
+        start = max(frame, window - 2 * config.VOICE_SAMPLE_RATE)
+        candidates = range(start, window - frame + 1, frame)
+        energies = [float(np.mean(audio[i:i + frame] ** 2)) for i in candidates]
+        return candidates[int(np.argmin(energies))] if energies else window
+
+    async def _commit_windows(self):
+        window = int(config.VOICE_WINDOW_S * config.VOICE_SAMPLE_RATE)
+        while True:
+            audio = self._audio()[self._committed_upto:]
+            if len(audio) <= window:
+                return
+            cut = self._quiet_point(audio, window)
+            text = await self._transcribe(audio[:cut], self.language, self.text[-200:])
+            if text:
+                self._committed.append(text)
+            self._committed_upto += cut
+
+    async def _tail(self) -> str:
+        audio = self._audio()[self._committed_upto:]
+        if not self.speech_started or len(audio) < config.VOICE_MIN_SPEECH_S * config.VOICE_SAMPLE_RATE:
+            return ""
+        return await self._transcribe(audio, self.language, self.text[-200:])
+
+    @property
+    def text(self) -> str:
+        return " ".join(self._committed)
+
+    async def partial(self) -> str:
+        """Transcript so far (committed windows + current window)"""
+        self._since_partial_s = 0.0
+        await self._commit_windows()
+        return " ".join(part for part in (self.text, await self._tail()) if part)
+
+    async def finish(self) -> str:
+        """Final transcript of the utterance"""
+        return await self.partial()
+
+
+class VoiceSession:
+    """One WebSocket connection: audio frames in, transcript and answer events out"""
+
+    def __init__(self, websocket: WebSocket, storyteller, answer: AnswerFn):
+        self.websocket = websocket
+        self.answer = answer
+        self.options = {
+            "language": "en",
+            "session_id": "default",
+            "library": config.DEFAULT_LIBRARY,
+            "generate_image": True,
+            "generate_audio": True,
+            "history_mode": "full"
+        }
+        self.transcriber = IncrementalTranscriber(storyteller.transcribe_samples)
+        self._partial_task: Optional[asyncio.Task] = None
+        self._send_lock = asyncio.Lock()
+        self._closed = False
+
+    async def send(self, event: str, **data):
+        """Send an event; after the client goes away further sends are dropped"""
+        if self._closed:
+            return
+        async with self._send_lock:
+            try:
+                await self.websocket.send_json({"type": event, **data})
+            except Exception:
+                self._closed = True
+
+    async def run(self):
+        await self.websocket.accept()
+        await self.send("ready", sample_rate=config.VOICE_SAMPLE_RATE, format="pcm16")
+        try:
+            while not self._closed:
+                message = await self.websocket.receive()
+                if message["type"] == "websocket.disconnect":
+                    break
+                if message.get("bytes") is not None:
+                    await self._on_audio(message["bytes"])
+                elif message.get("text") is not None:
+                    await self._on_control(message["text"])
+        except WebSocketDisconnect:
+            pass
+        finally:
+            self._closed = True
+            if self._partial_task:
+                self._partial_task.cancel()
+
+    async def _on_control(self, text: str):
+        try:
+            message = json.loads(text)
+        except ValueError:
+            await self.send("error", detail="Invalid JSON message")
+            return
+
+        kind = message.get("type")
+        if kind in ("start", "config"):
+            for key in self.options:
+                if key in message:
+                    self.options[key] = message[key]
+            self.transcriber.language = self.options["language"]
+        elif kind == "end":
+            await self._end_of_speech()
+        elif kind == "cancel":
+            await self._await_partial()
+            self.transcriber.reset()
+        else:
+            await self.send("error", detail=f"Unknown message type: {kind}")
+
+    async def _on_audio(self, frame: bytes):
+        was_speaking = self.transcriber.speech_started
+        ended = self.transcriber.feed(frame)
+        if self.transcriber.speech_started and not was_speaking:
+            await self.send("speech_start")
+        if ended:
+            await self._end_of_speech()
+        elif self.transcriber.partial_due() and (self._partial_task is None or self._partial_task.done()):
+            # Partials run beside the receive loop; a new one starts only when the last finished
+            self._partial_task = asyncio.create_task(self._send_partial())
+
+    async def _send_partial(self):
+        try:
+            text = await self.transcriber.partial()
+        except Exception as e:
+            logger.warning(f"⚠️ Partial transcription failed: {e}")
+            return
+        if text:
+            await self.send("partial_transcript", text=text)
+
+    async def _await_partial(self):
+        if self._partial_task is not None:
+            try:
+                await self._partial_task
+            except Exception:
+                pass
+            self._partial_task = None
+
+    async def _end_of_speech(self):
+        await self._await_partial()
+        try:
+            question = await self.transcriber.finish()
+        except Exception as e:
+            logger.error(f"❌ Voice transcription failed: {str(e)}")
+            await self.send("error", detail=f"Transcription failed: {str(e)}")
+            return
+        finally:
+            self.transcriber.reset()
+
+        await self.send("transcript", text=question)
+        if not question:
+            return
+
+        try:
+            result = await self.answer(question, dict(self.options), self.send_event)
+        except HTTPException as e:
+            retry_after = (e.headers or {}).get("Retry-After")
+            await self.send("error", detail=e.detail, status=e.status_code, retry_after=retry_after)
+            return
+        except Exception as e:
+            logger.error(f"❌ Voice answer failed: {str(e)}")
+            await self.send("error", detail=str(e), status=500)
+            return
+        await self.send("answer", **result)
+
+    async def send_event(self, event: str, data: Dict):
+        """Pipeline event callback (Storyteller.generate_response on_event)"""
+        await self.send(event, **data)